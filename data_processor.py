@@ -1,8 +1,13 @@
 import json
 import os
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from langchain_community.vectorstores import Chroma
+from modules.corpus_store import CorpusStore
+from modules.vector_index import IncrementalIndexer
+from modules.parent_child import ParentChildSplitter, ParentStore
+from modules.embedding_cache import cached_embeddings
+from modules.parallel_embeddings import build_embeddings
+from modules.quantized_embeddings import load_quantized_embeddings
 # Import from the recommended package to éviter LangChainDeprecationWarning
 try:
     from langchain_huggingface import HuggingFaceEmbeddings
@@ -23,20 +28,44 @@ class DataProcessor:
         # Initialiser le modèle d'embedding avec OpenAI pour simplifier
         try:
             # Essayer avec HuggingFaceEmbeddings
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
-                model_kwargs={'device': 'cuda' if os.environ.get('USE_CUDA', 'False').lower() == 'true' else 'cpu'}
-            )
+            # Modèle quantifié en int8 si EMBEDDING_BACKEND=int8, sinon fp32
+            self.embeddings = load_quantized_embeddings("sentence-transformers/all-MiniLM-L6-v2")
+            if self.embeddings is None:
+                self.embeddings = HuggingFaceEmbeddings(
+                    model_name="sentence-transformers/all-MiniLM-L6-v2",
+                    model_kwargs={'device': 'cuda' if os.environ.get('USE_CUDA', 'False').lower() == 'true' else 'cpu'}
+                )
+            # Cache sur disque partagé avec les chatbots: seuls les textes jamais vus sont vectorisés
+            self.embeddings = cached_embeddings(self.embeddings, os.path.join(self.data_dir, "cache"))
         except Exception as e:
             print(f"Erreur lors de l'initialisation de HuggingFaceEmbeddings: {e}")
             # Fallback sur des embeddings simples
             from langchain_community.embeddings import FakeEmbeddings
             self.embeddings = FakeEmbeddings(size=384)  # Utiliser des embeddings de test
+        
+        # Passages parents découpés en chunks enfants à la mesure du modèle d'embeddings
+        # (tokens, frontières de phrases); seuls les enfants sont vectorisés
+        self.text_splitter = ParentChildSplitter.from_embeddings(self.embeddings)
     
     def load_data(self):
-        """Charge les données scrappées depuis les fichiers JSON."""
+        """Charge les données scrappées (corpus SQLite, sinon fichiers JSON)."""
         all_data = []
         
+        # Corpus SQLite du scraper: toutes les pages en une requête
+        store_path = os.path.join(self.data_dir, "corpus.sqlite")
+        if os.path.exists(store_path):
+            try:
+                store = CorpusStore(store_path, readonly=True)
+                try:
+                    all_data = list(store.iter_pages())
+                finally:
+                    store.close()
+                if all_data:
+                    print(f"Loaded data from corpus.sqlite ({len(all_data)} pages).")
+                    return all_data
+            except Exception as e:
+                print(f"Couldn't load corpus.sqlite: {e}")
+        
         # Essayer de charger all_pages.json en priorité
         try:
             with open(f"{self.data_dir}/all_pages.json", 'r', encoding='utf-8') as f:
@@ -91,14 +120,8 @@ Contenu: {content}
         return documents
     
     def split_documents(self, documents):
-        """Divise les documents en chunks pour une meilleure recherche."""
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
-        
-        return text_splitter.split_documents(documents)
+        """Divise les documents en chunks (enfants) pour une meilleure recherche."""
+        return self.text_splitter.split_documents(documents)
     
     def create_vector_db(self):
         """Crée la base de données vectorielle à partir des documents."""
@@ -112,20 +135,25 @@ Contenu: {content}
         # Créer les documents
         documents = self.create_documents(data)
         
-        # Diviser les documents en chunks
-        chunks = self.split_documents(documents)
-        
-        print(f"Created {len(chunks)} document chunks from {len(documents)} original documents.")
-        
-        # Créer la base de données vectorielle
+        # Synchroniser la base de données vectorielle: seuls les documents nouveaux
+        # ou modifiés sont découpés et vectorisés, les chunks des documents disparus supprimés
         # Chroma persiste automatiquement les données depuis la version 0.4.x
-        vectordb = Chroma.from_documents(
-            documents=chunks,
-            embedding=self.embeddings,
-            persist_directory=self.db_dir
+        # Vectorisation répartie sur EMBEDDING_WORKERS processus si demandé
+        index_embeddings = build_embeddings(self.embeddings)
+        vectordb = Chroma(
+            persist_directory=self.db_dir,
+            embedding_function=index_embeddings
         )
+        parent_store = ParentStore.for_index(self.db_dir)
+        try:
+            indexer = IncrementalIndexer(vectordb, self.text_splitter, self.db_dir, parent_store=parent_store)
+            indexer.sync(documents)
+        finally:
+            parent_store.close()
+            if index_embeddings is not self.embeddings:
+                index_embeddings.close()
         
-        return vectordb
+        return self.load_vector_db() if index_embeddings is not self.embeddings else vectordb
     
     def load_vector_db(self):
         """Charge une base de données vectorielle existante."""
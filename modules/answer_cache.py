@@ -0,0 +1,191 @@
+"""
+Cache sémantique des réponses du chatbot.
+
+Une question reformulée ("comment emprunter un livre ?", "je voudrais
+emprunter un ouvrage") repassait par la recherche et par la génération du
+LLM, soit plusieurs secondes avec llama.cpp sur CPU. SemanticAnswerCache
+garde les questions récemment traitées avec leur embedding, leur réponse et
+leurs sources: si la question la plus proche (similarité cosinus) dépasse le
+seuil, sa réponse est retournée directement.
+
+Les entrées sont invalidées quand la version de l'index change. Les réponses
+qui dépendent de données en temps réel (module d'horaires) ne sont jamais
+mises en cache. L'éviction (la moins récemment utilisée d'abord) est bornée
+par la mémoire occupée: embeddings, réponses et textes des sources.
+"""
+
+import math
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from modules.retrieval_cache import normalize_query
+from modules.vector_index import IndexVersionWatcher
+
+# Sources de données en temps réel: les réponses qui les citent ne sont pas mises en cache
+TIME_SENSITIVE_SOURCES = {"module_horaires", "hours"}
+
+
+def _unit(embedding):
+    norm = math.sqrt(sum(value * value for value in embedding)) or 1.0
+    return array("f", (value / norm for value in embedding))
+
+
+def _entry_size(normalized, vector, answer, sources):
+    """Mémoire approximative d'une entrée (octets)."""
+    size = len(normalized) + vector.itemsize * len(vector) + len(answer)
+    for document in sources:
+        size += len(document.page_content) + len(str(document.metadata))
+    return size + 200  # objets Python de l'entrée
+
+
+class SemanticAnswerCache:
+    """
+    Réponses aux questions récentes, retrouvées par plus proche voisin.
+
+    Usage:
+        embedding = embeddings.embed_query(question)
+        cached = cache.lookup(embedding)
+        if cached is None:
+            answer, sources = ...
+            cache.store(question, embedding, answer, sources)
+    """
+
+    def __init__(self, db_dir, threshold=0.92, max_bytes=16 * 1024 * 1024, ttl=None):
+        """
+        Args:
+            db_dir (str): Répertoire de la base vectorielle (version de l'index)
+            threshold (float): Similarité cosinus minimale pour servir une réponse
+            max_bytes (int): Mémoire maximale occupée par les entrées
+            ttl (float): Durée de vie d'une réponse en secondes (None: jusqu'à invalidation)
+        """
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # question normalisée -> entrée
+        self._bytes = 0
+        self._matrix = None  # (questions, matrice des embeddings) pour numpy, reconstruite au besoin
+        self._lock = threading.Lock()
+        self._watcher = IndexVersionWatcher(db_dir)
+        self._version = self._watcher.current()
+
+    @classmethod
+    def from_env(cls, db_dir):
+        """Cache configuré par ANSWER_CACHE_THRESHOLD (0.92 par défaut) et ANSWER_CACHE_MB (16)."""
+        return cls(db_dir,
+                   threshold=float(os.environ.get("ANSWER_CACHE_THRESHOLD", 0.92)),
+                   max_bytes=int(float(os.environ.get("ANSWER_CACHE_MB", 16)) * 1024 * 1024))
+
+    def _check_version(self):
+        version = self._watcher.current()
+        if version != self._version:
+            # Index reconstruit: les réponses peuvent citer des passages modifiés
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            self._matrix = None
+            self._version = version
+
+    def _remove(self, normalized):
+        entry = self._entries.pop(normalized)
+        self._bytes -= entry["size"]
+        self._matrix = None
+
+    def _nearest(self, vector):
+        """(question normalisée, similarité) de l'entrée la plus proche."""
+        if np is not None:
+            if self._matrix is None:
+                questions = list(self._entries)
+                self._matrix = (questions, np.array([self._entries[q]["vector"] for q in questions],
+                                                    dtype=np.float32))
+            questions, matrix = self._matrix
+            scores = matrix @ np.asarray(vector, dtype=np.float32)
+            best = int(np.argmax(scores))
+            return questions[best], float(scores[best])
+        best, best_score = None, -1.0
+        for normalized, entry in self._entries.items():
+            score = sum(a * b for a, b in zip(entry["vector"], vector))
+            if score > best_score:
+                best, best_score = normalized, score
+        return best, best_score
+
+    def lookup(self, embedding):
+        """
+        Réponse à la question la plus proche, si sa similarité atteint le seuil.
+
+        Returns:
+            tuple: (réponse, sources, similarité), ou None
+        """
+        vector = _unit(embedding)
+        with self._lock:
+            self._check_version()
+            if self._entries:
+                normalized, score = self._nearest(vector)
+                entry = self._entries[normalized]
+                if self.ttl is not None and entry["created"] + self.ttl < time.monotonic():
+                    self._remove(normalized)
+                elif score >= self.threshold:
+                    self._entries.move_to_end(normalized)
+                    self.hits += 1
+                    return entry["answer"], list(entry["sources"]), score
+            self.misses += 1
+            return None
+
+    def store(self, question, embedding, answer, sources):
+        """
+        Enregistre une réponse (sauf si elle cite une source en temps réel).
+
+        Returns:
+            bool: True si la réponse a été mise en cache
+        """
+        if not answer or any(document.metadata.get("source") in TIME_SENSITIVE_SOURCES
+                             for document in sources):
+            return False
+        normalized = normalize_query(question)
+        vector = _unit(embedding)
+        size = _entry_size(normalized, vector, answer, sources)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            self._check_version()
+            if normalized in self._entries:
+                self._remove(normalized)
+            self._entries[normalized] = {"vector": vector, "answer": answer, "sources": list(sources),
+                                         "size": size, "created": time.monotonic()}
+            self._bytes += size
+            self._matrix = None
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._matrix = None
+
+    def stats(self):
+        """Compteurs du cache: succès, échecs, évictions, invalidations, entrées, mémoire."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
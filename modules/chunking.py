@@ -0,0 +1,215 @@
+"""
+Découpage des documents à la mesure du modèle d'embeddings.
+
+all-MiniLM-L6-v2 tronque ses entrées à 256 tokens (word pieces): un découpage
+en caractères (500 caractères) produit à la fois des chunks tronqués sans
+prévenir et des chunks bien plus courts que ce que le modèle accepte.
+
+TokenAwareChunker mesure la longueur avec le tokenizer du modèle, coupe aux
+frontières de phrases (règles du français: abréviations, guillemets, listes)
+et remplit chaque chunk jusqu'à la limite du modèle. Les phrases d'un lot de
+documents sont tokenisées en un seul appel au tokenizer.
+"""
+
+import copy
+import re
+
+from langchain_core.documents import Document
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Fin de phrase: ponctuation finale (et guillemets/parenthèses fermants) suivie
+# d'un espace et d'une majuscule, d'un chiffre ou d'un guillemet ouvrant; ou saut de ligne
+_BOUNDARY = re.compile(
+    r"(?:(?<=[.!?…])|(?<=[.!?…][\"»”’)\]])|(?<=[.!?…][ \u00a0\u202f][»”]))[ \t\u00a0\u202f]+"
+    r"(?=(?:[\"«“(\[][ \u00a0\u202f]?)?[A-ZÀ-ÖØ-Þ0-9])"
+    r"|[ \t\u00a0\u202f]*\n\s*"
+)
+# Abréviations après lesquelles un point ne termine pas la phrase
+_ABBREVIATION = re.compile(
+    r"(?:^|[\s(])(?:M|MM|Mme|Mmes|Mlle|Mlles|Dr|Pr|St|Ste|cf|env|p|pp|vol|chap|art|av|bd|tél|ex|éd|n°|[A-Z])\.$"
+)
+# Tokenisation approchée (sans tokenizer du modèle): mots et signes de ponctuation
+_APPROX_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def split_sentences(text):
+    """
+    Découpe un texte en phrases.
+
+    Returns:
+        list: Positions (début, fin) de chaque phrase dans le texte, espaces exclus
+    """
+    spans = []
+    start = 0
+    for match in _BOUNDARY.finditer(text):
+        if "\n" not in match.group() and _ABBREVIATION.search(text[max(start, match.start() - 8):match.start()]):
+            continue
+        _add_span(spans, text, start, match.start())
+        start = match.end()
+    _add_span(spans, text, start, len(text))
+    return spans
+
+
+def _add_span(spans, text, start, end):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if start < end:
+        spans.append((start, end))
+
+
+class _HuggingFaceTokenizer:
+    """Comptage des tokens avec un tokenizer Hugging Face (rapide de préférence)."""
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+
+    def count(self, texts):
+        encoded = self.tokenizer(list(texts), add_special_tokens=False, return_attention_mask=False,
+                                 return_token_type_ids=False)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def offsets(self, text):
+        try:
+            encoded = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+            return [tuple(offset) for offset in encoded["offset_mapping"]]
+        except (NotImplementedError, ValueError):
+            # Tokenizer lent: pas de positions, approximation par mots
+            return _RegexTokenizer().offsets(text)
+
+
+class _RegexTokenizer:
+    """Tokenisation approchée, utilisée si le tokenizer du modèle n'est pas disponible."""
+
+    def count(self, texts):
+        return [len(_APPROX_TOKEN.findall(text)) for text in texts]
+
+    def offsets(self, text):
+        return [match.span() for match in _APPROX_TOKEN.finditer(text)]
+
+
+class TokenAwareChunker:
+    """
+    Découpeur compatible avec les text splitters de LangChain (split_documents,
+    split_text): chunks d'au plus max_tokens tokens du modèle, coupés entre les
+    phrases, avec un recouvrement d'environ overlap_tokens tokens (phrases
+    entières). Chaque chunk porte sa position dans le document (start_index).
+    """
+
+    def __init__(self, tokenizer=None, max_tokens=254, overlap_tokens=32, batch_size=64):
+        """
+        Args:
+            tokenizer: Tokenizer Hugging Face (None: approximation par mots et ponctuation)
+            max_tokens (int): Tokens par chunk, hors tokens spéciaux ([CLS], [SEP])
+            overlap_tokens (int): Recouvrement maximal entre deux chunks consécutifs
+            batch_size (int): Documents dont les phrases sont tokenisées ensemble
+        """
+        self.tokenizer = _HuggingFaceTokenizer(tokenizer) if tokenizer is not None else _RegexTokenizer()
+        self.max_tokens = max_tokens
+        self.overlap_tokens = min(overlap_tokens, max_tokens // 2)
+        self.batch_size = batch_size
+        self.tokenizer_name = getattr(tokenizer, "name_or_path", None) or type(self.tokenizer).__name__
+
+    @property
+    def signature(self):
+        """Identifie le découpage (un changement de paramètres doit revectoriser l'index)."""
+        return f"TokenAwareChunker:{self.tokenizer_name}:{self.max_tokens}:{self.overlap_tokens}"
+
+    def resized(self, max_tokens, overlap_tokens=0):
+        """Découpeur de même tokenizer avec d'autres longueurs (chunks parents et enfants)."""
+        chunker = copy.copy(self)
+        chunker.max_tokens = max_tokens
+        chunker.overlap_tokens = min(overlap_tokens, max_tokens // 2)
+        return chunker
+
+    @classmethod
+    def from_embeddings(cls, embeddings, model_name=DEFAULT_MODEL, **kwargs):
+        """
+        Découpeur réglé sur le modèle d'embeddings: tokenizer et longueur maximale
+        du SentenceTransformer de HuggingFaceEmbeddings, sinon chargés depuis
+        model_name; approximation si transformers n'est pas disponible.
+        """
+        client = getattr(embeddings, "client", None)
+        tokenizer = getattr(client, "tokenizer", None)
+        max_length = getattr(client, "max_seq_length", None)
+        if tokenizer is None:
+            try:
+                from transformers import AutoTokenizer
+                tokenizer = AutoTokenizer.from_pretrained(model_name)
+                max_length = 256 if "MiniLM" in model_name else min(tokenizer.model_max_length, 512)
+            except Exception as e:
+                print(f"Tokenizer de {model_name} indisponible ({e}), longueur des chunks approchée")
+                tokenizer = None
+        if max_length and "max_tokens" not in kwargs:
+            kwargs["max_tokens"] = max_length - 2  # [CLS] et [SEP]
+        return cls(tokenizer, **kwargs)
+
+    def split_text(self, text):
+        spans = split_sentences(text)
+        counts = self.tokenizer.count([text[start:end] for start, end in spans])
+        return [chunk for chunk, _, _ in self._split(text, counts, spans)]
+
+    def split_documents(self, documents):
+        """Découpe des documents; les phrases de batch_size documents sont tokenisées en un appel."""
+        chunks = []
+        documents = list(documents)
+        for first in range(0, len(documents), self.batch_size):
+            batch = documents[first:first + self.batch_size]
+            spans = [split_sentences(document.page_content) for document in batch]
+            counts = self.tokenizer.count([
+                document.page_content[start:end]
+                for document, document_spans in zip(batch, spans)
+                for start, end in document_spans
+            ])
+            position = 0
+            for document, document_spans in zip(batch, spans):
+                document_counts = counts[position:position + len(document_spans)]
+                position += len(document_spans)
+                for text, start_index, _ in self._split(document.page_content, document_counts, document_spans):
+                    chunks.append(Document(page_content=text,
+                                           metadata=dict(document.metadata, start_index=start_index)))
+        return chunks
+
+    def _split(self, text, counts, spans):
+        """
+        Regroupe les phrases (spans, avec leur nombre de tokens counts) en chunks.
+
+        Yields:
+            tuple: (texte du chunk, position de début, nombre de tokens)
+        """
+        i = 0
+        while i < len(spans):
+            j = i
+            tokens = 0
+            while j < len(spans) and tokens + counts[j] <= self.max_tokens:
+                tokens += counts[j]
+                j += 1
+            if j == i:
+                # Phrase plus longue que la limite: coupée entre deux tokens
+                yield from self._split_long(text, spans[i])
+                i += 1
+                continue
+            start, end = spans[i][0], spans[j - 1][1]
+            yield text[start:end], start, tokens
+            if j >= len(spans):
+                break
+            # Recouvrement: reprendre les dernières phrases du chunk (sans reculer jusqu'à i)
+            k = j
+            overlap = 0
+            while k - 1 > i and overlap + counts[k - 1] <= self.overlap_tokens:
+                k -= 1
+                overlap += counts[k]
+            i = k
+
+    def _split_long(self, text, span):
+        start, end = span
+        offsets = self.tokenizer.offsets(text[start:end])
+        step = self.max_tokens - self.overlap_tokens
+        for first in range(0, len(offsets), step):
+            window = offsets[first:first + self.max_tokens]
+            chunk_start, chunk_end = start + window[0][0], start + window[-1][1]
+            yield text[chunk_start:chunk_end], chunk_start, len(window)
+            if first + self.max_tokens >= len(offsets):
+                break
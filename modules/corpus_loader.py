@@ -0,0 +1,406 @@
+"""
+Chargement du corpus des chatbots: en flux, en parallèle et sans doublons.
+
+Une même page peut arriver par plusieurs sources: corpus SQLite, all_pages.jsonl
+(ou all_pages.json), fichiers data/*.json et txt_data/*.txt (main_content).
+Chaque document est identifié par son URL et par le hash de son texte
+normalisé (ainsi que celui de son main_content): une page n'est produite
+qu'une fois, les sources suivantes ne font que compléter ses métadonnées.
+
+Les répertoires sont listés une seule fois, les fichiers lus et décodés dans
+un pool de threads (orjson s'il est installé), et les documents produits au
+fur et à mesure (iter_documents): le découpage et la vectorisation peuvent
+commencer avant la fin du chargement.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from langchain_core.documents import Document
+
+from modules.corpus_store import CorpusStore
+
+# Fichiers de data/ qui ne sont pas des pages
+NON_PAGE_FILES = {'all_pages.json', 'all_libraries.json', 'pages.json', 'passages.json',
+                  'crawl_manifest.json', 'near_duplicates.json', 'crawl_report.json', 'crawl_state.json'}
+
+
+def normalize_text(text):
+    """Forme normalisée d'un texte pour la comparaison (Unicode NFKC, espaces réduits, minuscules)."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def content_hash(text):
+    """Hash SHA-1 du texte normalisé (None si le texte est vide)."""
+    normalized = normalize_text(text)
+    if not normalized:
+        return None
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class DocumentDeduplicator:
+    """
+    Regroupe les documents d'une même page (même URL ou même texte normalisé).
+
+    Le premier document rencontré est conservé (les sources sont lues de la
+    plus complète à la moins complète); ses métadonnées manquantes sont
+    complétées par celles des doublons et la métadonnée "sources" liste toutes
+    les sources de la page.
+    """
+
+    def __init__(self):
+        self._metadata = []  # Métadonnées des documents conservés (pas leur texte)
+        self._by_url = {}
+        self._by_hash = {}
+        self.duplicates = 0
+        self.empty = 0
+
+    def add(self, document, alt_texts=(), match_url=True):
+        """
+        Ajoute un document, ou le fusionne avec celui de la même page.
+
+        Args:
+            document (Document): Document à ajouter
+            alt_texts (iterable): Autres textes de la même page (ex: main_content)
+                                  par lesquels une autre source peut la retrouver
+            match_url (bool): Fusionner avec le document de même URL (False pour
+                              les documents qui ne sont pas le contenu de leur URL)
+        Returns:
+            bool: True si le document est nouveau, False s'il a été fusionné ou ignoré
+        """
+        hashes = [content_hash(document.page_content)]
+        if hashes[0] is None:
+            self.empty += 1
+            return False
+        hashes.extend(h for h in map(content_hash, alt_texts) if h and h not in hashes)
+        url = (document.metadata.get("url") or None) if match_url else None
+
+        index = self._by_url.get(url) if url else None
+        if index is None:
+            index = next((self._by_hash[h] for h in hashes if h in self._by_hash), None)
+
+        is_new = index is None
+        if is_new:
+            index = len(self._metadata)
+            document.metadata["sources"] = document.metadata.get("source", "")
+            self._metadata.append(document.metadata)
+        else:
+            self._merge(self._metadata[index], document.metadata)
+            self.duplicates += 1
+
+        for h in hashes:
+            self._by_hash.setdefault(h, index)
+        if url:
+            self._by_url.setdefault(url, index)
+            kept_url = self._metadata[index].get("url")
+            if kept_url:
+                self._by_url.setdefault(kept_url, index)
+        return is_new
+
+    @staticmethod
+    def _merge(kept, metadata):
+        for key, value in metadata.items():
+            if key != "sources" and value and not kept.get(key):
+                kept[key] = value
+        source = metadata.get("source")
+        sources = kept["sources"].split(", ") if kept.get("sources") else []
+        if source and source not in sources:
+            kept["sources"] = ", ".join(sources + [source])
+
+
+def _json_loads(data):
+    """Décode du JSON (bytes) avec orjson s'il est disponible."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _parallel_map(function, items, workers):
+    """
+    Comme executor.map, mais en gardant au plus 4 * workers tâches en cours:
+    les résultats sont produits dans l'ordre, au fil de leur consommation.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(function, item) for item in islice(items, 4 * workers))
+        while pending:
+            result = pending.popleft().result()
+            for item in islice(items, 1):
+                pending.append(executor.submit(function, item))
+            yield result
+
+
+def _list_files(directory, suffix):
+    """Noms des fichiers d'un répertoire ayant ce suffixe (un seul parcours, triés)."""
+    try:
+        with os.scandir(directory) as entries:
+            return sorted(entry.name for entry in entries if entry.name.endswith(suffix) and entry.is_file())
+    except OSError:
+        return []
+
+
+def _decode_json_file(path):
+    """(données, None) ou (None, erreur): exécuté dans le pool de threads."""
+    try:
+        return _json_loads(_read_bytes(path)), None
+    except Exception as e:
+        return None, e
+
+
+def _decode_text_file(path):
+    try:
+        return _read_bytes(path).decode('utf-8'), None
+    except Exception as e:
+        return None, e
+
+
+def _page_document(content, source, title, url, default_title="Page sans titre"):
+    return Document(
+        page_content=content,
+        metadata={"source": source, "title": title or default_title, "url": url or ""}
+    )
+
+
+def _iter_store_pages(store_path):
+    store = CorpusStore(store_path, readonly=True)
+    try:
+        for page in store.iter_pages():
+            document = _page_document(page['content'] or page['main_content'], "corpus",
+                                      page['title'], page['url'])
+            document.metadata["doc_id"] = page['doc_id']
+            yield document, (page['main_content'],)
+    finally:
+        store.close()
+
+
+def _iter_all_pages(data_dir, json_files):
+    """Pages agrégées: all_pages.jsonl lu ligne à ligne, sinon all_pages.json."""
+    jsonl_path = os.path.join(data_dir, 'all_pages.jsonl')
+    if os.path.exists(jsonl_path):
+        with open(jsonl_path, 'rb') as f:
+            yield from _iter_page_dicts(_json_loads(line) for line in f if line.strip())
+    elif 'all_pages.json' in json_files:
+        yield from _iter_page_dicts(_json_loads(_read_bytes(os.path.join(data_dir, 'all_pages.json'))))
+
+
+def _iter_page_dicts(pages):
+    for page in pages:
+        if isinstance(page, dict):
+            content = page.get('content', '') or page.get('main_content', '')
+            yield (_page_document(content, "all_pages", page.get('title'), page.get('url')),
+                   (page.get('main_content'),))
+
+
+def _iter_libraries(data_dir):
+    for library in _json_loads(_read_bytes(os.path.join(data_dir, 'all_libraries.json'))):
+        # Document pour les informations générales
+        yield Document(
+            page_content=library.get('description', ''),
+            metadata={
+                "source": "all_libraries",
+                "library": library.get('name', 'Bibliothèque inconnue'),
+                "url": library.get('url', '')
+            }
+        ), ()
+
+        # Document pour les horaires
+        if library.get('hours') and library.get('hours') != "Horaires non disponibles":
+            yield Document(
+                page_content=f"Horaires de la bibliothèque {library.get('name')}: {library.get('hours')}",
+                metadata={
+                    "source": "hours",
+                    "library": library.get('name', 'Bibliothèque inconnue')
+                }
+            ), ()
+
+
+def _iter_json_pages(data_dir, json_files, workers):
+    """Fichiers JSON individuels, décodés en parallèle."""
+    filenames = [name for name in json_files if name not in NON_PAGE_FILES]
+    paths = [os.path.join(data_dir, name) for name in filenames]
+    for filename, (data, error) in zip(filenames, _parallel_map(_decode_json_file, paths, workers)):
+        if error is not None:
+            print(f"Erreur lors du chargement de {filename}: {error}")
+            continue
+        # Si c'est un dictionnaire avec une clé 'body' ou 'content', c'est une page simple
+        if isinstance(data, dict):
+            content = (data.get('content', '') or data.get('body', '')
+                       or data.get('description', '') or data.get('main_content', ''))
+            if content:
+                yield (_page_document(content, filename, data.get('title'), data.get('url'),
+                                      default_title='Document sans titre'),
+                       (data.get('main_content'), data.get('body')))
+
+
+def _iter_txt_pages(txt_dir, workers):
+    """Fichiers texte (main_content seul), lus en parallèle; rattachés à leur page par le hash du texte."""
+    filenames = _list_files(txt_dir, '.txt')
+    paths = [os.path.join(txt_dir, name) for name in filenames]
+    for filename, (content, error) in zip(filenames, _parallel_map(_decode_text_file, paths, workers)):
+        if error is not None:
+            print(f"Erreur lors du chargement de {filename}: {error}")
+            continue
+        yield _page_document(content, filename, None, None, default_title=f"Document {filename}"), ()
+
+
+def _iter_new(dedup, name, iterator, match_url=True):
+    """Documents d'une source qui ne sont pas des doublons des sources précédentes."""
+    count = 0
+    try:
+        for document, alt_texts in iterator:
+            count += 1
+            if dedup.add(document, alt_texts, match_url=match_url):
+                yield document
+    except Exception as e:
+        print(f"Erreur lors du chargement de {name}: {e}")
+    if count:
+        print(f"Chargé {count} documents depuis {name}")
+
+
+def iter_documents(data_dir="data", txt_dir="txt_data", workers=8):
+    """
+    Produit les documents du chatbot au fil du chargement, une seule fois par page.
+
+    Sources, de la plus complète à la moins complète: corpus SQLite s'il existe,
+    sinon all_pages.jsonl (ou all_pages.json), data/*.json et txt_data/*.txt;
+    bibliothèques et horaires de all_libraries.json dans tous les cas.
+
+    Args:
+        data_dir (str): Répertoire des données du scraper
+        txt_dir (str): Répertoire des fichiers texte
+        workers (int): Threads de lecture et de décodage des fichiers
+
+    Yields:
+        Document: Documents dédupliqués
+    """
+    dedup = DocumentDeduplicator()
+    json_files = _list_files(data_dir, '.json')
+    count = 0
+
+    # Corpus SQLite du scraper: une requête, une page par document
+    pages_loaded = False
+    store_path = os.path.join(data_dir, 'corpus.sqlite')
+    if os.path.exists(store_path):
+        for document in _iter_new(dedup, "corpus.sqlite", _iter_store_pages(store_path)):
+            count += 1
+            yield document
+        pages_loaded = count > 0
+
+    if 'all_libraries.json' in json_files:
+        # Les descriptions ne sont pas le contenu de la page library['url']: pas de fusion par URL
+        for document in _iter_new(dedup, "all_libraries.json", _iter_libraries(data_dir), match_url=False):
+            count += 1
+            yield document
+
+    # Sinon, fichiers historiques (inutiles si le corpus SQLite a été chargé)
+    if not pages_loaded:
+        print(f"Chargement des fichiers JSON et texte depuis {data_dir} et {txt_dir}...")
+        for name, iterator in (("all_pages", _iter_all_pages(data_dir, json_files)),
+                               (f"{data_dir}/*.json", _iter_json_pages(data_dir, json_files, workers)),
+                               (f"{txt_dir}/*.txt", _iter_txt_pages(txt_dir, workers))):
+            for document in _iter_new(dedup, name, iterator):
+                count += 1
+                yield document
+
+    print(f"Chargé un total de {count} documents "
+          f"({dedup.duplicates} doublons fusionnés, {dedup.empty} documents vides ignorés)")
+
+
+def load_documents(data_dir="data", txt_dir="txt_data", workers=8):
+    """Charge tous les documents du chatbot (voir iter_documents) dans une liste."""
+    return list(iter_documents(data_dir, txt_dir, workers))
+
+
+def iter_batches(iterable, size):
+    """Découpe un flux en listes de size éléments (la dernière peut être plus courte)."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class CorpusRegistry:
+    """
+    Corpus d'un répertoire de données, chargé une seule fois et partagé par la
+    construction de l'index, BM25 et le reclassement.
+
+    - documents: liste chargée à la première demande
+    - iter_documents(): flux pour la construction de l'index; les documents
+      lus sont conservés, une demande ultérieure ne relit donc rien
+    - release(): libère la liste quand plus rien n'en a besoin (elle sera
+      rechargée à la demande suivante)
+    """
+
+    def __init__(self, data_dir="data", txt_dir="txt_data", workers=8):
+        self.data_dir = data_dir
+        self.txt_dir = txt_dir
+        self.workers = workers
+        self.loads = 0  # Nombre de lectures complètes du corpus (suivi)
+        self._documents = None
+        self._lock = threading.RLock()
+
+    @property
+    def documents(self):
+        with self._lock:
+            if self._documents is None:
+                self._documents = load_documents(self.data_dir, self.txt_dir, self.workers)
+                self.loads += 1
+            return self._documents
+
+    @property
+    def loaded(self):
+        return self._documents is not None
+
+    def iter_documents(self):
+        """Documents du corpus en flux (depuis la liste si elle est déjà chargée)."""
+        if self._documents is not None:
+            yield from self._documents
+            return
+        documents = []
+        for document in iter_documents(self.data_dir, self.txt_dir, self.workers):
+            documents.append(document)
+            yield document
+        with self._lock:
+            if self._documents is None:
+                self._documents = documents
+                self.loads += 1
+
+    def release(self):
+        """Libère les documents chargés."""
+        with self._lock:
+            self._documents = None
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_corpus_registry(data_dir="data", txt_dir="txt_data"):
+    """Registre partagé du corpus d'un répertoire de données (un par data_dir/txt_dir)."""
+    key = (os.path.abspath(data_dir), os.path.abspath(txt_dir))
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = CorpusRegistry(data_dir, txt_dir)
+            _registries[key] = registry
+        return registry
@@ -0,0 +1,182 @@
+"""
+Corpus des pages crawlées dans un seul fichier SQLite (mode WAL).
+
+Chaque page est identifiée par un doc_id stable, dérivé de son URL canonique:
+le même document garde le même identifiant d'un crawl à l'autre, quel que soit
+l'ordre de crawl. Remplace les fichiers JSON/TXT individuels pour les lecteurs
+(DataProcessor, chatbots): tout le corpus se lit en une requête.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+PAGE_COLUMNS = ("doc_id", "url", "title", "content", "main_content", "content_hash", "fetched_at", "crawl_id")
+
+
+def make_doc_id(url):
+    """Identifiant stable d'un document: 16 caractères hexadécimaux du SHA-1 de son URL canonique."""
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+def hash_text(text):
+    """Hash SHA-256 d'un texte extrait (détection des contenus modifiés ou identiques)."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class CorpusStore:
+    """
+    Table pages(doc_id, url, title, content, main_content, content_hash, fetched_at, crawl_id, stale).
+
+    Les écritures se font par lots (upsert_pages) dans une transaction; la
+    lecture (iter_pages) est en flux, par paquets de lignes, sans les pages
+    signalées (stale). La connexion est
+    partagée entre threads (workers du crawl): chaque accès est protégé par un
+    verrou, une lecture ne voit donc jamais une transaction en cours.
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self._lock = threading.RLock()
+        if readonly:
+            self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    doc_id TEXT PRIMARY KEY,
+                    url TEXT NOT NULL UNIQUE,
+                    title TEXT,
+                    content TEXT,
+                    main_content TEXT,
+                    content_hash TEXT,
+                    fetched_at TEXT,
+                    crawl_id TEXT
+                )
+            """)
+            columns = [row[1] for row in self.connection.execute("PRAGMA table_info(pages)")]
+            if "stale" not in columns:
+                # Page non revue par le dernier crawl (crawl partiel): conservée mais signalée
+                self.connection.execute("ALTER TABLE pages ADD COLUMN stale INTEGER NOT NULL DEFAULT 0")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS pages_crawl_id ON pages (crawl_id)")
+            self.connection.commit()
+
+    @staticmethod
+    def page_row(page, fetched_at=None, crawl_id=None):
+        """Convertit une page du scraper (dict) en ligne de la table pages."""
+        main_content = page.get("main_content", "")
+        return (
+            make_doc_id(page["url"]),
+            page["url"],
+            page.get("title"),
+            page.get("content"),
+            main_content,
+            hash_text(main_content),
+            fetched_at,
+            crawl_id,
+        )
+
+    def upsert_pages(self, rows):
+        """
+        Insère ou met à jour des pages en une seule transaction.
+
+        Args:
+            rows (iterable): Lignes produites par page_row
+        Returns:
+            int: Nombre de lignes écrites
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self._lock, self.connection:
+            self.connection.executemany("""
+                INSERT INTO pages (doc_id, url, title, content, main_content, content_hash, fetched_at, crawl_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(doc_id) DO UPDATE SET
+                    url = excluded.url,
+                    title = excluded.title,
+                    content = excluded.content,
+                    main_content = excluded.main_content,
+                    content_hash = excluded.content_hash,
+                    fetched_at = COALESCE(excluded.fetched_at, pages.fetched_at),
+                    crawl_id = COALESCE(excluded.crawl_id, pages.crawl_id),
+                    stale = 0
+            """, rows)
+        return len(rows)
+
+    def get_page(self, url):
+        """Page stockée pour une URL (dict), ou None."""
+        with self._lock:
+            row = self.connection.execute(
+                f"SELECT {', '.join(PAGE_COLUMNS)} FROM pages WHERE doc_id = ?", (make_doc_id(url),)
+            ).fetchone()
+        return dict(zip(PAGE_COLUMNS, row)) if row else None
+
+    def iter_pages(self, batch_size=500, include_stale=False):
+        """
+        Parcourt les pages (dicts), par paquets de batch_size lignes.
+
+        Args:
+            include_stale (bool): Inclure les pages signalées par mark_stale
+                                  (exclues par défaut: elles ne sont plus indexées)
+        """
+        where = ""
+        with self._lock:
+            # Un corpus ouvert en lecture seule peut précéder l'ajout de la colonne stale
+            columns = [row[1] for row in self.connection.execute("PRAGMA table_info(pages)")]
+            if not include_stale and "stale" in columns:
+                where = " WHERE stale = 0"
+            cursor = self.connection.execute(
+                f"SELECT {', '.join(PAGE_COLUMNS)} FROM pages{where} ORDER BY rowid")
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(PAGE_COLUMNS, row))
+
+    def prune(self, crawl_id):
+        """
+        Supprime les pages qui n'ont pas été vues par le crawl crawl_id
+        (pages disparues du site ou devenues des quasi-doublons).
+        À n'appeler qu'après un crawl complet: sinon, voir mark_stale.
+
+        Returns:
+            int: Nombre de pages supprimées
+        """
+        with self._lock, self.connection:
+            cursor = self.connection.execute("DELETE FROM pages WHERE crawl_id IS NOT ?", (crawl_id,))
+        return cursor.rowcount
+
+    def mark_stale(self, crawl_id):
+        """
+        Signale (stale = 1) sans les supprimer les pages qui n'ont pas été vues
+        par le crawl crawl_id: après un crawl partiel (limite de pages, erreurs
+        de téléchargement), une page non revue n'a pas forcément disparu.
+
+        Returns:
+            int: Nombre de pages signalées
+        """
+        with self._lock, self.connection:
+            cursor = self.connection.execute(
+                "UPDATE pages SET stale = 1 WHERE crawl_id IS NOT ? AND stale = 0", (crawl_id,))
+        return cursor.rowcount
+
+    def count(self, stale=None):
+        """Nombre de pages (toutes, ou seulement signalées / non signalées selon stale)."""
+        with self._lock:
+            if stale is None:
+                return self.connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            return self.connection.execute("SELECT COUNT(*) FROM pages WHERE stale = ?",
+                                           (int(stale),)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
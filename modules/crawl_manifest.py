@@ -0,0 +1,89 @@
+import json
+import os
+import hashlib
+import threading
+from datetime import datetime
+
+
+class CrawlManifest:
+    """
+    Manifeste persistant d'un crawl: pour chaque URL, les validateurs HTTP
+    (ETag, Last-Modified), le hash du contenu et les liens sortants.
+
+    Il permet aux re-crawls d'envoyer des requêtes conditionnelles
+    (If-None-Match / If-Modified-Since) et de ne ni re-parser ni ré-écrire
+    les pages inchangées.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def hash_content(content):
+        """Calcule le hash SHA-256 d'un contenu (bytes ou str)."""
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        return hashlib.sha256(content).hexdigest()
+
+    def load(self):
+        """Charge le manifeste depuis le disque s'il existe."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+            print(f"Manifeste de crawl chargé: {len(self.entries)} URLs connues")
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Impossible de charger le manifeste {self.path}: {e}")
+            self.entries = {}
+
+    def save(self):
+        """Sauvegarde le manifeste de façon atomique (fichier temporaire + rename)."""
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def get(self, url):
+        with self._lock:
+            return self.entries.get(url)
+
+    def conditional_headers(self, url):
+        """Retourne les en-têtes de revalidation HTTP pour une URL déjà crawlée."""
+        entry = self.get(url)
+        headers = {}
+        if not entry:
+            return headers
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def is_unchanged(self, url, content_hash):
+        """Vérifie si le contenu téléchargé est identique à celui du crawl précédent."""
+        entry = self.get(url)
+        return bool(entry) and entry.get('content_hash') == content_hash
+
+    def update(self, url, **fields):
+        """Met à jour (ou crée) l'entrée d'une URL."""
+        with self._lock:
+            entry = self.entries.setdefault(url, {})
+            entry.update({k: v for k, v in fields.items() if v is not None})
+            entry['checked_at'] = datetime.now().isoformat()
+            return entry
+
+    def discard_fields(self, url, *fields):
+        """Retire des champs de l'entrée d'une URL (ex: json_file d'une page devenue alias)."""
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry:
+                for field in fields:
+                    entry.pop(field, None)
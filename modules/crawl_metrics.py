@@ -0,0 +1,246 @@
+"""
+Instrumentation du crawl: temps de chaque étape, page par page.
+
+- TimingHTTPAdapter: adaptateur requests qui mesure, pour chaque requête, la
+  résolution DNS, l'établissement de la connexion (TCP + TLS), le temps
+  jusqu'au premier octet (TTFB), le téléchargement du corps et sa taille
+- CrawlMetrics: collecte thread-safe des mesures par URL (réseau, parsing,
+  extraction, écriture) et rapport JSON avec percentiles et pages les plus lentes
+
+Le rapport permet de voir si un crawl lent est limité par le réseau ou par le parsing.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+# Mesures de la requête en cours dans ce thread (renseignées par les connexions)
+_current = threading.local()
+
+NETWORK_METRICS = ("dns", "connect", "ttfb", "download")
+PROCESSING_METRICS = ("parse", "extract", "fingerprint", "write")
+REPORT_METRICS = NETWORK_METRICS + PROCESSING_METRICS + ("bytes", "total")
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _current_timings():
+    return getattr(_current, "timings", None)
+
+
+def _connect_any(addresses, timeout, source_address=None, socket_options=None):
+    """
+    Ouvre une connexion vers la première adresse joignable, dans l'ordre de
+    getaddrinfo (comme urllib3.util.connection.create_connection).
+    """
+    error = None
+    for family, socktype, proto, _, address in addresses:
+        sock = None
+        try:
+            sock = socket.socket(family, socktype, proto)
+            for option in socket_options or ():
+                sock.setsockopt(*option)
+            if timeout is None or isinstance(timeout, (int, float)):
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(address)
+            return sock
+        except OSError as e:
+            error = e
+            if sock is not None:
+                sock.close()
+    raise error or OSError("getaddrinfo returns an empty list")
+
+
+class _TimingConnectionMixin:
+    """Mesure la résolution DNS et l'ouverture de connexion des nouvelles connexions."""
+
+    def _new_conn(self):
+        timings = _current_timings()
+        if timings is None:
+            return super()._new_conn()
+
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host.strip("[]"), self.port,
+                                           allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            addresses = None
+        timings["dns"] = timings.get("dns", 0.0) + time.perf_counter() - start
+        if not addresses:
+            # Laisser urllib3 produire son erreur de résolution habituelle
+            return super()._new_conn()
+
+        # Connexion aux adresses déjà résolues (le nom n'est pas résolu deux fois), chacune
+        # essayée dans l'ordre; les erreurs sont celles d'urllib3, avec le nom de l'hôte
+        try:
+            return _connect_any(addresses, self.timeout, self.source_address, self.socket_options)
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})") from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+
+    def connect(self):
+        timings = _current_timings()
+        start = time.perf_counter()
+        dns_before = timings.get("dns", 0.0) if timings is not None else 0.0
+        super().connect()
+        if timings is not None:
+            dns = timings.get("dns", 0.0) - dns_before
+            timings["connect"] = timings.get("connect", 0.0) + time.perf_counter() - start - dns
+
+
+class TimingHTTPConnection(_TimingConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimingHTTPSConnection(_TimingConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimingHTTPConnection
+
+
+class TimingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimingHTTPSConnection
+
+
+class TimingHTTPAdapter(HTTPAdapter):
+    """
+    Adaptateur requests qui attache à chaque réponse un dict response.timings:
+    dns, connect (0 si la connexion keep-alive est réutilisée), ttfb, download (s),
+    bytes et status.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimingHTTPConnectionPool,
+            "https": TimingHTTPSConnectionPool,
+        }
+
+    def send(self, request, stream=False, **kwargs):
+        timings = {"dns": 0.0, "connect": 0.0}
+        _current.timings = timings
+        start = time.perf_counter()
+        try:
+            response = super().send(request, stream=True, **kwargs)
+        finally:
+            _current.timings = None
+        headers_time = time.perf_counter() - start
+        timings["ttfb"] = max(0.0, headers_time - timings["dns"] - timings["connect"])
+
+        if not stream:
+            # Téléchargement du corps ici (requests le ferait juste après) pour le chronométrer
+            download_start = time.perf_counter()
+            content = response.content
+            timings["download"] = time.perf_counter() - download_start
+            timings["bytes"] = len(content)
+        timings["status"] = response.status_code
+        response.timings = timings
+        return response
+
+
+def create_timed_session():
+    """Session requests dont les réponses portent leurs mesures (response.timings)."""
+    session = requests.Session()
+    adapter = TimingHTTPAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _percentile(sorted_values, percentile):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(percentile / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class CrawlMetrics:
+    """Mesures par URL, collectées depuis plusieurs threads."""
+
+    def __init__(self):
+        self.pages = {}
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+
+    def record(self, url, **fields):
+        """Ajoute (ou complète) les mesures d'une URL."""
+        with self._lock:
+            self.pages.setdefault(url, {"url": url}).update(fields)
+
+    def report(self, slowest=20):
+        """
+        Construit le rapport: percentiles de chaque mesure, totaux par étape,
+        répartition des statuts et pages les plus lentes.
+        """
+        with self._lock:
+            pages = [dict(page) for page in self.pages.values()]
+
+        for page in pages:
+            page["total"] = sum(page.get(metric, 0.0) for metric in NETWORK_METRICS + PROCESSING_METRICS)
+
+        metrics = {}
+        for metric in REPORT_METRICS:
+            values = sorted(page[metric] for page in pages if page.get(metric) is not None)
+            if not values:
+                continue
+            metrics[metric] = {
+                "count": len(values),
+                "sum": round(sum(values), 4),
+                "mean": round(sum(values) / len(values), 4),
+                **{f"p{p}": round(_percentile(values, p), 4) for p in PERCENTILES},
+                "max": round(values[-1], 4),
+            }
+
+        statuses = {}
+        for page in pages:
+            key = str(page.get("status", page.get("fetch_status", "unknown")))
+            statuses[key] = statuses.get(key, 0) + 1
+
+        network_time = sum(metrics.get(m, {}).get("sum", 0.0) for m in NETWORK_METRICS)
+        processing_time = sum(metrics.get(m, {}).get("sum", 0.0) for m in PROCESSING_METRICS)
+        slowest_pages = sorted(pages, key=lambda page: page["total"], reverse=True)[:slowest]
+
+        return {
+            "started_at": self.started_at.isoformat(),
+            "wall_time": round(time.perf_counter() - self._start, 3),
+            "pages": len(pages),
+            "statuses": statuses,
+            "time_by_stage": {
+                "network": round(network_time, 3),
+                "processing": round(processing_time, 3),
+                "bound_by": "network" if network_time >= processing_time else "processing",
+            },
+            "metrics": metrics,
+            "slowest_pages": [
+                {key: (round(value, 4) if isinstance(value, float) else value) for key, value in page.items()}
+                for page in slowest_pages
+            ],
+        }
+
+    def save_report(self, path, slowest=20):
+        """Écrit le rapport JSON (atomiquement) et retourne son contenu."""
+        report = self.report(slowest=slowest)
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return report
@@ -0,0 +1,148 @@
+"""
+Cache persistant des embeddings, partagé par les chatbots et DataProcessor.
+
+Chaque vecteur est enregistré dans un fichier SQLite (mode WAL) sous la clé
+(nom du modèle, hash du texte normalisé). Une reconstruction de l'index, un
+changement de découpage ou le passage d'un chatbot à l'autre ne vectorise
+donc que les textes jamais vus: les autres vecteurs sont relus sur le disque.
+
+La normalisation (Unicode NFC, espaces réduits) ne change pas la tokenisation
+du modèle: deux textes de même clé ont le même embedding. La casse et les
+accents sont conservés, contrairement à la déduplication du corpus.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from array import array
+
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_CACHE_FILE = "embeddings.sqlite"
+
+# Nombre de clés par requête SQL (limite des paramètres de SQLite)
+_LOOKUP_BATCH = 500
+
+
+def embedding_key(text):
+    """Hash SHA-1 du texte normalisé pour le modèle (NFC, espaces réduits)."""
+    normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFC", text or "")).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Enveloppe un modèle d'embeddings (HuggingFaceEmbeddings...) avec un cache sur disque.
+
+    embed_documents ne calcule que les textes absents du cache (une seule fois
+    par texte distinct d'un lot); embed_query n'est pas mis en cache. Les autres
+    attributs (client, model_name...) sont ceux du modèle enveloppé.
+    """
+
+    def __init__(self, embeddings, path, model_name=None):
+        """
+        Args:
+            embeddings: Modèle d'embeddings à envelopper
+            path (str): Fichier SQLite du cache
+            model_name (str): Nom du modèle dans la clé (par défaut embeddings.cache_name,
+                sinon embeddings.model_name)
+        """
+        self.embeddings = embeddings
+        self.path = path
+        self.model_name = (model_name or getattr(embeddings, "cache_name", None)
+                           or getattr(embeddings, "model_name", None) or type(embeddings).__name__)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID
+        """)
+        self.connection.commit()
+
+    def __getattr__(self, name):
+        # Appelé seulement pour les attributs absents: ceux du modèle enveloppé
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def _lookup(self, keys):
+        vectors = {}
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            batch = keys[start:start + _LOOKUP_BATCH]
+            placeholders = ", ".join("?" * len(batch))
+            cursor = self.connection.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                [self.model_name] + batch)
+            for key, blob in cursor:
+                vector = array("f")
+                vector.frombytes(blob)
+                vectors[key] = vector.tolist()
+        return vectors
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        keys = [embedding_key(text) for text in texts]
+        with self._lock:
+            vectors = self._lookup(list(set(keys)))
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in vectors:
+                    missing.setdefault(key, text)
+            self.hits += len(texts) - sum(1 for key in keys if key in missing)
+            self.misses += len(missing)
+
+            if missing:
+                computed = self.embeddings.embed_documents(list(missing.values()))
+                rows = []
+                for key, vector in zip(missing, computed):
+                    # Relire le vecteur stocké en float32: mêmes valeurs qu'un succès du cache
+                    stored = array("f", vector)
+                    vectors[key] = stored.tolist()
+                    rows.append((self.model_name, key, stored.tobytes()))
+                with self.connection:
+                    self.connection.executemany(
+                        "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)", rows)
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+    def stats(self):
+        """Textes relus dans le cache (hits) et vectorisés (misses) depuis la création."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        """Ferme le cache et le modèle enveloppé s'il en a besoin (pool de processus)."""
+        self.connection.close()
+        close = getattr(self.embeddings, "close", None)
+        if close is not None:
+            close()
+
+
+def cached_embeddings(embeddings, cache_dir):
+    """
+    Enveloppe embeddings avec le cache de cache_dir; en cas d'erreur (disque en
+    lecture seule...), retourne le modèle sans cache.
+    """
+    try:
+        cached = CachedEmbeddings(embeddings, os.path.join(cache_dir, EMBEDDING_CACHE_FILE))
+        print(f"Cache d'embeddings: {cached.path}")
+        return cached
+    except Exception as e:
+        print(f"Cache d'embeddings indisponible ({e}), vectorisation sans cache")
+        return embeddings
@@ -1,15 +1,17 @@
-import requests
 import json
 import os
 from bs4 import BeautifulSoup
 import re
 from datetime import datetime, timedelta
 import logging
+from modules.politeness import get_default_scheduler
 
 class HorairesModule:
-    def __init__(self, cache_dir="cache", cache_expiry_hours=24):
+    def __init__(self, cache_dir="cache", cache_expiry_hours=24, scheduler=None):
         self.cache_dir = cache_dir
         self.cache_expiry_hours = cache_expiry_hours
+        # Planificateur partagé avec le scraper: mêmes limites de débit par hôte
+        self.scheduler = scheduler or get_default_scheduler()
         self.horaires_url = "https://www.bibliotheques.universite-paris-saclay.fr/horaires-et-affluence"
         self.bibliotheques = {
             "orsay": {
@@ -88,7 +90,7 @@ class HorairesModule:
                 return None
             
             # D'abord, essayer la page spécifique de la bibliothèque
-            response = requests.get(library["url"], timeout=10)
+            response = self.scheduler.get(library["url"], timeout=10)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -138,7 +140,7 @@ class HorairesModule:
             if self.horaires_url:
                 self.logger.info(f"Essai avec la page générale des horaires pour {library_id}")
                 try:
-                    response_general = requests.get(self.horaires_url, timeout=10)
+                    response_general = self.scheduler.get(self.horaires_url, timeout=10)
                     response_general.raise_for_status()
                     
                     soup_general = BeautifulSoup(response_general.text, 'html.parser')
@@ -243,7 +245,7 @@ class HorairesModule:
             }
             
             self.logger.info(f"Requête API Affluences pour {library_id} avec params: {params}")
-            response = requests.get(api_url, headers=headers, params=params, timeout=10)
+            response = self.scheduler.get(api_url, headers=headers, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
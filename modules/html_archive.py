@@ -0,0 +1,174 @@
+"""
+Archive compressée des réponses HTML brutes du crawl.
+
+Chaque réponse est un enregistrement de type WARC (en-têtes WARC-Target-URI,
+WARC-Date... puis le HTML) compressé dans son propre membre gzip: le fichier
+reste un .warc.gz lisible par les outils standards, un enregistrement peut
+être relu à partir de son offset, et un crash ne corrompt que le dernier.
+
+L'archive est conservée d'un crawl à l'autre (les pages inchangées ne sont
+pas re-téléchargées); c'est le dernier enregistrement d'une URL qui fait foi.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+import zlib
+from datetime import datetime, timezone
+
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def _format_record(url, html):
+    payload = html.encode("utf-8")
+    headers = [
+        "WARC/1.0",
+        "WARC-Type: response",
+        f"WARC-Target-URI: {url}",
+        f"WARC-Date: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}",
+        "Content-Type: text/html; charset=utf-8",
+        f"WARC-Payload-Digest: sha256:{hashlib.sha256(payload).hexdigest()}",
+        f"Content-Length: {len(payload)}",
+    ]
+    return ("\r\n".join(headers) + "\r\n\r\n").encode("utf-8") + payload + b"\r\n\r\n"
+
+
+def _parse_record(data):
+    """Découpe un enregistrement décompressé en (en-têtes, HTML)."""
+    head, _, body = data.partition(b"\r\n\r\n")
+    headers = {}
+    for line in head.decode("utf-8", errors="replace").split("\r\n")[1:]:
+        key, _, value = line.partition(":")
+        headers[key.strip()] = value.strip()
+    length = int(headers.get("Content-Length", len(body)))
+    return headers, body[:length].decode("utf-8", errors="replace")
+
+
+def _iter_members(f):
+    """
+    Parcourt les membres gzip d'un fichier ouvert en binaire.
+
+    Yields:
+        tuple: (offset de début, offset de fin, données décompressées);
+               s'arrête au premier membre incomplet ou corrompu
+    """
+    offset = f.tell()
+    buffer = b""
+    while True:
+        decompressor = zlib.decompressobj(wbits=31)
+        chunks = []
+        consumed = 0
+        while not decompressor.eof:
+            if not buffer:
+                buffer = f.read(READ_BLOCK_SIZE)
+                if not buffer:
+                    return
+            try:
+                chunks.append(decompressor.decompress(buffer))
+            except zlib.error:
+                return
+            consumed += len(buffer) - len(decompressor.unused_data)
+            buffer = decompressor.unused_data
+        yield offset, offset + consumed, b"".join(chunks)
+        offset += consumed
+
+
+class HtmlArchiveWriter:
+    """Ajout thread-safe d'enregistrements à l'archive (un membre gzip par page)."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._repair_tail()
+        self._file = open(path, "ab")
+
+    def _repair_tail(self):
+        """Retire un éventuel dernier membre incomplet (crash pendant l'écriture)."""
+        valid_length = 0
+        with open(self.path, "rb") as f:
+            for _, end, _ in _iter_members(f):
+                valid_length = end
+        if valid_length < os.path.getsize(self.path):
+            with open(self.path, "rb+") as f:
+                f.truncate(valid_length)
+            print(f"Enregistrement incomplet retiré de {self.path}")
+
+    def write(self, url, html):
+        # Compression hors verrou: seuls les ajouts au fichier sont sérialisés
+        record = gzip.compress(_format_record(url, html), compresslevel=6)
+        with self._lock:
+            self._file.write(record)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def iter_archive(path):
+    """
+    Lit tous les enregistrements de l'archive, dans l'ordre d'écriture.
+
+    Yields:
+        tuple: (url, html, en-têtes WARC)
+    """
+    with open(path, "rb") as f:
+        for _, _, data in _iter_members(f):
+            headers, html = _parse_record(data)
+            yield headers.get("WARC-Target-URI"), html, headers
+
+
+def _latest_offsets(path, urls=None):
+    """(début, fin) du dernier enregistrement de chaque URL, dans l'ordre de première apparition."""
+    offsets = {}
+    with open(path, "rb") as f:
+        for start, end, data in _iter_members(f):
+            url = _parse_record(data)[0].get("WARC-Target-URI")
+            if url and (urls is None or url in urls):
+                offsets[url] = (start, end)
+    return offsets
+
+
+def latest_records(path, urls=None):
+    """
+    Dernière version archivée de chaque URL, dans l'ordre de première apparition.
+
+    Args:
+        path (str): Chemin de l'archive
+        urls (set): Si fourni, ne garder que ces URLs
+
+    Yields:
+        tuple: (url, html)
+    """
+    offsets = _latest_offsets(path, urls)
+    with open(path, "rb") as f:
+        for url, (start, end) in offsets.items():
+            f.seek(start)
+            data = gzip.decompress(f.read(end - start))
+            yield url, _parse_record(data)[1]
+
+
+def compact_archive(path):
+    """
+    Réécrit l'archive en ne gardant que le dernier enregistrement de chaque URL
+    (copié tel quel, sans recompression).
+
+    Returns:
+        tuple: (enregistrements avant, enregistrements après)
+    """
+    with open(path, "rb") as f:
+        before = sum(1 for _ in _iter_members(f))
+    offsets = _latest_offsets(path)
+    tmp_path = f"{path}.tmp"
+    with open(path, "rb") as f, open(tmp_path, "wb") as out:
+        for start, end in offsets.values():
+            f.seek(start)
+            out.write(f.read(end - start))
+    os.replace(tmp_path, path)
+    return before, len(offsets)
@@ -0,0 +1,318 @@
+"""
+Extraction du contenu des pages HTML en une seule passe.
+
+Une seule analyse du document produit le titre, le contenu principal
+(main_content), le contenu enrichi (content) et les liens de la page, sans
+modifier l'arbre: les deux textes sont donc cohérents entre eux.
+
+Plusieurs parseurs sont supportés ('lxml', 'selectolax', 'html.parser');
+'auto' choisit le plus rapide disponible, BeautifulSoup/html.parser servant
+de solution de repli.
+"""
+
+import time
+
+# Sélecteurs du contenu principal, dans l'ordre de priorité de get_main_content
+MAIN_SELECTORS = [
+    ("class", "main-content"),
+    ("class", "content"),
+    ("class", "node__content"),
+    ("id", "content"),
+    ("class", "article-content"),
+    ("role", "main"),
+]
+
+# Sous-chaînes de classes des div de navigation/habillage exclues du contenu principal
+CHROME_CLASS_MARKERS = ("meta", "menu", "nav", "footer", "header")
+
+SKIPPED_TAGS = {"script", "style", "noscript", "template"}
+
+
+def _is_chrome_div(tag, class_attr):
+    """Vérifie si un élément est une div d'habillage (menu, navigation, pied de page...)."""
+    return tag == "div" and bool(class_attr) and any(marker in class_attr for marker in CHROME_CLASS_MARKERS)
+
+
+def _finalize(main_strings, content_strings, h1_text, title_text, main_found):
+    """Assemble le résultat commun à tous les parseurs."""
+    if not main_found:
+        main_content, title = "", "Contenu principal non trouvé"
+    else:
+        main_content = " ".join(main_strings)
+        if main_strings:
+            title = main_strings[0]
+        elif h1_text:
+            title = h1_text
+        elif title_text is not None:
+            title = title_text.strip()
+        else:
+            title = "Sans titre"
+
+    if title == "Sans titre":
+        title = title_text if title_text is not None else "No title"
+
+    return {
+        "title": title,
+        "content": " ".join(content_strings),
+        "main_content": main_content,
+    }
+
+
+# ---------------------------------------------------------------------------
+# BeautifulSoup (html.parser) - toujours disponible
+# ---------------------------------------------------------------------------
+
+def _extract_bs4(html, timings):
+    from bs4 import BeautifulSoup, NavigableString, CData, Tag
+
+    start = time.perf_counter()
+    soup = BeautifulSoup(html, "html.parser")
+    timings["parse"] = time.perf_counter() - start
+
+    def iter_strings(node, skip_chrome):
+        stack = [iter(node.children)]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                continue
+            if isinstance(child, Tag):
+                if child.name in SKIPPED_TAGS:
+                    continue
+                if skip_chrome and _is_chrome_div(child.name, " ".join(child.get("class") or [])):
+                    continue
+                stack.append(iter(child.children))
+            elif type(child) in (NavigableString, CData):
+                text = child.strip()
+                if text:
+                    yield text
+
+    main = None
+    for attr, value in MAIN_SELECTORS:
+        main = soup.find("div", attrs={attr: value}) or soup.find("main", attrs={attr: value})
+        if main:
+            break
+    if not main:
+        main = soup.find("article") or soup.body
+
+    content_node = (soup.find("main") or soup.find("div", class_="main-content")
+                    or soup.find("div", class_="content") or soup.body or soup)
+
+    h1 = soup.find("h1")
+    result = _finalize(
+        list(iter_strings(main, True)) if main else [],
+        list(iter_strings(content_node, False)),
+        h1.get_text(strip=True) if h1 else None,
+        soup.title.text if soup.title else None,
+        main is not None,
+    )
+    result["links"] = [a.get("href") for a in soup.find_all("a", href=True)]
+    return result
+
+
+# ---------------------------------------------------------------------------
+# lxml
+# ---------------------------------------------------------------------------
+
+def _xpath_class(value):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {value} ')"
+
+
+def _lxml_main_xpaths():
+    xpaths = []
+    for attr, value in MAIN_SELECTORS:
+        condition = _xpath_class(value) if attr == "class" else f"@{attr}='{value}'"
+        xpaths.append((f"(//div[{condition}])[1]", f"(//main[{condition}])[1]"))
+    return xpaths
+
+
+_LXML_MAIN_XPATHS = _lxml_main_xpaths()
+
+
+def _extract_lxml(html, timings):
+    import lxml.html
+
+    start = time.perf_counter()
+    try:
+        doc = lxml.html.document_fromstring(html)
+    except ValueError:
+        # Chaînes avec déclaration d'encodage: passer par les octets
+        doc = lxml.html.document_fromstring(html.encode("utf-8"))
+    except Exception:
+        doc = None
+    timings["parse"] = time.perf_counter() - start
+    if doc is None:
+        result = _finalize([], [], None, None, False)
+        result["links"] = []
+        return result
+
+    def iter_strings(node, skip_chrome):
+        # Texte propre de l'élément, puis pour chaque enfant son contenu et son "tail".
+        # Pile explicite (comme les autres moteurs): pas de RecursionError sur les pages très imbriquées
+        if node.text and node.text.strip():
+            yield node.text.strip()
+        stack = [(iter(node), None)]
+        while stack:
+            child = next(stack[-1][0], None)
+            if child is None:
+                _, parent = stack.pop()
+                if parent is not None and parent.tail and parent.tail.strip():
+                    yield parent.tail.strip()
+                continue
+            tag = child.tag if isinstance(child.tag, str) else None
+            if tag is not None and tag not in SKIPPED_TAGS and not (
+                    skip_chrome and _is_chrome_div(tag, child.get("class"))):
+                if child.text and child.text.strip():
+                    yield child.text.strip()
+                # Le "tail" de l'enfant suit son contenu: émis quand il est dépilé
+                stack.append((iter(child), child))
+            elif child.tail and child.tail.strip():
+                yield child.tail.strip()
+
+    def first(xpath):
+        found = doc.xpath(xpath)
+        return found[0] if found else None
+
+    main = None
+    for div_xpath, main_xpath in _LXML_MAIN_XPATHS:
+        main = first(div_xpath)
+        if main is None:
+            main = first(main_xpath)
+        if main is not None:
+            break
+    if main is None:
+        main = first("//article")
+    if main is None:
+        main = first("//body")
+
+    content_node = None
+    for xpath in ("//main", f"//div[{_xpath_class('main-content')}]", f"//div[{_xpath_class('content')}]", "//body"):
+        content_node = first(xpath)
+        if content_node is not None:
+            break
+    if content_node is None:
+        content_node = doc
+
+    h1 = first("//h1")
+    title = first("//title")
+    result = _finalize(
+        list(iter_strings(main, True)) if main is not None else [],
+        list(iter_strings(content_node, False)),
+        h1.text_content().strip() if h1 is not None else None,
+        title.text_content() if title is not None else None,
+        main is not None,
+    )
+    result["links"] = doc.xpath("//a/@href")
+    return result
+
+
+# ---------------------------------------------------------------------------
+# selectolax (moteur lexbor)
+# ---------------------------------------------------------------------------
+
+def _extract_selectolax(html, timings):
+    from selectolax.lexbor import LexborHTMLParser
+
+    start = time.perf_counter()
+    tree = LexborHTMLParser(html)
+    timings["parse"] = time.perf_counter() - start
+
+    def iter_strings(node, skip_chrome):
+        stack = [node.iter(include_text=True)]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                continue
+            tag = child.tag
+            if tag == "-text":
+                text = (child.text_content or "").strip()
+                if text:
+                    yield text
+            elif tag.startswith("-") or tag in SKIPPED_TAGS:
+                continue
+            elif skip_chrome and _is_chrome_div(tag, child.attributes.get("class")):
+                continue
+            else:
+                stack.append(child.iter(include_text=True))
+
+    main = None
+    for attr, value in MAIN_SELECTORS:
+        selector = f".{value}" if attr == "class" else (f"#{value}" if attr == "id" else f"[{attr}='{value}']")
+        main = tree.css_first(f"div{selector}") or tree.css_first(f"main{selector}")
+        if main:
+            break
+    if not main:
+        main = tree.css_first("article") or tree.body
+
+    content_node = (tree.css_first("main") or tree.css_first("div.main-content")
+                    or tree.css_first("div.content") or tree.body or tree.root)
+
+    h1 = tree.css_first("h1")
+    title = tree.css_first("title")
+    result = _finalize(
+        list(iter_strings(main, True)) if main else [],
+        list(iter_strings(content_node, False)) if content_node else [],
+        h1.text(strip=True) if h1 else None,
+        title.text() if title else None,
+        main is not None,
+    )
+    result["links"] = [a.attributes.get("href") for a in tree.css("a[href]")]
+    return result
+
+
+BACKENDS = {
+    "lxml": ("lxml.html", _extract_lxml),
+    "selectolax": ("selectolax.lexbor", _extract_selectolax),
+    "html.parser": ("bs4", _extract_bs4),
+}
+
+# Ordre de préférence pour 'auto'
+AUTO_ORDER = ["selectolax", "lxml", "html.parser"]
+
+
+def available_backends():
+    """Liste les parseurs installés, dans l'ordre de préférence."""
+    import importlib
+
+    available = []
+    for name in AUTO_ORDER:
+        module_name, _ = BACKENDS[name]
+        try:
+            importlib.import_module(module_name)
+            available.append(name)
+        except ImportError:
+            continue
+    return available
+
+
+def resolve_backend(backend="auto"):
+    """Retourne le nom du parseur à utiliser ('auto' = le plus rapide disponible)."""
+    if backend != "auto":
+        if backend not in BACKENDS:
+            raise ValueError(f"Parseur inconnu: {backend} (choix: {', '.join(BACKENDS)})")
+        return backend
+    available = available_backends()
+    return available[0] if available else "html.parser"
+
+
+def extract_page(html, backend="auto", timings=None):
+    """
+    Extrait en une seule passe le titre, le contenu et les liens d'une page.
+
+    Args:
+        html (str): Code HTML de la page
+        backend (str): 'auto', 'lxml', 'selectolax' ou 'html.parser'
+        timings (dict): Si fourni, reçoit les durées 'parse' (construction de
+                        l'arbre) et 'extract' (parcours de l'arbre), en secondes
+
+    Returns:
+        dict: 'title', 'content', 'main_content' et 'links' (href bruts, non résolus)
+    """
+    _, extractor = BACKENDS[resolve_backend(backend)]
+    if timings is None:
+        timings = {}
+    start = time.perf_counter()
+    result = extractor(html or "", timings)
+    timings["extract"] = time.perf_counter() - start - timings.get("parse", 0.0)
+    return result
@@ -0,0 +1,132 @@
+import json
+import os
+
+
+class JsonlCorpusWriter:
+    """
+    Écriture en flux du corpus crawlé: une page JSON par ligne, ajoutée dès
+    qu'elle est crawlée. Un arrêt brutal ne perd au plus que la ligne en cours
+    d'écriture, qui est retirée à la reprise.
+    """
+
+    def __init__(self, path, resume=False, keep_records=None):
+        """
+        Args:
+            path (str): Chemin du fichier JSONL
+            resume (bool): Ouvrir en ajout au lieu de recréer le fichier
+            keep_records (int): En reprise, ne conserver que les N premiers
+                                enregistrements (ceux du dernier point de sauvegarde)
+        """
+        self.path = path
+        self.count = 0
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        if resume and os.path.exists(path):
+            if keep_records is not None:
+                self._truncate_to(keep_records)
+            else:
+                self._repair_tail()
+            self.count = sum(1 for _ in iter_jsonl(path))
+            self._file = open(path, 'a', encoding='utf-8')
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+
+    def _repair_tail(self):
+        """Tronque une éventuelle dernière ligne incomplète (crash pendant l'écriture)."""
+        with open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            # Remonter par blocs jusqu'au dernier saut de ligne
+            position = size
+            block_size = 4096
+            while position > 0:
+                start = max(0, position - block_size)
+                f.seek(start)
+                block = f.read(position - start)
+                if position == size and block.endswith(b'\n'):
+                    return
+                newline = block.rfind(b'\n')
+                if newline != -1:
+                    f.truncate(start + newline + 1)
+                    print(f"Dernière ligne incomplète retirée de {self.path}")
+                    return
+                position = start
+            f.truncate(0)
+
+    def _truncate_to(self, keep_records):
+        """Ne garde que les keep_records premières lignes complètes du fichier."""
+        offset = 0
+        kept = 0
+        with open(self.path, 'rb+') as f:
+            for line in f:
+                if kept >= keep_records or not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                kept += 1
+            f.truncate(offset)
+        if kept < keep_records:
+            print(f"Attention: {self.path} ne contient que {kept} pages sur {keep_records} attendues")
+
+    def write(self, record):
+        """Ajoute un enregistrement et vide le tampon pour qu'il survive à un crash."""
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.count += 1
+
+    def sync(self):
+        """Force l'écriture sur disque (appelé aux points de sauvegarde)."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+def iter_jsonl(path):
+    """Lit un fichier JSONL ligne par ligne, sans le charger en mémoire."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def export_json_array(jsonl_path, json_path, indent=4):
+    """
+    Convertit le corpus JSONL en tableau JSON (format historique de all_pages.json),
+    enregistrement par enregistrement pour garder une mémoire constante.
+
+    Returns:
+        int: Nombre de pages exportées
+    """
+    count = 0
+    tmp_path = f"{json_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        out.write('[')
+        for record in iter_jsonl(jsonl_path):
+            out.write(',\n' if count else '\n')
+            out.write(json.dumps(record, ensure_ascii=False, indent=indent))
+            count += 1
+        out.write('\n]' if count else ']')
+    os.replace(tmp_path, json_path)
+    return count
+
+
+def write_json_atomic(path, data):
+    """Écrit un fichier JSON de façon atomique (fichier temporaire + rename)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
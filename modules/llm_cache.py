@@ -0,0 +1,160 @@
+"""
+Cache persistant des générations du LLM (SQLite, mode WAL).
+
+Un même prompt (même question, même contexte récupéré) était régénéré après
+chaque redémarrage: aucun cache LLM n'était configuré. PersistentLLMCache est
+un cache LangChain (BaseCache) dont la clé est le hash de l'identité du
+modèle et de ses paramètres de génération (llm_string de LangChain: chemin ou
+nom du modèle, température, max_tokens...) et du prompt complet. Un succès
+du cache évite toute génération.
+
+La taille du fichier est bornée: au-delà de max_bytes, les générations les
+moins récemment utilisées sont supprimées.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.outputs import Generation
+
+LLM_CACHE_FILE = "llm_cache.sqlite"
+
+# Générations supprimées à la fois lors d'une éviction
+_EVICTION_BATCH = 100
+
+
+def _hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PersistentLLMCache(BaseCache):
+    """
+    Table generations(key, llm_hash, value, size, last_used): une ligne par
+    couple (modèle et paramètres, prompt), value étant la liste des générations en JSON.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            path (str): Fichier SQLite du cache
+            max_bytes (int): Taille maximale des générations enregistrées
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS generations (
+                key TEXT PRIMARY KEY,
+                llm_hash TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS generations_last_used ON generations (last_used)")
+        self.connection.commit()
+        self._bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM generations").fetchone()[0]
+
+    @staticmethod
+    def _key(prompt, llm_string):
+        return _hash(f"{llm_string}\x00{prompt}")
+
+    def lookup(self, prompt, llm_string):
+        """Générations enregistrées pour ce prompt et ce modèle, ou None."""
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self.connection.execute("SELECT value FROM generations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with self.connection:
+                self.connection.execute("UPDATE generations SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return [Generation(text=item["text"], generation_info=item.get("generation_info"))
+                for item in json.loads(row[0])]
+
+    def update(self, prompt, llm_string, return_val):
+        """Enregistre les générations d'un prompt, puis évince les plus anciennes si nécessaire."""
+        value = json.dumps([{"text": generation.text, "generation_info": generation.generation_info}
+                            for generation in return_val], ensure_ascii=False, default=str)
+        key = self._key(prompt, llm_string)
+        size = len(value.encode("utf-8")) + len(key)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            with self.connection:
+                previous = self.connection.execute("SELECT size FROM generations WHERE key = ?", (key,)).fetchone()
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO generations (key, llm_hash, value, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, _hash(llm_string), value, size, time.time()))
+            self._bytes += size - (previous[0] if previous else 0)
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes:
+            rows = self.connection.execute(
+                "SELECT key, size FROM generations ORDER BY last_used LIMIT ?", (_EVICTION_BATCH,)).fetchall()
+            if not rows:
+                self._bytes = 0
+                break
+            evicted = []
+            for key, size in rows:
+                if self._bytes <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                self._bytes -= size
+            with self.connection:
+                self.connection.executemany("DELETE FROM generations WHERE key = ?", evicted)
+            self.evictions += len(evicted)
+
+    def clear(self, **kwargs):
+        with self._lock:
+            with self.connection:
+                self.connection.execute("DELETE FROM generations")
+            self._bytes = 0
+
+    def stats(self):
+        """Compteurs du cache: succès, échecs, évictions, générations et octets enregistrés."""
+        with self._lock:
+            count = self.connection.execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": count, "bytes": self._bytes}
+
+    def close(self):
+        self.connection.close()
+
+
+def attach_llm_cache(llm, cache_dir):
+    """
+    Attache un PersistentLLMCache (cache_dir/llm_cache.sqlite, LLM_CACHE_MB Mo, 64 par défaut)
+    au LLM. Les LLM factices ne sont pas mis en cache (leurs réponses tournent).
+
+    Returns:
+        PersistentLLMCache: Le cache attaché, ou None
+    """
+    if type(llm).__name__ == "FakeListLLM":
+        return None
+    try:
+        max_bytes = int(float(os.environ.get("LLM_CACHE_MB", 64)) * 1024 * 1024)
+        cache = PersistentLLMCache(os.path.join(cache_dir, LLM_CACHE_FILE), max_bytes=max_bytes)
+        llm.cache = cache
+        print(f"Cache des générations du LLM: {cache.path}")
+        return cache
+    except Exception as e:
+        print(f"Cache des générations du LLM indisponible ({e})")
+        return None
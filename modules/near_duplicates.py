@@ -0,0 +1,146 @@
+"""
+Détection des pages quasi-identiques par SimHash.
+
+Chaque page est résumée par une empreinte de 64 bits calculée sur les
+shingles (suites de mots) de son contenu principal: deux pages qui ne
+diffèrent que par quelques mots ont des empreintes à faible distance de
+Hamming. L'index découpe les empreintes en bandes pour ne comparer qu'une
+poignée de candidats par page.
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+FINGERPRINT_BITS = 64
+
+
+# _BIT_TABLES[bit] traduit un octet en 1 si son bit `bit` est à 1, sinon 0: compter
+# les bits d'une colonne d'octets se fait alors avec bytes.translate/count (en C)
+_BIT_TABLES = [bytes(value >> bit & 1 for value in range(256)) for bit in range(8)]
+
+
+def simhash(text, shingle_size=3):
+    """
+    Calcule l'empreinte SimHash (64 bits) d'un texte.
+
+    Returns:
+        int: Empreinte, ou None si le texte est trop court pour être comparé
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        return None
+    shingles = Counter(" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1))
+
+    # Hash de 8 octets de chaque shingle, répété autant de fois qu'il apparaît
+    digests = b"".join(
+        hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest() * count
+        for shingle, count in shingles.items()
+    )
+    total = len(digests) // 8
+
+    # Bit à 1 si la majorité (pondérée) des shingles ont ce bit à 1
+    fingerprint = 0
+    for byte_index in range(FINGERPRINT_BITS // 8):
+        column = digests[byte_index::8]
+        for bit in range(8):
+            if 2 * column.translate(_BIT_TABLES[bit]).count(1) > total:
+                fingerprint |= 1 << (byte_index * 8 + bit)
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """
+    Index des empreintes des pages canoniques et des alias (pages quasi-identiques).
+
+    Avec max_distance + 1 bandes, deux empreintes à distance <= max_distance
+    partagent forcément au moins une bande identique (principe des tiroirs).
+    """
+
+    def __init__(self, path=None, max_distance=3, min_words=20):
+        self.path = path
+        self.max_distance = max_distance
+        self.min_words = min_words
+        # Bandes couvrant les 64 bits (les premières ont un bit de plus si la division ne tombe pas juste)
+        band_count = max_distance + 1
+        base, extra = divmod(FINGERPRINT_BITS, band_count)
+        self._band_ranges = []
+        offset = 0
+        for band in range(band_count):
+            width = base + (1 if band < extra else 0)
+            self._band_ranges.append((offset, (1 << width) - 1))
+            offset += width
+        self.fingerprints = {}  # url canonique -> empreinte
+        self.aliases = {}  # url dupliquée -> url canonique
+        self._bands = {}
+        if path:
+            self.load()
+
+    def fingerprint(self, text):
+        """Empreinte d'un contenu, ou None s'il est trop court pour être dédupliqué."""
+        if not text or len(_WORD_RE.findall(text)) < self.min_words:
+            return None
+        return simhash(text)
+
+    def _band_keys(self, fingerprint):
+        return [(band, fingerprint >> offset & mask) for band, (offset, mask) in enumerate(self._band_ranges)]
+
+    def find(self, fingerprint):
+        """Retourne l'URL canonique d'une page quasi-identique déjà indexée, ou None."""
+        if fingerprint is None:
+            return None
+        best_url, best_distance = None, self.max_distance + 1
+        for key in self._band_keys(fingerprint):
+            for url in self._bands.get(key, ()):
+                distance = hamming_distance(fingerprint, self.fingerprints[url])
+                if distance < best_distance:
+                    best_url, best_distance = url, distance
+        return best_url
+
+    def add(self, url, fingerprint):
+        """Indexe une page canonique."""
+        if fingerprint is None or url in self.fingerprints:
+            return
+        self.fingerprints[url] = fingerprint
+        for key in self._band_keys(fingerprint):
+            self._bands.setdefault(key, []).append(url)
+
+    def add_alias(self, url, canonical_url):
+        self.aliases[url] = canonical_url
+
+    def clear(self):
+        self.fingerprints = {}
+        self.aliases = {}
+        self._bands = {}
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Impossible de charger l'index des doublons {self.path}: {e}")
+            return
+        for url, fingerprint in data.get("fingerprints", {}).items():
+            self.add(url, int(fingerprint, 16))
+        self.aliases = data.get("aliases", {})
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "fingerprints": {url: f"{fp:016x}" for url, fp in self.fingerprints.items()},
+                "aliases": self.aliases
+            }, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,161 @@
+"""
+Vectorisation multi-processus pour la construction de l'index.
+
+HuggingFaceEmbeddings encode tous les chunks dans un seul processus: sur une
+machine sans GPU, seuls quelques cœurs travaillent. MultiProcessEmbeddings
+répartit les chunks d'un appel à embed_documents entre plusieurs processus
+(chacun avec son modèle sentence-transformers et un nombre limité de threads
+torch, pour ne pas surcharger les cœurs), puis rassemble les vecteurs dans
+l'ordre.
+
+Configuration (variables d'environnement):
+- EMBEDDING_WORKERS: nombre de processus ("auto": un par cœur; 1 par défaut, pas de pool)
+- EMBEDDING_THREADS: threads torch par processus (par défaut: cœurs / processus)
+- EMBEDDING_BATCH_SIZE: taille des lots encodés par chaque processus (32 par défaut)
+
+Avec EMBEDDING_BACKEND=int8, chaque processus quantifie son modèle.
+"""
+
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_core.embeddings import Embeddings
+
+from modules.embedding_cache import CachedEmbeddings
+from modules.quantized_embeddings import embedding_threads, quantize_model
+
+DEFAULT_BATCH_SIZE = 32
+
+# Modèle chargé dans chaque processus du pool (initialisé par _init_worker)
+_worker_model = None
+
+
+def embedding_workers():
+    """Nombre de processus de vectorisation demandé (EMBEDDING_WORKERS)."""
+    value = os.environ.get("EMBEDDING_WORKERS", "1").strip().lower()
+    if value == "auto":
+        return os.cpu_count() or 1
+    try:
+        return max(1, int(value))
+    except ValueError:
+        print(f"EMBEDDING_WORKERS invalide ({value}), vectorisation dans un seul processus")
+        return 1
+
+
+def embedding_batch_size():
+    """Taille des lots encodés par le modèle (EMBEDDING_BATCH_SIZE)."""
+    try:
+        return max(1, int(os.environ.get("EMBEDDING_BATCH_SIZE", DEFAULT_BATCH_SIZE)))
+    except ValueError:
+        return DEFAULT_BATCH_SIZE
+
+
+def _init_worker(model_name, threads, device, quantize=False):
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Déjà fixé si torch a servi pendant l'import du module principal
+        pass
+    _worker_model = SentenceTransformer(model_name, device=device).eval()
+    if quantize:
+        quantize_model(_worker_model)
+
+
+def _encode(texts, batch_size):
+    import torch
+    with torch.inference_mode():
+        return _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False,
+                                    convert_to_numpy=True).tolist()
+
+
+class MultiProcessEmbeddings(Embeddings):
+    """
+    Embeddings sentence-transformers calculés par un pool de processus.
+
+    Le pool est démarré au premier appel (chargement du modèle dans chaque
+    processus) et arrêté par close(). Les vecteurs sont ceux de
+    HuggingFaceEmbeddings pour le même modèle (sauts de ligne remplacés par des
+    espaces, pas de normalisation).
+    """
+
+    def __init__(self, model_name, workers=None, threads_per_worker=None, batch_size=None, device="cpu",
+                 quantize=False):
+        """
+        Args:
+            model_name (str): Modèle sentence-transformers
+            workers (int): Nombre de processus (par défaut EMBEDDING_WORKERS)
+            threads_per_worker (int): Threads torch par processus (par défaut EMBEDDING_THREADS,
+                sinon cœurs / processus)
+            batch_size (int): Taille des lots encodés (par défaut EMBEDDING_BATCH_SIZE)
+            device (str): Périphérique des processus
+            quantize (bool): Quantifier le modèle de chaque processus en int8
+        """
+        self.model_name = model_name
+        self.workers = workers or embedding_workers()
+        if threads_per_worker is None:
+            threads_per_worker = embedding_threads() or max(1, (os.cpu_count() or 1) // self.workers)
+        self.threads_per_worker = threads_per_worker
+        self.batch_size = batch_size or embedding_batch_size()
+        self.device = device
+        self.quantize = quantize
+        self.backend = "int8" if quantize else "fp32"
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            print(f"Démarrage de {self.workers} processus de vectorisation "
+                  f"({self.threads_per_worker} threads chacun, lots de {self.batch_size})")
+            # spawn: pas de fork d'un processus dont torch a déjà démarré les threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.threads_per_worker, self.device, self.quantize),
+            )
+        return self._pool
+
+    def embed_documents(self, texts):
+        texts = [text.replace("\n", " ") for text in texts]
+        if not texts:
+            return []
+        # Une part par processus (au moins un lot), dans l'ordre des textes
+        size = max(self.batch_size, math.ceil(len(texts) / self.workers))
+        shards = [texts[start:start + size] for start in range(0, len(texts), size)]
+        vectors = []
+        for shard_vectors in self._get_pool().map(_encode, shards, [self.batch_size] * len(shards)):
+            vectors.extend(shard_vectors)
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def build_embeddings(embeddings):
+    """
+    Embeddings à utiliser pour construire l'index: un pool de EMBEDDING_WORKERS
+    processus pour le même modèle (même quantification, même cache sur disque),
+    ou embeddings lui-même (un seul processus demandé, GPU, modèle factice).
+    """
+    model = embeddings.embeddings if isinstance(embeddings, CachedEmbeddings) else embeddings
+    workers = embedding_workers()
+    model_name = getattr(model, "model_name", None)
+    use_cuda = os.environ.get('USE_CUDA', 'False').lower() == 'true'
+    if workers <= 1 or not model_name or use_cuda:
+        return embeddings
+    pool = MultiProcessEmbeddings(model_name, workers=workers,
+                                  quantize=getattr(model, "backend", None) == "int8")
+    if isinstance(embeddings, CachedEmbeddings):
+        return CachedEmbeddings(pool, embeddings.path, embeddings.model_name)
+    return pool
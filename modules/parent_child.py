@@ -0,0 +1,234 @@
+"""
+Index à deux niveaux: petits chunks enfants vectorisés, passages parents dans le prompt.
+
+Un chunk de la taille du modèle d'embeddings est à la fois trop long pour une
+recherche précise et trop court pour répondre: il fallait en récupérer une
+dizaine, souvent de la même page, pour remplir le contexte du LLM (2048 tokens).
+
+Chaque document est découpé en passages parents (quelques centaines de tokens,
+coupés entre les phrases), eux-mêmes découpés en chunks enfants courts. Seuls
+les enfants sont vectorisés; chacun porte l'identifiant de son parent
+(parent_id). Les parents sont enregistrés dans un fichier SQLite à côté de la
+base Chroma. À la recherche, les enfants trouvés sont regroupés par parent et
+le LLM reçoit au plus max_parents passages complets, sans doublons.
+"""
+
+import json
+import os
+import sqlite3
+from typing import Any
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from modules.chunking import TokenAwareChunker
+from modules.vector_index import chunk_id, parent_id
+
+PARENT_STORE_FILE = "parents.sqlite"
+
+
+class ParentChildSplitter:
+    """
+    Découpe un document en passages parents et en chunks enfants.
+
+    Les enfants portent leur position dans le document (start_index) et celle
+    de leur parent (parent_index); les parents ne se recouvrent pas, un enfant
+    n'appartient donc qu'à un seul parent.
+    """
+
+    def __init__(self, parent_splitter, child_splitter):
+        """
+        Args:
+            parent_splitter: Découpeur des passages parents (start_index requis)
+            child_splitter: Découpeur des chunks enfants, vectorisés
+        """
+        self.parent_splitter = parent_splitter
+        self.child_splitter = child_splitter
+        self.signature = f"ParentChild:{parent_splitter.signature}|{child_splitter.signature}"
+
+    @classmethod
+    def from_embeddings(cls, embeddings, parent_tokens=384, child_tokens=96, child_overlap_tokens=16):
+        """
+        Découpeurs réglés sur le modèle d'embeddings: enfants d'au plus child_tokens
+        tokens (et jamais plus que la limite du modèle), parents de parent_tokens tokens.
+        """
+        chunker = TokenAwareChunker.from_embeddings(embeddings)
+        return cls(chunker.resized(parent_tokens),
+                   chunker.resized(min(child_tokens, chunker.max_tokens), child_overlap_tokens))
+
+    def split_with_parents(self, document):
+        """
+        Returns:
+            tuple: (passages parents, chunks enfants) du document
+        """
+        parents = self.parent_splitter.split_documents([document])
+        for parent in parents:
+            parent.metadata["parent_index"] = parent.metadata["start_index"]
+        children = self.child_splitter.split_documents(parents)
+        for child in children:
+            # Position de l'enfant dans le document, et non dans son parent
+            child.metadata["start_index"] += child.metadata["parent_index"]
+        return parents, children
+
+    def split_documents(self, documents):
+        """Chunks enfants des documents (interface des text splitters)."""
+        children = []
+        for document in documents:
+            children.extend(self.split_with_parents(document)[1])
+        return children
+
+
+class ParentStore:
+    """
+    Table parents(parent_id, doc_key, doc_hash, content, metadata) en SQLite (mode WAL).
+
+    Les passages d'un document sont remplacés en bloc (replace) quand le
+    document est revectorisé; retain supprime ceux des documents disparus.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS parents (
+                parent_id TEXT PRIMARY KEY,
+                doc_key TEXT NOT NULL,
+                doc_hash TEXT NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS parents_doc_key ON parents (doc_key)")
+        self.connection.commit()
+
+    @classmethod
+    def for_index(cls, db_dir):
+        """Magasin des passages parents de la base vectorielle db_dir."""
+        return cls(os.path.join(db_dir, PARENT_STORE_FILE))
+
+    def replace(self, doc_key, doc_hash, parents):
+        """Remplace les passages parents d'un document (une transaction)."""
+        rows = []
+        for parent in parents:
+            metadata = {name: value for name, value in parent.metadata.items() if name != "parent_index"}
+            rows.append((parent_id(doc_hash, parent.metadata["parent_index"]), doc_key, doc_hash,
+                         parent.page_content, json.dumps(metadata, ensure_ascii=False, default=str)))
+        with self.connection:
+            self.connection.execute("DELETE FROM parents WHERE doc_key = ?", (doc_key,))
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO parents (parent_id, doc_key, doc_hash, content, metadata) "
+                "VALUES (?, ?, ?, ?, ?)", rows)
+
+    def indexed(self):
+        """Documents dont les passages sont enregistrés: {doc_key: doc_hash}."""
+        return dict(self.connection.execute("SELECT DISTINCT doc_key, doc_hash FROM parents"))
+
+    def retain(self, doc_keys):
+        """
+        Supprime les passages des documents absents de doc_keys.
+
+        Returns:
+            int: Nombre de passages supprimés
+        """
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS kept_keys (doc_key TEXT PRIMARY KEY)")
+            self.connection.execute("DELETE FROM kept_keys")
+            self.connection.executemany("INSERT OR IGNORE INTO kept_keys VALUES (?)",
+                                        ((key,) for key in doc_keys))
+            cursor = self.connection.execute(
+                "DELETE FROM parents WHERE doc_key NOT IN (SELECT doc_key FROM kept_keys)")
+        return cursor.rowcount
+
+    def get_many(self, parent_ids):
+        """Passages parents demandés: {parent_id: Document} (les identifiants inconnus sont absents)."""
+        parent_ids = list(parent_ids)
+        if not parent_ids:
+            return {}
+        placeholders = ", ".join("?" * len(parent_ids))
+        cursor = self.connection.execute(
+            f"SELECT parent_id, content, metadata FROM parents WHERE parent_id IN ({placeholders})",
+            parent_ids)
+        return {
+            id_: Document(page_content=content, metadata=json.loads(metadata) if metadata else {})
+            for id_, content, metadata in cursor
+        }
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM parents").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+class ParentChildRetriever(BaseRetriever):
+    """
+    Recherche les k chunks enfants les plus proches et retourne leurs passages
+    parents, dans l'ordre du meilleur enfant de chaque parent, sans doublons et
+    au plus max_parents. Un enfant sans parent enregistré (index construit sans
+    parents) est retourné tel quel.
+
+    Avec un RetrievalCache (cache), une question déjà posée ne relance ni la
+    vectorisation ni la recherche: les chunks en cache sont relus par identifiant.
+    """
+
+    vectorstore: Any
+    parent_store: Any
+    k: int = 20
+    max_parents: int = 3
+    cache: Any = None
+
+    def _search(self, query):
+        """Chunks enfants les plus proches de la question (Chroma, ou cache de recherche)."""
+        if self.cache is None:
+            return self.vectorstore.similarity_search(query, k=self.k)
+
+        cached = self.cache.get(query, self.k)
+        if cached is not None:
+            _, ids, _ = cached
+            found = self.vectorstore.get(ids=ids, include=["documents", "metadatas"])
+            by_id = {
+                id_: Document(page_content=text, metadata=metadata or {})
+                for id_, text, metadata in zip(found["ids"], found["documents"], found["metadatas"])
+            }
+            if all(id_ in by_id for id_ in ids):
+                return [by_id[id_] for id_ in ids]
+            # Chunks supprimés sans changement de version (index modifié à la main): nouvelle recherche
+
+        embedding = self.cache.embed_query(self.vectorstore.embeddings, query)
+        results = self.vectorstore.similarity_search_by_vector_with_relevance_scores(embedding, k=self.k)
+        children = [child for child, _ in results]
+        if all("doc_hash" in child.metadata for child in children):
+            ids = [chunk_id(child.metadata["doc_hash"], child.metadata["start_index"]) for child in children]
+            self.cache.put(query, self.k, embedding, ids, [score for _, score in results])
+        return children
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        children = self._search(query)
+
+        # Regrouper les enfants par parent, dans l'ordre de pertinence
+        groups = {}
+        for child in children:
+            key = child.metadata.get("parent_id") or id(child)
+            if key not in groups:
+                if len(groups) >= self.max_parents:
+                    continue
+                groups[key] = [child]
+            else:
+                groups[key].append(child)
+
+        parents = self.parent_store.get_many(key for key in groups if isinstance(key, str))
+        documents = []
+        for key, matched in groups.items():
+            parent = parents.get(key)
+            if parent is None:
+                documents.append(matched[0])
+                continue
+            parent.metadata["parent_id"] = key
+            parent.metadata["matched_chunks"] = len(matched)
+            documents.append(parent)
+        return documents
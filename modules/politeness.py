@@ -0,0 +1,327 @@
+"""
+Planificateur de politesse: rythme des requêtes HTTP par hôte.
+
+Chaque hôte a son propre seau à jetons (token bucket) dont le débit s'adapte
+à l'état du serveur (AIMD):
+- augmentation additive tant que le serveur répond vite
+- diminution multiplicative sur 429/5xx, erreurs réseau, ou latence en hausse
+- pause complète pendant la durée d'un en-tête Retry-After
+
+Le Crawl-delay de robots.txt plafonne le débit de l'hôte. robots.txt est lu
+et interprété avec le User-Agent réellement envoyé par le client. Une instance
+partagée (get_default_scheduler) sert le scraper et HorairesModule, de sorte
+que tous les accès à un même hôte respectent le même budget et ses règles
+robots.txt: request() refuse les URLs interdites (RobotsDisallowed).
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib import robotparser
+from urllib.parse import urlsplit
+
+import requests
+
+
+class RobotsDisallowed(requests.RequestException):
+    """URL interdite par le robots.txt de son hôte (aucune requête n'est envoyée)."""
+
+
+class HostState:
+    """État de débit d'un hôte (protégé par son propre verrou)."""
+
+    def __init__(self, rate, burst):
+        self.lock = threading.Lock()
+        self.rate = rate  # Requêtes par seconde
+        self.max_rate = None  # Plafond propre à l'hôte (Crawl-delay)
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.paused_until = 0.0
+        self.latency = None  # Moyenne mobile exponentielle du temps de réponse
+        self.baseline_latency = None  # Temps de réponse "serveur au repos"
+        self.robots = None
+        self.robots_loaded = False
+        self.robots_retry_at = 0.0  # Nouvelle lecture de robots.txt (après une erreur 5xx)
+        self.robots_loading = None  # threading.Event pendant le téléchargement de robots.txt
+
+
+class PolitenessScheduler:
+    """
+    Rythme les requêtes par hôte (seau à jetons adaptatif + robots.txt).
+
+    Usage:
+        scheduler.acquire(url)                  # bloque jusqu'au créneau suivant
+        ... requête ...
+        scheduler.record(url, status, latency)  # ajuste le débit de l'hôte
+
+    ou directement: scheduler.request("GET", url, timeout=10), qui vérifie aussi robots.txt
+    """
+
+    def __init__(self, initial_rate=4.0, min_rate=0.25, max_rate=16.0, burst=4,
+                 increase_step=0.5, decrease_factor=0.5, latency_factor=2.0,
+                 min_slow_latency=0.5, user_agent="*", robots_timeout=10, robots_retry_delay=300):
+        """
+        Args:
+            initial_rate (float): Débit initial par hôte (requêtes/s)
+            min_rate (float): Débit minimal en cas de difficultés du serveur
+            max_rate (float): Débit maximal quand le serveur répond vite
+            burst (int): Nombre de requêtes pouvant partir d'un coup
+            increase_step (float): Augmentation du débit après une réponse rapide
+            decrease_factor (float): Facteur appliqué au débit sur 429/5xx/erreur
+            latency_factor (float): Latence (multiple de la latence de référence)
+                                    à partir de laquelle le débit est réduit
+            min_slow_latency (float): En dessous de cette latence (s), une réponse
+                                      n'est jamais considérée comme lente
+            user_agent (str): User-Agent du client: envoyé pour lire robots.txt et
+                              comparé à ses règles ("*": règles par défaut uniquement)
+            robots_timeout (float): Timeout du téléchargement de robots.txt
+            robots_retry_delay (float): Délai (s) avant de relire un robots.txt en erreur 5xx
+        """
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.min_slow_latency = min_slow_latency
+        self.user_agent = user_agent
+        self.robots_timeout = robots_timeout
+        self.robots_retry_delay = robots_retry_delay
+        self._hosts = {}
+        self._hosts_lock = threading.Lock()
+
+    def _host(self, url):
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}".lower()
+        with self._hosts_lock:
+            state = self._hosts.get(key)
+            if state is None:
+                state = HostState(self.initial_rate, self.burst)
+                self._hosts[key] = state
+        return key, state
+
+    def set_user_agent(self, user_agent):
+        """Change le User-Agent du client; les robots.txt déjà lus seront relus pour cet agent."""
+        if user_agent == self.user_agent:
+            return
+        self.user_agent = user_agent
+        with self._hosts_lock:
+            states = list(self._hosts.values())
+        for state in states:
+            with state.lock:
+                state.robots_loaded = False
+
+    def _fetch_robots(self, host_url, user_agent):
+        """Télécharge robots.txt (sans verrou: les autres hôtes ne sont jamais bloqués), ou None si inaccessible."""
+        headers = {"User-Agent": user_agent} if user_agent != "*" else {}
+        try:
+            return requests.get(f"{host_url}/robots.txt", timeout=self.robots_timeout, headers=headers)
+        except requests.RequestException as e:
+            print(f"robots.txt inaccessible pour {host_url}: {e}")
+            return None
+
+    def _apply_robots(self, host_url, state, user_agent, response):
+        """
+        Applique robots.txt et son Crawl-delay à l'hôte (appelé sous state.lock).
+
+        404 et autres 4xx: pas de robots.txt, tout est autorisé. 401/403: tout est
+        interdit. 5xx: tout est interdit et le débit de l'hôte réduit, jusqu'à une
+        nouvelle lecture dans robots_retry_delay secondes.
+        """
+        state.robots_loaded = True
+        state.robots = None
+        state.robots_retry_at = 0.0
+        if response is None:
+            return
+        parser = robotparser.RobotFileParser(f"{host_url}/robots.txt")
+        if response.status_code in (401, 403):
+            # Accès à robots.txt refusé: le site entier est interdit
+            print(f"robots.txt refusé ({response.status_code}) pour {host_url}: exploration interdite")
+            parser.disallow_all = True
+            state.robots = parser
+            return
+        if response.status_code >= 500:
+            # Serveur en difficulté: rien n'est exploré avant la prochaine lecture
+            print(f"robots.txt en erreur ({response.status_code}) pour {host_url}: "
+                  f"exploration suspendue {self.robots_retry_delay}s")
+            parser.disallow_all = True
+            state.robots = parser
+            state.robots_retry_at = time.monotonic() + self.robots_retry_delay
+            state.rate = max(self.min_rate, state.rate * self.decrease_factor)
+            return
+        if response.status_code >= 400:
+            # Pas de robots.txt (404 et autres 4xx): tout est autorisé
+            return
+        parser.parse(response.text.splitlines())
+        state.robots = parser
+
+        delay = parser.crawl_delay(user_agent)
+        request_rate = parser.request_rate(user_agent)
+        if request_rate and request_rate.requests:
+            delay = max(delay or 0, request_rate.seconds / request_rate.requests)
+        if delay:
+            state.max_rate = min(self.max_rate, 1.0 / float(delay))
+            state.rate = min(state.rate, state.max_rate)
+            state.burst = 1
+            state.tokens = min(state.tokens, 1.0)
+            print(f"Crawl-delay de {delay}s pour {host_url}")
+
+    def _ensure_robots(self, url):
+        """
+        Lit robots.txt une fois par hôte (et de nouveau après une erreur 5xx).
+
+        Un seul thread télécharge le fichier, hors du verrou de l'hôte; les autres
+        attendent la fin du téléchargement au lieu de le relancer.
+        """
+        host_url, state = self._host(url)
+        while True:
+            with state.lock:
+                if state.robots_loaded and not (state.robots_retry_at and time.monotonic() >= state.robots_retry_at):
+                    return state
+                loading = state.robots_loading
+                if loading is None:
+                    loading = state.robots_loading = threading.Event()
+                    user_agent = self.user_agent
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                loading.wait()
+                continue
+            try:
+                response = self._fetch_robots(host_url, user_agent)
+                with state.lock:
+                    # User-Agent changé pendant le téléchargement: le fichier est relu pour le nouvel agent
+                    if user_agent == self.user_agent:
+                        self._apply_robots(host_url, state, user_agent, response)
+            finally:
+                with state.lock:
+                    state.robots_loading = None
+                loading.set()
+
+    def can_fetch(self, url):
+        """Vérifie que robots.txt autorise l'URL."""
+        state = self._ensure_robots(url)
+        return state.robots is None or state.robots.can_fetch(self.user_agent, url)
+
+    def acquire(self, url):
+        """Attend qu'un jeton soit disponible pour l'hôte de l'URL, puis le consomme."""
+        state = self._ensure_robots(url)
+        while True:
+            with state.lock:
+                now = time.monotonic()
+                state.tokens = min(state.burst, state.tokens + (now - state.last_refill) * state.rate)
+                state.last_refill = now
+                if now < state.paused_until:
+                    wait = state.paused_until - now
+                elif state.tokens >= 1:
+                    state.tokens -= 1
+                    return
+                else:
+                    wait = (1 - state.tokens) / state.rate
+            time.sleep(wait)
+
+    def record(self, url, status_code=None, latency=None, retry_after=None):
+        """
+        Ajuste le débit de l'hôte d'après une réponse.
+
+        Args:
+            url (str): URL de la requête
+            status_code (int): Code HTTP (None si erreur réseau)
+            latency (float): Temps de réponse en secondes
+            retry_after (str): Valeur de l'en-tête Retry-After, s'il y en a un
+        """
+        _, state = self._host(url)
+        max_rate = state.max_rate or self.max_rate
+        with state.lock:
+            if status_code is None or status_code == 429 or status_code >= 500:
+                state.rate = max(self.min_rate, state.rate * self.decrease_factor)
+                pause = _parse_retry_after(retry_after)
+                if pause:
+                    state.paused_until = max(state.paused_until, time.monotonic() + pause)
+                state.tokens = min(state.tokens, 0.0)
+                return
+
+            if latency is None:
+                return
+            state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+            if state.baseline_latency is None or latency < state.baseline_latency:
+                state.baseline_latency = latency
+            else:
+                # La référence suit lentement la tendance pour ne pas rester bloquée sur un minimum isolé
+                state.baseline_latency += 0.01 * (state.latency - state.baseline_latency)
+
+            slow = (state.latency > self.min_slow_latency
+                    and state.latency > self.latency_factor * state.baseline_latency)
+            if slow:
+                state.rate = max(self.min_rate, state.rate * 0.8)
+            else:
+                state.rate = min(max_rate, state.rate + self.increase_step)
+
+    def request(self, method, url, session=None, **kwargs):
+        """
+        Exécute une requête HTTP au rythme de l'hôte et ajuste le débit d'après la réponse.
+
+        Returns:
+            requests.Response
+
+        Raises:
+            RobotsDisallowed: robots.txt interdit l'URL
+        """
+        if not self.can_fetch(url):
+            raise RobotsDisallowed(f"Interdit par robots.txt: {url}", request=requests.Request(method, url))
+        self.acquire(url)
+        start = time.monotonic()
+        try:
+            response = (session or requests).request(method, url, **kwargs)
+        except requests.RequestException:
+            self.record(url, None)
+            raise
+        self.record(url, response.status_code, time.monotonic() - start,
+                    response.headers.get("Retry-After"))
+        return response
+
+    def get(self, url, session=None, **kwargs):
+        return self.request("GET", url, session=session, **kwargs)
+
+    def host_rates(self):
+        """Débit courant de chaque hôte (pour le suivi)."""
+        with self._hosts_lock:
+            return {host: round(state.rate, 2) for host, state in self._hosts.items()}
+
+
+def _parse_retry_after(value):
+    """Durée d'attente (s) d'un en-tête Retry-After (secondes ou date HTTP), plafonnée à 5 minutes."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), 300.0)
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_default_scheduler(user_agent=None):
+    """
+    Planificateur partagé par tous les composants qui accèdent aux sites de l'université.
+
+    Args:
+        user_agent (str): User-Agent envoyé par le client (robots.txt est lu et interprété pour lui)
+    """
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = PolitenessScheduler(user_agent=user_agent or "*")
+        elif user_agent:
+            _default_scheduler.set_user_agent(user_agent)
+        return _default_scheduler
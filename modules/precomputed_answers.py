@@ -0,0 +1,127 @@
+"""
+Réponses précalculées aux questions les plus fréquentes.
+
+Les journaux de requêtes sont dominés par quelques dizaines de questions.
+precompute_answers.py les fait passer hors ligne par tout le pipeline RAG et
+enregistre ici, pour chaque question normalisée (normalize_query), la réponse,
+ses sources, le modèle qui l'a générée (llm_string de LangChain) et la version
+de l'index qui l'a produite. Le chatbot sert une réponse précalculée dès que la
+question normalisée correspond exactement et qu'elle vient du même modèle: les
+réponses d'un LLM factice ne sont jamais servies par le vrai modèle.
+
+Une réponse produite par une autre version de l'index (corpus ou découpage
+modifiés puis index resynchronisé) est périmée: elle n'est plus servie et sera
+régénérée au prochain passage de precompute_answers.py.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from langchain_core.documents import Document
+
+from modules.retrieval_cache import normalize_query
+
+PRECOMPUTED_ANSWERS_FILE = "precomputed_answers.sqlite"
+
+
+def llm_identity(llm):
+    """Identité du modèle et de ses paramètres de génération (llm_string, comme la clé du cache LLM)."""
+    try:
+        return llm._get_llm_string()
+    except Exception:
+        name = getattr(llm, "model_path", None) or getattr(llm, "model", None) or ""
+        return f"{type(llm).__name__}:{name}"
+
+
+def serialize_sources(sources):
+    return json.dumps([{"page_content": document.page_content, "metadata": document.metadata}
+                       for document in sources], ensure_ascii=False, default=str)
+
+
+def deserialize_sources(data):
+    return [Document(page_content=item["page_content"], metadata=item.get("metadata") or {})
+            for item in json.loads(data or "[]")]
+
+
+class PrecomputedAnswerStore:
+    """
+    Table answers(normalized, model, question, answer, sources, index_version, created_at)
+    en SQLite (mode WAL): une réponse par question normalisée et par modèle.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(answers)")]
+        if columns and "model" not in columns:
+            # Réponses enregistrées sans le modèle qui les a générées: inutilisables
+            self.connection.execute("DROP TABLE answers")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                normalized TEXT NOT NULL,
+                model TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                sources TEXT,
+                index_version TEXT,
+                created_at TEXT,
+                PRIMARY KEY (normalized, model)
+            )
+        """)
+        self.connection.commit()
+
+    @classmethod
+    def for_index(cls, db_dir):
+        """Réponses précalculées de la base vectorielle db_dir."""
+        return cls(os.path.join(db_dir, PRECOMPUTED_ANSWERS_FILE))
+
+    def get(self, question, model):
+        """
+        Réponse précalculée par le modèle model (llm_identity) pour la question normalisée, périmée ou non.
+
+        Returns:
+            dict: question, answer, sources (Documents), index_version, created_at; ou None
+        """
+        row = self.connection.execute(
+            "SELECT question, answer, sources, index_version, created_at FROM answers "
+            "WHERE normalized = ? AND model = ?", (normalize_query(question), model)).fetchone()
+        if row is None:
+            return None
+        question, answer, sources, index_version, created_at = row
+        return {"question": question, "answer": answer, "sources": deserialize_sources(sources),
+                "index_version": index_version, "created_at": created_at}
+
+    def put(self, question, answer, sources, index_version, model):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO answers "
+                "(normalized, model, question, answer, sources, index_version, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (normalize_query(question), model, question, answer, serialize_sources(sources), index_version,
+                 datetime.now().isoformat()))
+
+    def is_fresh(self, question, index_version, model):
+        row = self.connection.execute("SELECT index_version FROM answers WHERE normalized = ? AND model = ?",
+                                      (normalize_query(question), model)).fetchone()
+        return row is not None and row[0] == index_version
+
+    def stale_questions(self, index_version, model):
+        """Questions dont la réponse du modèle a été produite par une autre version de l'index."""
+        return [row[0] for row in self.connection.execute(
+            "SELECT question FROM answers WHERE model = ? AND index_version IS NOT ? ORDER BY created_at",
+            (model, index_version))]
+
+    def count(self, model=None):
+        if model is None:
+            return self.connection.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return self.connection.execute("SELECT COUNT(*) FROM answers WHERE model = ?", (model,)).fetchone()[0]
+
+    def close(self):
+        self.connection.close()
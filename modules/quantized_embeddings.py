@@ -0,0 +1,103 @@
+"""
+Embeddings quantifiés en int8 pour les machines sans GPU.
+
+La passe avant fp32 d'all-MiniLM-L6-v2 représente une grande part de la
+latence d'une question et du temps de construction de l'index. La
+quantification dynamique int8 (torch.quantization.quantize_dynamic) remplace
+les couches linéaires du transformer par des versions int8: poids quantifiés
+une fois au chargement, activations quantifiées à la volée. L'encodage se
+fait sous torch.inference_mode, avec un nombre de threads configuré.
+
+Activé par EMBEDDING_BACKEND=int8 (fp32 par défaut); EMBEDDING_THREADS fixe le
+nombre de threads torch. Les vecteurs int8 diffèrent légèrement des vecteurs
+fp32: ils sont mis en cache sous un autre nom de modèle, et la concordance
+des résultats de recherche se vérifie avec tests/benchmark_quantized_embeddings.py.
+"""
+
+import os
+
+from langchain_core.embeddings import Embeddings
+
+
+def embedding_backend():
+    """Backend d'embeddings demandé (EMBEDDING_BACKEND): "fp32" ou "int8"."""
+    return os.environ.get("EMBEDDING_BACKEND", "fp32").strip().lower()
+
+
+def embedding_threads():
+    """Threads torch demandés (EMBEDDING_THREADS), None si non configuré."""
+    try:
+        return int(os.environ.get("EMBEDDING_THREADS", 0)) or None
+    except ValueError:
+        return None
+
+
+def quantize_model(model):
+    """Quantifie en int8 (dynamique) les couches linéaires d'un modèle torch, sur place."""
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+class QuantizedEmbeddings(Embeddings):
+    """
+    Embeddings sentence-transformers quantifiés en int8, sur CPU.
+
+    Mêmes entrées et sorties que HuggingFaceEmbeddings (sauts de ligne remplacés
+    par des espaces, pas de normalisation); client est le SentenceTransformer
+    quantifié (tokenizer et longueur maximale utilisés par le découpage).
+    """
+
+    backend = "int8"
+
+    def __init__(self, model_name, threads=None, batch_size=32):
+        """
+        Args:
+            model_name (str): Modèle sentence-transformers
+            threads (int): Threads torch (par défaut EMBEDDING_THREADS, sinon réglage de torch)
+            batch_size (int): Taille des lots encodés par embed_documents
+        """
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        # Vecteurs différents du modèle fp32: clé distincte dans le cache des embeddings
+        self.cache_name = f"{model_name}:{self.backend}"
+        self.batch_size = batch_size
+        threads = threads or embedding_threads()
+        if threads:
+            torch.set_num_threads(threads)
+        self.client = quantize_model(SentenceTransformer(model_name, device="cpu").eval())
+        self._torch = torch
+
+    def _encode(self, texts):
+        with self._torch.inference_mode():
+            return self.client.encode(texts, batch_size=self.batch_size, show_progress_bar=False,
+                                      convert_to_numpy=True)
+
+    def embed_documents(self, texts):
+        texts = [text.replace("\n", " ") for text in texts]
+        if not texts:
+            return []
+        return self._encode(texts).tolist()
+
+    def embed_query(self, text):
+        return self._encode([text.replace("\n", " ")])[0].tolist()
+
+
+def load_quantized_embeddings(model_name):
+    """
+    QuantizedEmbeddings si EMBEDDING_BACKEND=int8 (et pas de GPU demandé), sinon None:
+    l'appelant utilise alors le modèle fp32.
+    """
+    if embedding_backend() != "int8":
+        return None
+    if os.environ.get('USE_CUDA', 'False').lower() == 'true':
+        print("EMBEDDING_BACKEND=int8 ignoré sur GPU, utilisation du modèle fp32")
+        return None
+    try:
+        embeddings = QuantizedEmbeddings(model_name)
+        print(f"Modèle d'embeddings quantifié en int8: {model_name}")
+        return embeddings
+    except Exception as e:
+        print(f"Quantification int8 impossible ({e}), utilisation du modèle fp32")
+        return None
@@ -0,0 +1,134 @@
+"""
+Cache des résultats de recherche vectorielle, dans le processus.
+
+Les étudiants posent souvent les mêmes questions ("horaires BU Orsay",
+"comment emprunter un livre"): chacune revectorisait la question et relançait
+une recherche Chroma. RetrievalCache associe la question normalisée à son
+embedding et aux identifiants (et scores) des k chunks trouvés.
+
+Les entrées sont évincées par ancienneté d'utilisation (LRU) au-delà de
+max_entries et expirent après ttl secondes. La clé contient la version de
+l'index (index_version.json, écrit à chaque synchronisation): après une
+reconstruction, les anciens résultats ne sont plus jamais servis.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from modules.corpus_loader import normalize_text
+from modules.vector_index import IndexVersionWatcher
+
+
+def normalize_query(query):
+    """Forme normalisée d'une question: normalize_text, sans ponctuation."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", normalize_text(query))).strip()
+
+
+class RetrievalCache:
+    """
+    Cache LRU avec expiration: (version de l'index, question normalisée, k) ->
+    (embedding de la question, identifiants des chunks, scores).
+    """
+
+    def __init__(self, db_dir, max_entries=1024, ttl=3600):
+        """
+        Args:
+            db_dir (str): Répertoire de la base vectorielle (version de l'index)
+            max_entries (int): Nombre maximal de questions en cache
+            ttl (float): Durée de vie d'une entrée, en secondes
+        """
+        self.db_dir = db_dir
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._embeddings = OrderedDict()
+        self._lock = threading.Lock()
+        self._watcher = IndexVersionWatcher(db_dir)
+        self._version = None
+
+    def index_version(self):
+        """Version de l'index (index_version.json)."""
+        version = self._watcher.current()
+        if version != self._version:
+            # Index reconstruit: aucun résultat en cache n'est plus valable
+            self._entries.clear()
+            self._version = version
+        return self._version
+
+    def _key(self, query, k):
+        return (self.index_version(), normalize_query(query), k)
+
+    def get(self, query, k):
+        """
+        Résultat en cache pour une question.
+
+        Returns:
+            tuple: (embedding, ids, scores), ou None (absent ou expiré)
+        """
+        with self._lock:
+            key = self._key(query, k)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1:]
+
+    def put(self, query, k, embedding, ids, scores):
+        with self._lock:
+            key = self._key(query, k)
+            self._entries[key] = (time.monotonic() + self.ttl, embedding, list(ids), list(scores))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._remember_embedding(key[1], embedding)
+
+    def _remember_embedding(self, normalized, embedding):
+        self._embeddings[normalized] = embedding
+        self._embeddings.move_to_end(normalized)
+        while len(self._embeddings) > self.max_entries:
+            self._embeddings.popitem(last=False)
+
+    def embed_query(self, embeddings, query):
+        """
+        Embedding d'une question: celui déjà calculé pour la même question
+        normalisée (il ne dépend pas de l'index), sinon embeddings.embed_query.
+        """
+        normalized = normalize_query(query)
+        with self._lock:
+            embedding = self._embeddings.get(normalized)
+            if embedding is not None:
+                self._embeddings.move_to_end(normalized)
+                return embedding
+        embedding = embeddings.embed_query(query)
+        with self._lock:
+            self._remember_embedding(normalized, embedding)
+        return embedding
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._embeddings.clear()
+
+    def stats(self):
+        """Compteurs du cache: succès, échecs, évictions, taux de succès, entrées."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "index_version": self._version,
+            }
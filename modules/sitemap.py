@@ -0,0 +1,123 @@
+"""
+Découverte des pages d'un site à partir de ses sitemaps.
+
+Lit les fichiers sitemap.xml (éventuellement compressés en .gz) et les index de
+sitemaps, avec la date de dernière modification (<lastmod>) de chaque URL.
+Les sitemaps sont trouvés via les lignes "Sitemap:" de robots.txt, avec
+/sitemap.xml en solution de repli.
+"""
+
+import gzip
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from datetime import datetime
+from urllib.parse import urljoin
+
+SitemapEntry = namedtuple("SitemapEntry", ["url", "lastmod"])
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _local_name(tag):
+    """Nom d'une balise sans son espace de noms ({http://www.sitemaps.org/...}loc -> loc)."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_lastmod(value):
+    """
+    Convertit une date W3C (<lastmod>) en datetime local naïf, comparable
+    aux dates du manifeste de crawl.
+
+    Returns:
+        datetime: Date de modification, ou None si absente/illisible
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            date = datetime.strptime(value[:10], "%Y-%m-%d")
+        except ValueError:
+            return None
+    if date.tzinfo is not None:
+        date = date.astimezone().replace(tzinfo=None)
+    return date
+
+
+def parse_sitemap(content):
+    """
+    Analyse un sitemap ou un index de sitemaps.
+
+    Args:
+        content (bytes): Contenu du fichier, compressé en gzip ou non
+
+    Returns:
+        tuple: (kind, entries) où kind vaut 'urlset' ou 'sitemapindex' et
+               entries est une liste de SitemapEntry
+    """
+    if content[:2] == GZIP_MAGIC:
+        content = gzip.decompress(content)
+
+    root = ET.fromstring(content)
+    kind = _local_name(root.tag)
+    entries = []
+    for node in root:
+        if _local_name(node.tag) not in ("url", "sitemap"):
+            continue
+        fields = {_local_name(child.tag): (child.text or "").strip() for child in node}
+        if fields.get("loc"):
+            entries.append(SitemapEntry(fields["loc"], parse_lastmod(fields.get("lastmod"))))
+    return kind, entries
+
+
+def sitemaps_from_robots(robots_txt, base_url):
+    """Extrait les URLs des lignes "Sitemap:" d'un fichier robots.txt."""
+    sitemaps = []
+    for line in robots_txt.splitlines():
+        key, _, value = line.partition(":")
+        if key.strip().lower() == "sitemap" and value.strip():
+            sitemaps.append(urljoin(base_url, value.strip()))
+    return sitemaps
+
+
+def iter_sitemap_urls(sitemap_urls, fetch, max_depth=3):
+    """
+    Parcourt des sitemaps en suivant les index, et produit les URLs de pages.
+
+    Args:
+        sitemap_urls (list): URLs des sitemaps (ou index) de départ
+        fetch (callable): Fonction url -> bytes (None en cas d'échec)
+        max_depth (int): Profondeur maximale d'imbrication des index
+
+    Yields:
+        SitemapEntry: URL d'une page et sa date de dernière modification
+    """
+    seen = set()
+    pending = [(url, 0) for url in sitemap_urls]
+    while pending:
+        sitemap_url, depth = pending.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+
+        content = fetch(sitemap_url)
+        if not content:
+            continue
+        try:
+            kind, entries = parse_sitemap(content)
+        except (ET.ParseError, OSError, EOFError) as e:
+            print(f"Sitemap illisible {sitemap_url}: {e}")
+            continue
+
+        if kind == "sitemapindex":
+            if depth >= max_depth:
+                print(f"Index de sitemaps trop profond ignoré: {sitemap_url}")
+                continue
+            pending.extend((urljoin(sitemap_url, entry.url), depth + 1) for entry in entries)
+        else:
+            for entry in entries:
+                yield SitemapEntry(urljoin(sitemap_url, entry.url), entry.lastmod)
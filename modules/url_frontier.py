@@ -0,0 +1,222 @@
+"""
+Canonicalisation des URLs et structures de crawl à mémoire bornée.
+
+- canonicalize_url: une seule forme par ressource (sans ancre, sans paramètres
+  de suivi, https, sans slash final...), pour ne jamais la télécharger deux fois
+- BloomFilter: pré-filtre probabiliste en mémoire des URLs déjà vues
+- VisitedUrlStore: ensemble exact des URLs vues, sur disque (SQLite), consulté
+  uniquement quand le filtre de Bloom répond "peut-être"
+- DiskFrontier: file FIFO des URLs à crawler, stockée sur disque et lue par lots
+"""
+
+import hashlib
+import math
+import os
+import re
+import sqlite3
+from collections import deque
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Paramètres de requête sans effet sur le contenu (suivi, campagnes, sessions)
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "_ga", "_gl",
+    "xtor", "at_medium", "at_campaign", "ref", "phpsessid", "sid", "jsessionid",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_")
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+_MULTIPLE_SLASHES = re.compile(r"/{2,}")
+
+
+def canonicalize_url(url, force_https=True):
+    """
+    Retourne la forme canonique d'une URL, ou None si ce n'est pas une URL HTTP(S).
+
+    Args:
+        url (str): URL absolue
+        force_https (bool): Ramener les URLs http:// vers https://
+
+    Returns:
+        str: URL canonique
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return None
+
+    host = (parts.hostname or "").lower().rstrip(".")
+    if not host:
+        return None
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    netloc = host
+    if port is not None and str(port) != DEFAULT_PORTS[scheme]:
+        netloc = f"{host}:{port}"
+    if force_https:
+        scheme = "https"
+
+    path = _MULTIPLE_SLASHES.sub("/", parts.path or "/")
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+
+    query_items = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query = urlencode(sorted(query_items))
+
+    # L'ancre (#...) ne change jamais la ressource téléchargée
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+class BloomFilter:
+    """Filtre de Bloom simple (double hachage sur un condensé blake2b)."""
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class VisitedUrlStore:
+    """
+    Ensemble des URLs déjà planifiées: filtre de Bloom en mémoire devant une
+    table SQLite exacte. La mémoire reste bornée quel que soit le nombre d'URLs.
+
+    S'utilise comme un set (add, in, len).
+    """
+
+    def __init__(self, connection, bloom_capacity=1_000_000):
+        self.connection = connection
+        self.connection.execute("CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY)")
+        self.bloom = BloomFilter(capacity=bloom_capacity)
+        self._count = 0
+        for (url,) in self.connection.execute("SELECT url FROM visited"):
+            self.bloom.add(url)
+            self._count += 1
+
+    def __contains__(self, url):
+        if url not in self.bloom:
+            return False
+        # Le filtre de Bloom peut se tromper dans ce sens: vérification exacte
+        row = self.connection.execute("SELECT 1 FROM visited WHERE url = ?", (url,)).fetchone()
+        return row is not None
+
+    def add(self, url):
+        """Ajoute une URL; retourne True si elle n'avait jamais été vue."""
+        if url in self:
+            return False
+        self.connection.execute("INSERT OR IGNORE INTO visited (url) VALUES (?)", (url,))
+        self.bloom.add(url)
+        self._count += 1
+        return True
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        self.connection.execute("DELETE FROM visited")
+        self.bloom = BloomFilter(capacity=self.bloom.capacity, error_rate=self.bloom.error_rate)
+        self._count = 0
+
+
+class DiskFrontier:
+    """
+    File FIFO d'URLs à crawler stockée dans SQLite.
+
+    Les ajouts sont groupés et les lectures se font par lots de batch_size:
+    seuls quelques centaines d'URLs sont en mémoire à un instant donné.
+    Interface compatible avec collections.deque (append, popleft, len).
+    """
+
+    def __init__(self, connection, batch_size=500):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS frontier (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL)"
+        )
+        self._pending = []  # Ajouts pas encore insérés
+        self._head = deque()  # Prochaines URLs lues depuis le disque: (id, url)
+        self._consumed_id = 0  # Dernier id retiré de la file
+        row = self.connection.execute("SELECT COUNT(*) FROM frontier").fetchone()
+        self._count = row[0]
+
+    def append(self, url):
+        self._pending.append((url,))
+        self._count += 1
+        if len(self._pending) >= self.batch_size:
+            self._flush_pending()
+
+    def extend(self, urls):
+        for url in urls:
+            self.append(url)
+
+    def _flush_pending(self):
+        if self._pending:
+            self.connection.executemany("INSERT INTO frontier (url) VALUES (?)", self._pending)
+            self._pending = []
+
+    def popleft(self):
+        if not self._head:
+            self._flush_pending()
+            rows = self.connection.execute(
+                "SELECT id, url FROM frontier WHERE id > ? ORDER BY id LIMIT ?",
+                (self._consumed_id, self.batch_size)
+            ).fetchall()
+            self._head.extend(rows)
+        if not self._head:
+            raise IndexError("pop from an empty frontier")
+        row_id, url = self._head.popleft()
+        self._consumed_id = row_id
+        self._count -= 1
+        return url
+
+    def checkpoint(self):
+        """Écrit les ajouts en attente et purge les URLs déjà retirées de la file."""
+        self._flush_pending()
+        self.connection.execute("DELETE FROM frontier WHERE id <= ?", (self._consumed_id,))
+
+    def clear(self):
+        self._pending = []
+        self._head.clear()
+        self.connection.execute("DELETE FROM frontier")
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+
+def open_crawl_database(path):
+    """Ouvre la base SQLite de l'état du crawl (URLs visitées + frontière)."""
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
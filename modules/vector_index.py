@@ -0,0 +1,264 @@
+"""
+Synchronisation incrémentale de la base vectorielle Chroma avec le corpus.
+
+Chaque chunk a un identifiant déterministe: hash du document (clé du
+document, texte, métadonnées et paramètres du découpage) et position du chunk dans le document
+(start_index). Une synchronisation:
+- ignore les documents inchangés (même hash: leurs chunks sont déjà indexés)
+- découpe et vectorise seulement les documents nouveaux ou modifiés, par lots (upsert)
+- supprime les chunks des documents modifiés ou disparus, ainsi que les
+  chunks d'un index construit avant (identifiants aléatoires)
+
+Avec un magasin de passages parents (modules/parent_child.py), les chunks
+indexés sont les enfants et les passages parents du document sont réécrits
+en même temps que ses chunks (et supprimés avec eux).
+
+Reconstruire deux fois de suite ne fait donc jamais grossir l'index. La
+version de l'index (hash de l'ensemble des documents indexés) est écrite
+dans db_dir/index_version.json, pour invalider les caches qui en dépendent.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+INDEX_VERSION_FILE = "index_version.json"
+
+
+def document_key(document):
+    """Clé stable d'un document: doc_id du corpus, sinon source, URL et bibliothèque."""
+    metadata = document.metadata
+    if metadata.get("doc_id"):
+        return metadata["doc_id"]
+    parts = [str(metadata.get(name, "")) for name in ("source", "url", "library")]
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def document_hash(key, document, signature=""):
+    """Hash d'un document indexé: change si son texte, ses métadonnées ou le découpage changent."""
+    # "sources" dépend de l'ordre de chargement (fusion des doublons): pas pris en compte
+    metadata = {name: value for name, value in document.metadata.items() if name != "sources"}
+    metadata = json.dumps(metadata, sort_keys=True, ensure_ascii=False, default=str)
+    payload = "\n".join((key, signature, metadata, document.page_content))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def chunk_id(doc_hash, start_index):
+    """Identifiant déterministe d'un chunk: hash du document et position du chunk."""
+    return f"{doc_hash}-{start_index}"
+
+
+def parent_id(doc_hash, start_index):
+    """Identifiant déterministe d'un passage parent: hash du document et position du passage."""
+    return f"{doc_hash}-p{start_index}"
+
+
+def splitter_signature(text_splitter):
+    """Paramètres du découpeur: les modifier fait revectoriser tous les documents."""
+    signature = getattr(text_splitter, "signature", None)
+    if signature:
+        return signature
+    parameters = [getattr(text_splitter, name, None) for name in ("_chunk_size", "_chunk_overlap")]
+    return ":".join([type(text_splitter).__name__] + [str(value) for value in parameters if value is not None])
+
+
+def read_index_version(db_dir):
+    """Version de l'index de db_dir (None si l'index n'a jamais été synchronisé)."""
+    try:
+        with open(os.path.join(db_dir, INDEX_VERSION_FILE), "r", encoding="utf-8") as f:
+            return json.load(f).get("version")
+    except (OSError, ValueError):
+        return None
+
+
+class IndexVersionWatcher:
+    """Version courante de l'index de db_dir, relue seulement quand index_version.json change."""
+
+    def __init__(self, db_dir):
+        self.db_dir = db_dir
+        self._mtime = None
+        self._version = None
+
+    def current(self):
+        try:
+            mtime = os.stat(os.path.join(self.db_dir, INDEX_VERSION_FILE)).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self._mtime = mtime
+            self._version = read_index_version(self.db_dir)
+        return self._version
+
+
+def write_index_version(db_dir, version, **info):
+    path = os.path.join(db_dir, INDEX_VERSION_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "updated_at": datetime.now().isoformat(), **info},
+                  f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class IncrementalIndexer:
+    """
+    Met à jour une base Chroma (langchain) pour qu'elle contienne exactement
+    les chunks des documents fournis.
+
+    Usage:
+        indexer = IncrementalIndexer(vectordb, text_splitter, db_dir)
+        stats = indexer.sync(documents)   # documents: itérable (flux accepté)
+    """
+
+    def __init__(self, vectordb, text_splitter, db_dir, batch_size=256, page_size=5000, parent_store=None):
+        """
+        Args:
+            vectordb (Chroma): Base vectorielle à synchroniser
+            text_splitter: Découpeur (split_documents); start_index est ajouté s'il manque
+            db_dir (str): Répertoire de la base (fichier index_version.json)
+            batch_size (int): Nombre de chunks par upsert / suppression
+            page_size (int): Nombre de chunks lus à la fois dans l'index existant
+            parent_store (ParentStore): Magasin des passages parents; text_splitter doit
+                alors fournir split_with_parents (ParentChildSplitter)
+        """
+        self.vectordb = vectordb
+        self.text_splitter = text_splitter
+        self.signature = splitter_signature(text_splitter)
+        # Embeddings quantifiés (vecteurs différents du modèle fp32): les documents sont revectorisés
+        backend = getattr(getattr(vectordb, "embeddings", None), "backend", None)
+        if backend and backend != "fp32":
+            self.signature += f"|{backend}"
+        self.db_dir = db_dir
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self.parent_store = parent_store
+
+    def _indexed_chunks(self):
+        """
+        Chunks déjà indexés.
+
+        Returns:
+            tuple: ({clé du document: (hash, [ids])}, [ids sans clé de document])
+        """
+        documents = {}
+        orphans = []
+        offset = 0
+        while True:
+            page = self.vectordb.get(include=["metadatas"], limit=self.page_size, offset=offset)
+            ids = page.get("ids") or []
+            if not ids:
+                break
+            for id_, metadata in zip(ids, page.get("metadatas") or [{}] * len(ids)):
+                key = (metadata or {}).get("doc_key")
+                if key is None:
+                    orphans.append(id_)
+                    continue
+                entry = documents.setdefault(key, (metadata.get("doc_hash"), []))
+                if entry[0] != metadata.get("doc_hash"):
+                    # Plusieurs versions d'un même document: aucune ne sera considérée à jour
+                    documents[key] = (None, entry[1])
+                documents[key][1].append(id_)
+            offset += len(ids)
+        return documents, orphans
+
+    def _chunks(self, key, doc_hash, document):
+        if self.parent_store is not None:
+            parents, chunks = self.text_splitter.split_with_parents(document)
+            self.parent_store.replace(key, doc_hash, parents)
+        else:
+            chunks = self.text_splitter.split_documents([document])
+        ids = []
+        position = 0
+        for chunk in chunks:
+            start_index = chunk.metadata.get("start_index")
+            if start_index is None or start_index < 0:
+                # Découpeur sans start_index: position du chunk dans le document
+                start_index = document.page_content.find(chunk.page_content, position)
+                start_index = start_index if start_index >= 0 else position
+            position = start_index + 1
+            chunk.metadata.update(doc_key=key, doc_hash=doc_hash, start_index=start_index)
+            if "parent_index" in chunk.metadata:
+                chunk.metadata["parent_id"] = parent_id(doc_hash, chunk.metadata["parent_index"])
+            ids.append(chunk_id(doc_hash, start_index))
+        # Deux chunks identiques au même endroit (cas limite): garder le premier
+        unique = {}
+        for id_, chunk in zip(ids, chunks):
+            unique.setdefault(id_, chunk)
+        return list(unique.keys()), list(unique.values())
+
+    def _upsert(self, ids, chunks):
+        # Chroma.add_documents fait un upsert: rejouer un lot ne crée pas de doublon
+        self.vectordb.add_documents(chunks, ids=ids)
+
+    def _delete(self, ids):
+        for start in range(0, len(ids), self.batch_size):
+            self.vectordb.delete(ids=ids[start:start + self.batch_size])
+
+    def sync(self, documents):
+        """
+        Synchronise l'index avec les documents.
+
+        Returns:
+            dict: Statistiques (documents nouveaux, modifiés, inchangés, supprimés,
+                  chunks ajoutés et supprimés, version de l'index)
+        """
+        indexed, orphans = self._indexed_chunks()
+        # Documents dont les passages parents sont enregistrés (clé: hash)
+        parents = self.parent_store.indexed() if self.parent_store is not None else None
+        stats = {"new": 0, "changed": 0, "unchanged": 0, "removed": 0,
+                 "chunks_added": 0, "chunks_deleted": 0}
+        seen = {}
+        added_ids = set()
+        stale_ids = list(orphans)
+        pending_ids, pending_chunks = [], []
+
+        for document in documents:
+            key = document_key(document)
+            doc_hash = document_hash(key, document, self.signature)
+            if key in seen:
+                # Même clé deux fois dans le corpus: seul le premier document est indexé
+                continue
+            seen[key] = doc_hash
+            previous = indexed.get(key)
+            if previous is not None and previous[0] == doc_hash and (parents is None or parents.get(key) == doc_hash):
+                stats["unchanged"] += 1
+                continue
+            if previous is not None:
+                stale_ids.extend(previous[1])
+                stats["changed"] += 1
+            else:
+                stats["new"] += 1
+
+            ids, chunks = self._chunks(key, doc_hash, document)
+            added_ids.update(ids)
+            pending_ids.extend(ids)
+            pending_chunks.extend(chunks)
+            if len(pending_ids) >= self.batch_size:
+                self._upsert(pending_ids, pending_chunks)
+                stats["chunks_added"] += len(pending_ids)
+                pending_ids, pending_chunks = [], []
+
+        if pending_ids:
+            self._upsert(pending_ids, pending_chunks)
+            stats["chunks_added"] += len(pending_ids)
+
+        for key, (_, ids) in indexed.items():
+            if key not in seen:
+                stale_ids.extend(ids)
+                stats["removed"] += 1
+        stale_ids = [id_ for id_ in stale_ids if id_ not in added_ids]
+        self._delete(stale_ids)
+        if self.parent_store is not None:
+            self.parent_store.retain(seen)
+        stats["chunks_deleted"] = len(stale_ids)
+
+        version = hashlib.sha1(
+            "\n".join(f"{key}:{doc_hash}" for key, doc_hash in sorted(seen.items())).encode("utf-8")
+        ).hexdigest()[:16]
+        write_index_version(self.db_dir, version, documents=len(seen))
+        stats["version"] = version
+
+        print(f"Index synchronisé: {stats['new']} documents nouveaux, {stats['changed']} modifiés, "
+              f"{stats['unchanged']} inchangés, {stats['removed']} supprimés "
+              f"({stats['chunks_added']} chunks ajoutés, {stats['chunks_deleted']} supprimés)")
+        return stats
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Précalcul hors ligne des réponses aux questions les plus fréquentes.
+
+Les questions (une par ligne avec --questions, ou les plus fréquentes d'un
+journal de requêtes avec --log) passent par tout le pipeline RAG: recherche,
+réordonnancement et génération. Les réponses sont enregistrées avec leurs
+sources, le modèle qui les a générées et la version de l'index dans
+<db>/precomputed_answers.sqlite; le chatbot les sert ensuite dès que la
+question normalisée correspond exactement et que le modèle est le même.
+
+Les réponses périmées (index resynchronisé depuis) sont régénérées à chaque
+passage; les réponses à jour sont conservées sauf avec --force. Le cache des
+générations du LLM est désactivé pendant le précalcul: chaque réponse est
+réellement générée.
+
+Usage:
+    python precompute_answers.py --log logs/questions.jsonl --top 50 --model llama --workers 2
+    python precompute_answers.py --questions faq.txt --model llama
+"""
+
+import json
+import time
+import argparse
+import multiprocessing
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from modules.answer_cache import TIME_SENSITIVE_SOURCES
+from modules.precomputed_answers import PrecomputedAnswerStore, deserialize_sources, serialize_sources
+from modules.retrieval_cache import normalize_query
+from modules.vector_index import read_index_version
+
+# Chatbot du processus (un par processus: llama.cpp n'est pas thread-safe)
+_bot = None
+
+
+def read_questions(path):
+    """Questions d'un fichier texte, une par ligne (lignes vides et commentaires ignorés)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def frequent_questions(path, top):
+    """
+    Les top questions les plus fréquentes d'un journal de requêtes.
+
+    Le journal contient une question par ligne, en texte ou en JSON (champ
+    "question"). Les questions sont comptées sous leur forme normalisée; la
+    formulation retenue est la plus fréquente.
+    """
+    counts = Counter()
+    forms = defaultdict(Counter)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            question = line
+            if line.startswith("{"):
+                try:
+                    question = (json.loads(line).get("question") or "").strip()
+                except ValueError:
+                    pass
+            normalized = normalize_query(question)
+            if not normalized:
+                continue
+            counts[normalized] += 1
+            forms[normalized][question] += 1
+    return [forms[normalized].most_common(1)[0][0] for normalized, _ in counts.most_common(top)]
+
+
+def _create_bot(model_name, data_dir, db_dir, use_modules):
+    if use_modules:
+        from rag_chatbot_enhanced_with_modules import EnhancedBibliothequeBot
+        return EnhancedBibliothequeBot(model_name=model_name, data_dir=data_dir, db_dir=db_dir,
+                                       use_modules=True)
+    from rag_chatbot_enhanced import EnhancedBibliothequeBot
+    return EnhancedBibliothequeBot(model_name=model_name, data_dir=data_dir, db_dir=db_dir)
+
+
+def _init_worker(model_name, data_dir, db_dir, use_modules):
+    global _bot
+    _bot = _create_bot(model_name, data_dir, db_dir, use_modules)
+    # Sans le cache persistant des générations: --force doit vraiment régénérer
+    _bot.llm.cache = False
+
+
+def _llm_identity():
+    """Identité du modèle du processus, enregistrée avec chaque réponse."""
+    return _bot.llm_identity
+
+
+def _answer(question):
+    """
+    Réponse du pipeline complet (sans cache): (question, réponse, sources sérialisées).
+    Les réponses en temps réel (horaires) ne sont pas précalculées: (question, None, None).
+    """
+    if getattr(_bot, "use_modules", False) and _bot._is_horaires_question(question):
+        return question, None, None
+    answer, sources = _bot.ask(question, use_cache=False)
+    if not sources:
+        # Réponse d'erreur ou sans appui dans le corpus: régénérée au prochain passage
+        return question, None, None
+    if any(document.metadata.get("source") in TIME_SENSITIVE_SOURCES for document in sources):
+        # Données en temps réel: la réponse ne doit pas être figée
+        return question, None, None
+    return question, answer, serialize_sources(sources)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Précalcul des réponses aux questions fréquentes')
+    parser.add_argument('--questions', '-q', help='Fichier de questions (une par ligne)')
+    parser.add_argument('--log', '-l', help='Journal de requêtes (texte ou JSON lines avec un champ "question")')
+    parser.add_argument('--top', type=int, default=50, help='Nombre de questions retenues du journal')
+    parser.add_argument('--model', '-m', help='Modèle à utiliser (fake, llama)', required=True)
+    parser.add_argument('--data', '-d', help='Répertoire des données', default='data')
+    parser.add_argument('--db', '-db', help='Répertoire de la base vectorielle', default='vectordb')
+    parser.add_argument('--workers', '-w', type=int, default=1, help='Nombre de processus (un modèle chargé par processus)')
+    parser.add_argument('--no-modules', help='Utiliser le chatbot sans modules spécialisés', action='store_true')
+    parser.add_argument('--force', '-f', help='Régénérer aussi les réponses à jour', action='store_true')
+    args = parser.parse_args()
+
+    index_version = read_index_version(args.db)
+    if index_version is None:
+        print(f"ERREUR: aucun index synchronisé dans {args.db} (lancez le chatbot avec --rebuild)")
+        return 1
+
+    questions = []
+    if args.questions:
+        questions.extend(read_questions(args.questions))
+    if args.log:
+        questions.extend(frequent_questions(args.log, args.top))
+
+    # Le modèle chargé détermine les réponses à jour: chatbot(s) créé(s) avant la sélection
+    bot_args = (args.model, args.data, args.db, not args.no_modules)
+    if args.workers <= 1:
+        _init_worker(*bot_args)
+        executor = None
+        model = _llm_identity()
+    else:
+        executor = ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_init_worker, initargs=bot_args)
+        model = executor.submit(_llm_identity).result()
+
+    store = PrecomputedAnswerStore.for_index(args.db)
+    stored = 0
+    try:
+        stale = store.stale_questions(index_version, model)
+        if stale:
+            print(f"{len(stale)} réponses périmées (index modifié) à régénérer")
+        questions.extend(stale)
+
+        # Une seule fois par question normalisée, sans les réponses à jour
+        selected, seen = [], set()
+        for question in questions:
+            normalized = normalize_query(question)
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            if not args.force and store.is_fresh(question, index_version, model):
+                continue
+            selected.append(question)
+
+        if not selected:
+            print(f"Aucune réponse à calculer ({store.count(model)} réponses précalculées pour ce modèle)")
+            return 0
+
+        print(f"Calcul de {len(selected)} réponses (index {index_version}, {args.workers} processus)")
+        start = time.time()
+        if executor is None:
+            results = (_answer(question) for question in selected)
+        else:
+            results = (future.result() for future in as_completed([executor.submit(_answer, question)
+                                                                    for question in selected]))
+        for question, answer, sources in results:
+            if answer is None:
+                print(f"- {question}: réponse en temps réel ou sans sources, non enregistrée")
+                continue
+            # Les réponses sont écrites par ce seul processus
+            store.put(question, answer, deserialize_sources(sources), index_version, model)
+            stored += 1
+            print(f"- {question}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        store.close()
+
+    print(f"{stored} réponses précalculées en {time.time() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,9 +7,19 @@ import torch
 from langchain_core.documents import Document
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings.huggingface import HuggingFaceEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.chains import RetrievalQA
 from langchain_community.retrievers import BM25Retriever
+from modules.corpus_loader import get_corpus_registry
+from modules.vector_index import IncrementalIndexer
+from modules.parent_child import ParentChildSplitter, ParentStore, ParentChildRetriever
+from modules.embedding_cache import CachedEmbeddings, cached_embeddings
+from modules.parallel_embeddings import build_embeddings
+from modules.quantized_embeddings import load_quantized_embeddings
+from modules.retrieval_cache import RetrievalCache
+from modules.answer_cache import SemanticAnswerCache
+from modules.llm_cache import attach_llm_cache
+from modules.precomputed_answers import PrecomputedAnswerStore, llm_identity
+from modules.vector_index import IndexVersionWatcher
 import json
 import re
 from typing import List, Dict, Any, Optional
@@ -19,41 +29,67 @@ class EnhancedBibliothequeBot:
         self.model_name = model_name
         self.data_dir = data_dir
         self.db_dir = db_dir
+        self.build_batch_size = 256  # Chunks vectorisés et insérés à la fois lors de la synchronisation de l'index
+        # Corpus chargé une seule fois, partagé par la construction de l'index et BM25
+        self.corpus = get_corpus_registry(data_dir)
         
         # Initialiser les embeddings pour la recherche vectorielle
         self.embeddings = self._initialize_embeddings()
         
         # Vérifier si la base de données vectorielle existe ou doit être reconstruite
-        if rebuild_vectordb or not os.path.exists(db_dir):
+        vectordb_exists = os.path.exists(db_dir)
+        # Passages parents des chunks indexés, enregistrés à côté de la base vectorielle
+        self.parent_store = ParentStore.for_index(db_dir)
+        if rebuild_vectordb or not vectordb_exists:
             print("Construction de la base de données vectorielle...")
             self.vectordb = self._build_vectordb()
         else:
             print("Chargement de la base de données vectorielle existante...")
             self.vectordb = self._load_vectordb()
         
-        # Initialiser les documents
-        self.documents = self._load_documents()
+        # Cache des recherches (questions fréquentes), invalidé par chaque reconstruction de l'index
+        self.retrieval_cache = RetrievalCache(db_dir, max_entries=1024, ttl=3600)
+        # Cache sémantique des réponses (questions reformulées), invalidé de la même façon
+        self.answer_cache = SemanticAnswerCache.from_env(db_dir)
+        # Réponses précalculées des questions fréquentes, servies tant que l'index n'a pas changé
+        self.precomputed_answers = PrecomputedAnswerStore.for_index(db_dir)
+        self.index_version = IndexVersionWatcher(db_dir)
         
-        # Obtenir le retriever vectoriel (augmenter k pour récupérer plus de documents)
-        self.vector_retriever = self.vectordb.as_retriever(search_kwargs={"k": 10})
+        # Obtenir le retriever vectoriel: les 20 chunks enfants les plus proches,
+        # regroupés en au plus 3 passages parents complets pour le prompt
+        self.vector_retriever = ParentChildRetriever(vectorstore=self.vectordb, parent_store=self.parent_store,
+                                                     k=20, max_parents=3, cache=self.retrieval_cache)
         
         # Initialiser le modèle de langage
         self.llm = self._initialize_llm()
+        # Cache des générations sur disque: un prompt identique n'est jamais régénéré,
+        # même après un redémarrage
+        self.llm_cache = attach_llm_cache(self.llm, os.path.join(self.data_dir, "cache"))
+        # Modèle et paramètres de génération: seules ses propres réponses précalculées sont servies
+        self.llm_identity = llm_identity(self.llm)
         
         # Configurer la chaîne RAG
         self.qa_chain = self._setup_qa_chain()
+        
+        # Les documents lus pour construire l'index ne servent plus: ils seront
+        # rechargés à la demande (self.documents, BM25)
+        self.corpus.release()
     
     def _initialize_embeddings(self):
         """Initialise le modèle d'embeddings."""
         try:
             # Utiliser le même modèle d'embeddings que celui utilisé pour créer la base vectorielle
             # Pour éviter les erreurs de dimension
-            embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
-                model_kwargs={'device': 'cuda' if os.environ.get('USE_CUDA', 'False').lower() == 'true' else 'cpu'}
-            )
+            # Modèle quantifié en int8 si EMBEDDING_BACKEND=int8, sinon fp32
+            embeddings = load_quantized_embeddings("sentence-transformers/all-MiniLM-L6-v2")
+            if embeddings is None:
+                embeddings = HuggingFaceEmbeddings(
+                    model_name="sentence-transformers/all-MiniLM-L6-v2",
+                    model_kwargs={'device': 'cuda' if os.environ.get('USE_CUDA', 'False').lower() == 'true' else 'cpu'}
+                )
             print(f"Modèle d'embeddings initialisé: sentence-transformers/all-MiniLM-L6-v2")
-            return embeddings
+            # Cache sur disque: seuls les textes jamais vus sont vectorisés
+            return cached_embeddings(embeddings, os.path.join(self.data_dir, "cache"))
         except Exception as e:
             print(f"Erreur lors de l'initialisation de HuggingFaceEmbeddings: {e}")
             # Fallback sur des embeddings simples
@@ -90,33 +126,41 @@ class EnhancedBibliothequeBot:
         if not os.path.exists(self.db_dir):
             os.makedirs(self.db_dir)
         
-        # Charger les documents
-        documents = self._load_documents()
+        # Index à deux niveaux: passages parents (contexte du LLM) découpés en petits
+        # chunks enfants vectorisés (tokens du modèle, frontières de phrases)
+        text_splitter = ParentChildSplitter.from_embeddings(self.embeddings)
         
-        if not documents:
-            print("Aucun document trouvé. Veuillez exécuter le scraper d'abord.")
-            return None
-        
-        # Diviser les documents en chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50,
-            separators=["\n\n", "\n", ". ", " ", ""]
+        # Synchronisation incrémentale: seuls les documents nouveaux ou modifiés sont
+        # découpés et vectorisés (par lots, pendant le chargement); les chunks des
+        # documents disparus sont supprimés
+        # Vectorisation répartie sur EMBEDDING_WORKERS processus si demandé
+        index_embeddings = build_embeddings(self.embeddings)
+        vectordb = Chroma(
+            persist_directory=self.db_dir,
+            embedding_function=index_embeddings
         )
-        chunks = text_splitter.split_documents(documents)
+        indexer = IncrementalIndexer(vectordb, text_splitter, self.db_dir, batch_size=self.build_batch_size,
+                                     parent_store=self.parent_store)
+        try:
+            stats = indexer.sync(self.corpus.iter_documents())
+        finally:
+            if index_embeddings is not self.embeddings:
+                index_embeddings.close()
         
-        print(f"Création de {len(chunks)} chunks à partir de {len(documents)} documents...")
+        if isinstance(index_embeddings, CachedEmbeddings):
+            cache_stats = index_embeddings.stats()
+            print(f"Cache d'embeddings: {cache_stats['hits']} chunks relus, {cache_stats['misses']} vectorisés")
         
-        # Créer la base de données vectorielle
-        vectordb = Chroma.from_documents(
-            documents=chunks,
-            embedding=self.embeddings,
-            persist_directory=self.db_dir
-        )
+        if not (stats['new'] or stats['changed'] or stats['unchanged']):
+            print("Aucun document trouvé. Veuillez exécuter le scraper d'abord.")
+            return None
         
         # Persister la base de données
         vectordb.persist()
         
+        if index_embeddings is not self.embeddings:
+            # Les requêtes sont vectorisées par le modèle du processus principal
+            return self._load_vectordb()
         return vectordb
     
     def _load_vectordb(self):
@@ -126,126 +170,14 @@ class EnhancedBibliothequeBot:
             embedding_function=self.embeddings
         )
     
+    @property
+    def documents(self):
+        """Documents du corpus, chargés à la première utilisation (registre partagé)."""
+        return self.corpus.documents
+    
     def _load_documents(self):
-        """Charge tous les documents à partir des fichiers JSON."""
-        documents = []
-        
-        # Vérifier d'abord si nous avons un répertoire de fichiers txt
-        txt_dir = "txt_data"
-        if os.path.exists(txt_dir) and os.path.isdir(txt_dir):
-            print(f"Chargement des fichiers texte depuis {txt_dir}...")
-            txt_files = [f for f in os.listdir(txt_dir) if f.endswith('.txt')]
-            
-            for txt_file in txt_files:
-                try:
-                    with open(os.path.join(txt_dir, txt_file), 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        
-                        # Essayer de déterminer le titre et l'URL à partir des fichiers json correspondants
-                        title = f"Document {txt_file}"
-                        url = ""
-                        
-                        # Le fichier json peut avoir le même nom mais dans un répertoire différent
-                        json_file = txt_file.replace('.txt', '.json')
-                        if os.path.exists(os.path.join(self.data_dir, json_file)):
-                            try:
-                                with open(os.path.join(self.data_dir, json_file), 'r', encoding='utf-8') as jf:
-                                    json_data = json.load(jf)
-                                    title = json_data.get('title', title)
-                                    url = json_data.get('url', "")
-                            except:
-                                pass
-                        
-                        documents.append(Document(
-                            page_content=content,
-                            metadata={
-                                "source": txt_file,
-                                "title": title,
-                                "url": url
-                            }
-                        ))
-                except Exception as e:
-                    print(f"Erreur lors du chargement de {txt_file}: {e}")
-        
-        # Ensuite, ajouter les données depuis les fichiers JSON
-        print(f"Chargement des données JSON depuis {self.data_dir}...")
-        
-        # Charger d'abord le fichier JSON global all_pages.json s'il existe
-        all_pages_path = os.path.join(self.data_dir, 'all_pages.json')
-        if os.path.exists(all_pages_path):
-            try:
-                with open(all_pages_path, 'r', encoding='utf-8') as f:
-                    pages = json.load(f)
-                    for page in pages:
-                        if isinstance(page, dict):
-                            content = page.get('content', '') or page.get('main_content', '')
-                            if content:
-                                documents.append(Document(
-                                    page_content=content,
-                                    metadata={
-                                        "source": "all_pages",
-                                        "title": page.get('title', 'Page sans titre'),
-                                        "url": page.get('url', '')
-                                    }
-                                ))
-                print(f"Chargé {len(pages)} pages depuis all_pages.json")
-            except Exception as e:
-                print(f"Erreur lors du chargement de all_pages.json: {e}")
-        
-        # Charger ensuite le fichier JSON global all_libraries.json s'il existe
-        all_libraries_path = os.path.join(self.data_dir, 'all_libraries.json')
-        if os.path.exists(all_libraries_path):
-            try:
-                with open(all_libraries_path, 'r', encoding='utf-8') as f:
-                    libraries = json.load(f)
-                    for library in libraries:
-                        # Document pour les informations générales
-                        documents.append(Document(
-                            page_content=library.get('description', ''),
-                            metadata={
-                                "source": "all_libraries",
-                                "library": library.get('name', 'Bibliothèque inconnue'),
-                                "url": library.get('url', '')
-                            }
-                        ))
-                        
-                        # Document pour les horaires
-                        if library.get('hours') and library.get('hours') != "Horaires non disponibles":
-                            documents.append(Document(
-                                page_content=f"Horaires de la bibliothèque {library.get('name')}: {library.get('hours')}",
-                                metadata={
-                                    "source": "hours",
-                                    "library": library.get('name', 'Bibliothèque inconnue')
-                                }
-                            ))
-                print(f"Chargé {len(libraries)} bibliothèques depuis all_libraries.json")
-            except Exception as e:
-                print(f"Erreur lors du chargement de all_libraries.json: {e}")
-        
-        # Charger les fichiers JSON individuels qui ne sont pas all_pages.json ou all_libraries.json
-        for filename in os.listdir(self.data_dir):
-            if filename.endswith('.json') and filename not in ['all_pages.json', 'all_libraries.json', 'pages.json', 'passages.json']:
-                try:
-                    with open(os.path.join(self.data_dir, filename), 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        
-                        # Si c'est un dictionnaire avec une clé 'body' ou 'content', c'est une page simple
-                        if isinstance(data, dict):
-                            content = data.get('content', '') or data.get('body', '') or data.get('description', '') or data.get('main_content', '')
-                            if content:
-                                documents.append(Document(
-                                    page_content=content,
-                                    metadata={
-                                        "source": filename,
-                                        "title": data.get('title', 'Document sans titre'),
-                                        "url": data.get('url', '')
-                                    }
-                                ))
-                except Exception as e:
-                    print(f"Erreur lors du chargement de {filename}: {e}")
-        
-        print(f"Chargé un total de {len(documents)} documents")
-        return documents
+        """Charge tous les documents (une seule fois par page, toutes sources confondues)."""
+        return self.corpus.documents
     
     def _initialize_llm(self):
         """Initialise un modèle de langage (LLM)."""
@@ -642,21 +574,76 @@ Réponse (en 3 phrases maximum):"""
             print(f"ERREUR lors de la configuration de la chaîne RAG: {e}")
             return None
     
-    def ask(self, question):
-        """Pose une question au système RAG."""
+    def _precomputed_answer(self, question):
+        """Réponse précalculée (precompute_answers.py) à jour pour la question normalisée, ou None."""
+        try:
+            entry = self.precomputed_answers.get(question, self.llm_identity)
+        except Exception as e:
+            print(f"Erreur avec les réponses précalculées: {e}")
+            return None
+        if entry is None:
+            return None
+        if entry["index_version"] != self.index_version.current():
+            print("Réponse précalculée périmée (index modifié), génération d'une nouvelle réponse")
+            return None
+        return entry
+    
+    def _lookup_answer(self, processed_query):
+        """
+        Cherche une question proche déjà traitée dans le cache sémantique des réponses.
+        
+        Args:
+            processed_query (str): La question prétraitée (_preprocess_query), celle
+                                   que la recherche vectorisera
+        
+        Returns:
+            tuple: (embedding de la question, (réponse, sources, similarité) ou None)
+        """
+        try:
+            # Embedding de la requête prétraitée: en cas d'échec du cache, la recherche
+            # le reprend du cache des recherches, sans second encodage
+            embedding = self.retrieval_cache.embed_query(self.embeddings, processed_query)
+            return embedding, self.answer_cache.lookup(embedding)
+        except Exception as e:
+            print(f"Erreur avec le cache des réponses: {e}")
+            return None, None
+    
+    def ask(self, question, use_cache=True):
+        """
+        Pose une question au système RAG.
+        
+        Args:
+            question (str): La question posée
+            use_cache (bool): Servir les réponses précalculées et le cache des réponses
+        """
         print(f"Question: {question}")
         
         if not self.qa_chain:
             print("ERREUR: La chaîne RAG n'est pas configurée")
             return "Je suis désolé, je rencontre un problème technique. Veuillez réessayer plus tard.", []
         
-        try:
-            # Prétraiter la question pour améliorer les résultats
-            processed_query = self._preprocess_query(question)
+        # Prétraiter la question pour améliorer les résultats
+        processed_query = self._preprocess_query(question)
+        
+        # Réponse précalculée, ou d'une question proche déjà traitée (cache sémantique)
+        question_embedding = None
+        if use_cache:
+            precomputed = self._precomputed_answer(question)
+            if precomputed is not None:
+                print("Réponse précalculée")
+                return precomputed["answer"], precomputed["sources"]
             
+            question_embedding, cached = self._lookup_answer(processed_query)
+            if cached is not None:
+                answer, reranked_docs, score = cached
+                print(f"Réponse trouvée dans le cache (similarité {score:.2f})")
+                return answer, reranked_docs
+        
+        try:
             # Méthode hybride de recherche
             bm25_docs = []
             vector_docs = []
+            generated = False
             
             # Utiliser seulement la recherche vectorielle
             try:
@@ -666,6 +653,7 @@ Réponse (en 3 phrases maximum):"""
                 if isinstance(result, dict):
                     answer = result.get("result", "")
                     vector_docs = result.get("source_documents", [])
+                    generated = True
                     print(f"Recherche vectorielle a trouvé {len(vector_docs)} documents")
                 else:
                     # Fallback si le résultat n'est pas au format attendu
@@ -700,6 +688,9 @@ Réponse (en 3 phrases maximum):"""
                 # Simplifier la réponse
                 answer = f"D'après les informations disponibles: {reranked_docs[0].page_content}"
             
+            if generated and question_embedding is not None:
+                self.answer_cache.store(question, question_embedding, answer, reranked_docs)
+            
             return answer, reranked_docs
             
         except Exception as e:
@@ -714,7 +705,7 @@ if __name__ == "__main__":
     parser.add_argument('--model', '-m', help='Modèle à utiliser (fake, ollama, llama, huggingface)', default='fake')
     parser.add_argument('--data', '-d', help='Répertoire des données', default='data')
     parser.add_argument('--db', '-db', help='Répertoire de la base vectorielle', default='vectordb')
-    parser.add_argument('--rebuild', '-r', help='Reconstruire la base vectorielle', action='store_true')
+    parser.add_argument('--rebuild', '-r', help='Synchroniser la base vectorielle avec le corpus (seuls les documents modifiés sont revectorisés)', action='store_true')
     
     args = parser.parse_args()
     
@@ -1,49 +1,145 @@
-import requests
 from bs4 import BeautifulSoup
 import json
 import os
+import re
+import multiprocessing
 from urllib.parse import urljoin, urlparse
 import time
-import random
+import threading
+from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from modules.crawl_manifest import CrawlManifest
+from modules.html_extraction import extract_page, resolve_backend
+from modules.jsonl_corpus import JsonlCorpusWriter, iter_jsonl, export_json_array, write_json_atomic
+from modules.url_frontier import canonicalize_url, VisitedUrlStore, DiskFrontier, open_crawl_database
+from modules.near_duplicates import NearDuplicateIndex
+from modules.sitemap import iter_sitemap_urls, sitemaps_from_robots
+from modules.html_archive import HtmlArchiveWriter, latest_records, compact_archive
+from modules.politeness import get_default_scheduler
+from modules.crawl_metrics import CrawlMetrics, create_timed_session
+from modules.corpus_store import CorpusStore
 
 class SimpleBibliothequesScraper:
     """
     Version simplifiée du scraper qui combine les fonctionnalités de base
     des deux scrapers existants sans les dépendances problématiques.
     """
+    # En-têtes pour simuler un navigateur
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3',
+        'Referer': 'https://www.google.com/',
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Cache-Control': 'max-age=0'
+    }
+    
     def __init__(self, base_url="https://www.bibliotheques.universite-paris-saclay.fr/", 
-                 output_dir="data", txt_output_dir="txt_data"):
+                 output_dir="data", txt_output_dir="txt_data", force_refresh=False,
+                 parser_backend="auto", near_duplicate_distance=3, archive_html=True, scheduler=None,
+                 legacy_files=True):
         self.base_url = base_url
-        self.session = requests.Session()
+        self.session = create_timed_session()  # Réponses instrumentées (response.timings)
+        self._local = threading.local()  # Une session HTTP par thread de crawl
         self.data = []
         self.output_dir = output_dir
         self.txt_output_dir = txt_output_dir
-        self.visited_urls = set()  # Pour éviter de visiter les mêmes URLs
-        self.all_pages = []  # Pour stocker toutes les pages
+        self.force_https = urlparse(base_url).scheme == 'https'
+        self._in_flight = {}  # URLs en cours de téléchargement
+        self.page_count = 0  # Pages écrites dans le corpus (jamais gardées en mémoire)
+        self.checkpoint_every = 25  # Sauvegarde de l'état du crawl toutes les N pages
+        self.force_refresh = force_refresh  # Ignorer le manifeste et tout re-télécharger
+        self.parser_backend = resolve_backend(parser_backend)  # lxml, selectolax ou html.parser
+        # Rythme des requêtes par hôte (robots.txt, seau à jetons adaptatif), partagé avec HorairesModule
+        # robots.txt lu et interprété pour le User-Agent réellement envoyé
+        self.scheduler = scheduler or get_default_scheduler(user_agent=self.HEADERS['User-Agent'])
         
         # Créer les répertoires de sortie s'ils n'existent pas
         for directory in [self.output_dir, self.txt_output_dir]:
             if not os.path.exists(directory):
                 os.makedirs(directory)
+        
+        # Manifeste des crawls précédents (ETag, Last-Modified, hash du contenu)
+        self.manifest = CrawlManifest(os.path.join(self.output_dir, "crawl_manifest.json"))
+        
+        # Corpus JSONL écrit au fil du crawl et état de reprise
+        self.corpus_path = os.path.join(self.output_dir, "all_pages.jsonl")
+        self.state_path = os.path.join(self.output_dir, "crawl_state.json")
+        self.corpus_writer = None
+        
+        # Corpus SQLite (une ligne par page, doc_id stable) lu par DataProcessor et les chatbots.
+        # Les fichiers JSON/TXT par page ne sont écrits que si legacy_files est vrai
+        self.store = CorpusStore(os.path.join(self.output_dir, "corpus.sqlite"))
+        self._store_rows = []  # Pages en attente d'écriture (par lots, aux points de sauvegarde)
+        self.crawl_id = None  # Identifiant du crawl en cours (pages non revues supprimées à la fin)
+        self.fetch_errors = 0  # Téléchargements échoués du crawl en cours (crawl incomplet)
+        self.page_limit = 0  # Limite max_pages du crawl en cours (0: crawl complet)
+        self.legacy_files = legacy_files
+        
+        # URLs visitées (Bloom + SQLite) et frontière sur disque: mémoire bornée
+        self.state_db = open_crawl_database(os.path.join(self.output_dir, "crawl_state.sqlite"))
+        self.visited_urls = VisitedUrlStore(self.state_db)  # Pour éviter de visiter les mêmes URLs
+        self.frontier = DiskFrontier(self.state_db)  # URLs en attente de crawl
+        self._state_initialized = False
+        
+        # Empreintes SimHash des pages écrites: les pages quasi-identiques (même contenu,
+        # habillage différent, doublons FR/EN) sont enregistrées comme alias. None = désactivé
+        self.near_duplicates = None
+        if near_duplicate_distance is not None:
+            self.near_duplicates = NearDuplicateIndex(
+                os.path.join(self.output_dir, "near_duplicates.json"),
+                max_distance=near_duplicate_distance
+            )
+        
+        # Archive des réponses HTML brutes, pour ré-extraire le corpus sans réseau (--reextract)
+        self.archive_path = os.path.join(self.output_dir, "html_archive.warc.gz")
+        self.archive_html = archive_html
+        self.archive = None
+        
+        # Mesures par page (réseau, parsing, extraction, écriture) et rapport de fin de crawl
+        self.metrics = CrawlMetrics()
+        self.report_path = os.path.join(self.output_dir, "crawl_report.json")
     
-    def get_soup(self, url):
-        """Récupère et parse une page HTML."""
+    def _get_session(self):
+        """Retourne la session HTTP du thread courant (requests.Session n'est pas thread-safe)."""
+        if threading.current_thread() is threading.main_thread():
+            return self.session
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = create_timed_session()
+            self._local.session = session
+        return session
+    
+    def fetch(self, url, revalidate=False):
+        """
+        Télécharge une page, en la revalidant auprès du serveur si demandé.
+        
+        Avec revalidate=True, les validateurs du manifeste (ETag, Last-Modified)
+        sont envoyés: une réponse 304, ou un contenu dont le hash n'a pas changé,
+        est signalée sans que le HTML soit retourné.
+        
+        Returns:
+            dict: 'status' vaut 'ok', 'not_modified', 'unchanged' ou 'error';
+                  'html', 'etag', 'last_modified' et 'content_hash' si 'ok'
+        """
         print(f"Fetching: {url}")
         
-        # Ajouter des en-têtes pour simuler un navigateur
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Referer': 'https://www.google.com/',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Cache-Control': 'max-age=0'
-        }
+        headers = dict(self.HEADERS)
+        if revalidate:
+            headers.update(self.manifest.conditional_headers(url))
         
         try:
-            response = self.session.get(url, headers=headers, timeout=30)
+            if not self.scheduler.can_fetch(url):
+                print(f"Blocked by robots.txt: {url}")
+                return {'status': 'error'}
+            response = self.scheduler.get(url, session=self._get_session(), headers=headers, timeout=30)
+            self.metrics.record(url, **getattr(response, 'timings', {}))
+            if revalidate and response.status_code == 304:
+                print(f"Not modified: {url}")
+                return {'status': 'not_modified'}
             response.raise_for_status()
             
             # Vérifier que nous avons bien du HTML
@@ -51,12 +147,31 @@ class SimpleBibliothequesScraper:
             if 'text/html' not in content_type.lower():
                 print(f"Warning: URL did not return HTML content. Content-Type: {content_type}")
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            return soup
+            content_hash = CrawlManifest.hash_content(response.content)
+            if revalidate and self.manifest.is_unchanged(url, content_hash):
+                print(f"Unchanged: {url}")
+                return {
+                    'status': 'unchanged',
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                }
+            
+            return {
+                'status': 'ok',
+                'html': response.text,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_hash': content_hash
+            }
         except Exception as e:
             print(f"Error fetching {url}: {str(e)}")
-            # En cas d'échec, retourner une soup vide plutôt que de planter
-            return BeautifulSoup("", 'html.parser')
+            return {'status': 'error'}
+    
+    def get_soup(self, url):
+        """Récupère et parse une page HTML."""
+        result = self.fetch(url)
+        # En cas d'échec, retourner une soup vide plutôt que de planter
+        return BeautifulSoup(result.get('html', ""), 'html.parser')
     
     def get_main_content(self, soup):
         """Retourne uniquement le contenu principal de la page."""
@@ -156,9 +271,9 @@ class SimpleBibliothequesScraper:
         links = []
         for a_tag in soup.find_all('a', href=True):
             href = a_tag.get('href')
-            full_url = urljoin(current_url, href)
+            full_url = self.canonicalize(urljoin(current_url, href))
             
-            if self.is_valid_url(full_url):
+            if full_url and self.is_valid_url(full_url):
                 links.append(full_url)
         
         return links
@@ -167,6 +282,8 @@ class SimpleBibliothequesScraper:
         """Scrape des pages à partir d'un fichier contenant des sous-répertoires."""
         base = self.base_url
         outputs = []
+        self._open_corpus()
+        self._init_crawl_state()
         
         with open(subdirectories_file, "r") as f:
             subdirectories = f.readlines()
@@ -180,6 +297,7 @@ class SimpleBibliothequesScraper:
                 
             # Éviter les doubles slashes
             url = f"{base}{'' if base.endswith('/') else '/'}{subdir}"
+            url = self.canonicalize(url) or url
             data = {
                 "meta": {
                     "title": "",
@@ -198,10 +316,12 @@ class SimpleBibliothequesScraper:
                 self.visited_urls.add(url)
                 
                 # Récupérer le contenu
-                soup = self.get_soup(url)
-                if not soup:
+                result = self.fetch(url)
+                if result['status'] != 'ok':
                     print(f"Failed to get content from {url}")
+                    self.fetch_errors += 1
                     continue
+                soup = BeautifulSoup(result['html'], 'html.parser')
                     
                 # Extraire le contenu principal
                 main_text, title = self.get_main_content(soup)
@@ -227,6 +347,14 @@ class SimpleBibliothequesScraper:
                 
                 outputs.append(page_data)
                 
+                # Ajouter la page au corpus (JSONL et SQLite), lu par DataProcessor et les chatbots
+                self._append_to_corpus({
+                    'url': url,
+                    'title': title,
+                    'content': main_text,
+                    'main_content': main_text
+                }, fetched_at=datetime.now().isoformat())
+                
                 # Sauvegarder le JSON pour cette page
                 json_path = f"{self.output_dir}/{i}.json"
                 with open(json_path, 'w', encoding='utf-8') as f:
@@ -236,7 +364,10 @@ class SimpleBibliothequesScraper:
                 
             except Exception as e:
                 print(f"Error processing {url}: {e}")
+                self.fetch_errors += 1
                 
+        self._flush_store()
+        
         # Sauvegarder le fichier JSON global
         with open(f"{self.output_dir}/pages.json", 'w', encoding='utf-8') as f:
             json.dump(outputs, f, ensure_ascii=False, indent=4)
@@ -251,103 +382,736 @@ class SimpleBibliothequesScraper:
             
         return outputs
     
-    def crawl_recursive(self, start_url=None, max_pages=10, delay_min=0.1, delay_max=0.2):
-        """Crawl récursivement le site web à partir d'une URL de départ."""
-        if start_url is None:
-            start_url = self.base_url
-            
-        # Limiter le nombre de pages pour éviter un crawl trop long
-        if max_pages > 0 and len(self.all_pages) >= max_pages:
-            print(f"Reached maximum page limit ({max_pages})")
-            return
+    def _load_saved_page(self, url):
+        """Relit la page sauvegardée lors d'un crawl précédent (None si indisponible)."""
+        page = self.store.get_page(url)
+        if page is not None:
+            return {key: page[key] for key in ('url', 'title', 'content', 'main_content')}
+        entry = self.manifest.get(url)
+        if not entry or not entry.get('json_file'):
+            return None
+        try:
+            with open(entry['json_file'], 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+    
+    def _fetch_page(self, url, extract=True):
+        """
+        Récupère et extrait une page (exécuté dans un worker du pool).
+        
+        Args:
+            url (str): URL à télécharger
+            extract (bool): Extraire la page dans ce thread; sinon le HTML est
+                            retourné dans fetch_info['html'] pour le pool de processus
+        
+        Returns:
+            tuple: (page_data, links, fetch_info) ou (None, [], fetch_info) si la
+                   page n'a pas pu être traitée. fetch_info['status'] vaut
+                   'not_modified' ou 'unchanged' si la copie locale est réutilisée.
+        """
+        # Ne revalider que si une copie locale exploitable existe
+        saved_page = None if self.force_refresh else self._load_saved_page(url)
+        result = self.fetch(url, revalidate=saved_page is not None)
+        self.metrics.record(url, fetch_status=result['status'])
+        
+        if result['status'] in ('not_modified', 'unchanged'):
+            # Page inchangée: ni parsing ni écriture, liens repris du manifeste
+            entry = self.manifest.get(url) or {}
+            result['simhash'] = self._fingerprint(saved_page)
+            return saved_page, entry.get('links', []), result
+        
+        if result['status'] != 'ok':
+            return None, [], result
+        
+        html = result.pop('html')
+        if self.archive is not None:
+            self.archive.write(url, html)
+        
+        if not extract:
+            result['html'] = html
+            return None, [], result
+        
+        _, page_data, links, result['simhash'], timings = _extract_fetched_page(
+            (url, html, self.parser_backend, self._dedup_settings()))
+        self.metrics.record(url, **timings)
+        return page_data, links, result
+    
+    def _dedup_settings(self):
+        """Paramètres de l'empreinte SimHash transmis aux workers (None si désactivée)."""
+        if self.near_duplicates is None:
+            return None
+        return self.near_duplicates.max_distance, self.near_duplicates.min_words
+    
+    def _fingerprint(self, page_data):
+        """Empreinte SimHash du contenu principal (None si détection désactivée ou texte trop court)."""
+        if self.near_duplicates is None or not page_data:
+            return None
+        return self.near_duplicates.fingerprint(page_data.get('main_content', ''))
+    
+    def _find_canonical(self, url, fingerprint):
+        """
+        Cherche une page déjà écrite quasi-identique à url.
+        
+        Returns:
+            str: URL de la page canonique si url est un doublon, sinon None
+                 (l'empreinte de url est alors indexée)
+        """
+        if self.near_duplicates is None or fingerprint is None:
+            return None
+        canonical_url = self.near_duplicates.find(fingerprint)
+        if canonical_url and canonical_url != url:
+            self.near_duplicates.add_alias(url, canonical_url)
+            return canonical_url
+        self.near_duplicates.add(url, fingerprint)
+        return None
+    
+    def _save_page(self, page_data):
+        """
+        Ajoute une page crawlée au corpus (JSONL et SQLite) et, si legacy_files
+        est vrai, l'enregistre aussi en fichiers individuels (JSON + texte).
+        
+        Returns:
+            str: Chemin du fichier JSON écrit (None sans fichiers individuels)
+        """
+        start_url = page_data['url']
+        main_content = page_data['main_content']
+        print(f"Crawled: {page_data['title']} - {start_url}")
+        self._append_to_corpus(page_data, fetched_at=datetime.now().isoformat())
+        if not self.legacy_files:
+            return None
+        
+        # Sauvegarder la page au format JSON
+        url_parts = urlparse(start_url)
+        path = url_parts.path.strip('/')
+        if not path:
+            path = "index"
+        safe_filename = path.replace('/', '_').replace('\\', '_').lower()
+        if not safe_filename:
+            safe_filename = "page_" + str(self.page_count)
             
-        if start_url in self.visited_urls:
+        filename = f"{self.output_dir}/{safe_filename}.json"
+        print(f"Saving to {filename}")
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(page_data, f, ensure_ascii=False, indent=4)
+        
+        # Sauvegarder également le contenu principal en tant que fichier texte
+        if main_content:
+            txt_filename = f"{self.txt_output_dir}/{self.page_count - 1}.txt"
+            with open(txt_filename, 'w', encoding='utf-8') as f:
+                f.write(main_content)
+            print(f"Saved text content to {txt_filename}")
+        
+        return filename
+    
+    def _append_to_corpus(self, page_data, fetched_at=None):
+        """
+        Ajoute une page au corpus JSONL (écrite immédiatement, jamais gardée en mémoire)
+        et la met en attente pour le corpus SQLite.
+        
+        Args:
+            page_data (dict): Page extraite
+            fetched_at (str): Date du téléchargement (None: page inchangée, date conservée)
+        """
+        self.corpus_writer.write(page_data)
+        self._store_rows.append(CorpusStore.page_row(page_data, fetched_at, self.crawl_id))
+        self.page_count += 1
+    
+    def _flush_store(self):
+        """Écrit dans le corpus SQLite les pages en attente, en une transaction."""
+        self.store.upsert_pages(self._store_rows)
+        self._store_rows = []
+    
+    def _crawl_complete(self):
+        """Le crawl en cours a-t-il vu tout le site (sans limite de pages ni téléchargement échoué) ?"""
+        return self.page_limit == 0 and self.fetch_errors == 0
+    
+    def _close_store(self, complete=None):
+        """
+        Fin de crawl: écrit les dernières pages. Après un crawl complet, les pages
+        que ce crawl n'a pas revues sont supprimées; sinon elles sont seulement
+        signalées (stale), une page non revue n'ayant pas forcément disparu.
+        
+        Args:
+            complete (bool): Crawl complet (par défaut: _crawl_complete())
+        """
+        self._flush_store()
+        if complete is None:
+            complete = self._crawl_complete()
+        if complete:
+            removed = self.store.prune(self.crawl_id)
+            if removed:
+                print(f"{removed} pages removed from {self.store.path} (gone or duplicates)")
+        else:
+            stale = self.store.mark_stale(self.crawl_id)
+            print(f"Partial crawl (max_pages={self.page_limit}, {self.fetch_errors} fetch errors): "
+                  f"no page removed, {stale} pages not seen again marked stale")
+        print(f"Corpus store: {self.store.count()} pages in {self.store.path}")
+    
+    def canonicalize(self, url):
+        """Forme canonique d'une URL (sans ancre ni paramètres de suivi, schéma du site)."""
+        return canonicalize_url(url, force_https=self.force_https)
+    
+    def _init_crawl_state(self):
+        """
+        Au premier crawl de cette instance (hors reprise), vide les URLs visitées
+        et la frontière laissées sur disque par un crawl précédent.
+        """
+        if self._state_initialized:
             return
-            
-        # Marquer l'URL comme visitée
-        self.visited_urls.add(start_url)
+        self.visited_urls.clear()
+        self.frontier.clear()
+        self.state_db.commit()
+        if self.near_duplicates is not None:
+            self.near_duplicates.clear()
+        self._state_initialized = True
+    
+    def _save_crawl_state(self):
+        """Point de sauvegarde: frontière, URLs visitées, manifeste et corpus sur disque."""
+        self.corpus_writer.sync()
+        self._flush_store()
+        self.frontier.checkpoint()
+        self.state_db.commit()
+        # Les URLs en cours de téléchargement seront remises dans la frontière à la reprise
+        write_json_atomic(self.state_path, {
+            'base_url': self.base_url,
+            'page_count': self.page_count,
+            'crawl_id': self.crawl_id,
+            'fetch_errors': self.fetch_errors,
+            'page_limit': self.page_limit,
+            'in_flight': list(self._in_flight.values()),
+            'saved_at': datetime.now().isoformat()
+        })
+        self.manifest.save()
+        if self.near_duplicates is not None:
+            self.near_duplicates.save()
+    
+    def _load_crawl_state(self):
+        """
+        Recharge l'état d'un crawl interrompu.
         
-        # Récupérer et parser la page
-        soup = self.get_soup(start_url)
+        Returns:
+            dict: État sauvegardé, ou None s'il n'y en a pas
+        """
+        if not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Impossible de charger l'état du crawl {self.state_path}: {e}")
+            return None
+    
+    def iter_pages(self):
+        """Parcourt les pages du corpus JSONL sans les charger en mémoire."""
+        if os.path.exists(self.corpus_path):
+            yield from iter_jsonl(self.corpus_path)
+    
+    def crawl_concurrent(self, start_url=None, max_pages=10, workers=8, delay_min=0.1, delay_max=0.2,
+                         resume=False, seed_urls=None, follow_links=True, parse_workers=0):
+        """
+        Crawl le site à partir d'une file de travail, avec un pool de workers concurrents.
         
-        if soup:
-            # Extraire le contenu principal
-            main_content, title = self.get_main_content(soup)
-            
-            # Extraire le contenu enrichi
-            rich_content = self.extract_description(soup)
-            
-            # Créer l'objet page
-            page_data = {
-                'url': start_url,
-                'title': title if title != "Sans titre" else (soup.title.text if soup.title else 'No title'),
-                'content': rich_content,
-                'main_content': main_content
-            }
-            
-            print(f"Crawled: {page_data['title']} - {start_url}")
-            self.all_pages.append(page_data)
-            
-            # Sauvegarder la page au format JSON
-            url_parts = urlparse(start_url)
-            path = url_parts.path.strip('/')
-            if not path:
-                path = "index"
-            safe_filename = path.replace('/', '_').replace('\\', '_').lower()
-            if not safe_filename:
-                safe_filename = "page_" + str(len(self.all_pages))
-                
-            filename = f"{self.output_dir}/{safe_filename}.json"
-            print(f"Saving to {filename}")
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(page_data, f, ensure_ascii=False, indent=4)
-            
-            # Sauvegarder également le contenu principal en tant que fichier texte
-            if main_content:
-                txt_filename = f"{self.txt_output_dir}/{len(self.all_pages)-1}.txt"
-                with open(txt_filename, 'w', encoding='utf-8') as f:
-                    f.write(main_content)
-                print(f"Saved text content to {txt_filename}")
-            
-            # Trouver tous les liens sur la page
-            links = self.extract_links(soup, start_url)
-            print(f"Found {len(links)} links on {start_url}")
-            
-            # Crawl récursivement chaque lien (seulement si on n'a pas atteint la limite)
-            if max_pages == 0 or len(self.all_pages) < max_pages:
-                for link in links:
-                    # Arrêter si on a atteint la limite
-                    if max_pages > 0 and len(self.all_pages) >= max_pages:
+        Le thread principal gère la frontière (URLs en attente), visited_urls et le
+        budget max_pages; les workers ne font que télécharger et extraire les pages.
+        Une URL est marquée comme visitée dès sa mise en file pour ne jamais être
+        planifiée deux fois. Chaque page est ajoutée au corpus JSONL dès qu'elle est
+        crawlée, et l'état du crawl est sauvegardé régulièrement pour permettre une reprise.
+        
+        Avec parse_workers > 0, le crawl devient un pipeline à deux étages: les
+        threads ne font que télécharger, et l'extraction (liée au CPU, donc au GIL)
+        est confiée à un pool de processus. Les deux étages sont bornés: au plus
+        2 * parse_workers pages attendent l'extraction, sinon les téléchargements
+        sont suspendus.
+        
+        Args:
+            start_url (str): URL de départ (base_url par défaut)
+            max_pages (int): Nombre maximum de pages (0 = sans limite)
+            workers (int): Nombre de téléchargements simultanés
+            delay_min (float): Conservé pour compatibilité (le rythme est fixé par self.scheduler)
+            delay_max (float): Conservé pour compatibilité (le rythme est fixé par self.scheduler)
+            resume (bool): Reprendre le crawl interrompu à partir de l'état sauvegardé
+            seed_urls (list): URLs à planifier à la place de start_url (ex: issues d'un sitemap)
+            follow_links (bool): Ajouter à la frontière les liens trouvés dans les pages
+            parse_workers (int): Processus d'extraction (0 = extraction dans les threads)
+        """
+        if start_url is None:
+            start_url = self.base_url
+        
+        start_url = self.canonicalize(start_url)
+        if seed_urls is None:
+            seed_urls = [start_url]
+        state = self._load_crawl_state() if resume else None
+        self._open_corpus(state)
+        if max_pages > 0:
+            self.page_limit = max_pages
+        
+        if state:
+            self._state_initialized = True
+            # Les URLs visitées et la frontière sont déjà sur disque (dernier point de sauvegarde)
+            self.frontier.extend(state.get('in_flight', []))
+            print(f"Reprise du crawl: {self.page_count} pages déjà crawlées, "
+                  f"{len(self.frontier)} URLs en attente")
+        else:
+            self._init_crawl_state()
+            for url in seed_urls:
+                if self.visited_urls.add(url):
+                    self.frontier.append(url)
+            if not self.frontier:
+                return
+        
+        if self.archive_html and self.archive is None:
+            self.archive = HtmlArchiveWriter(self.archive_path)
+        
+        workers = max(1, workers)
+        parse_workers = max(0, parse_workers or 0)
+        parse_queue_size = 2 * parse_workers
+        # Téléchargements et extractions en cours (URL de chaque future), sauvegardés en cas d'arrêt
+        self._in_flight = {}
+        in_flight = self._in_flight
+        parsing = {}  # future d'extraction -> fetch_info
+        last_checkpoint = self.page_count
+        
+        def budget_left(in_flight_count):
+            return max_pages == 0 or self.page_count + in_flight_count < max_pages
+        
+        parse_pool = None
+        if parse_workers:
+            # Processus créés avant les threads de téléchargement
+            parse_pool = ProcessPoolExecutor(max_workers=parse_workers, mp_context=_process_context())
+        
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                while self.frontier or in_flight:
+                    # Remplir le pool tant qu'il reste des URLs, du budget et de la place en aval
+                    while (self.frontier and len(in_flight) - len(parsing) < workers
+                           and len(parsing) <= parse_queue_size and budget_left(len(in_flight))):
+                        url = self.frontier.popleft()
+                        future = executor.submit(self._fetch_page, url, parse_pool is None)
+                        in_flight[future] = url
+                    
+                    if not in_flight:
                         break
+                    
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url = in_flight.pop(future)
+                        try:
+                            if future in parsing:
+                                fetch_info = parsing.pop(future)
+                                _, page_data, links, fetch_info['simhash'], timings = future.result()
+                                self.metrics.record(url, **timings)
+                            else:
+                                page_data, links, fetch_info = future.result()
+                        except Exception as e:
+                            print(f"Error processing {url}: {e}")
+                            self.fetch_errors += 1
+                            continue
+                        
+                        if fetch_info.get('status') == 'error':
+                            self.fetch_errors += 1
+                        
+                        if 'html' in fetch_info:
+                            # Étage 2: extraction dans le pool de processus
+                            parse_future = parse_pool.submit(
+                                _extract_fetched_page,
+                                (url, fetch_info.pop('html'), self.parser_backend, self._dedup_settings())
+                            )
+                            in_flight[parse_future] = url
+                            parsing[parse_future] = fetch_info
+                            continue
+                        
+                        if page_data is None:
+                            continue
+                        
+                        if not budget_left(0):
+                            continue
                         
-                    # Pause aléatoire pour éviter de surcharger le serveur
-                    sleep_time = random.uniform(delay_min, delay_max)
-                    time.sleep(sleep_time)
-                    self.crawl_recursive(link, max_pages, delay_min, delay_max)
+                        self._store_crawled_page(url, page_data, links, fetch_info)
+                        
+                        if not follow_links:
+                            continue
+                        
+                        new_links = 0
+                        for link in links:
+                            link = self.canonicalize(link)
+                            if link and self.is_valid_url(link):
+                                self.visited_urls.add(link)
+                                self.frontier.append(link)
+                                new_links += 1
+                        print(f"Found {new_links} new links on {url}")
+                    
+                    if self.page_count - last_checkpoint >= self.checkpoint_every:
+                        self._save_crawl_state()
+                        last_checkpoint = self.page_count
+        except BaseException:
+            # Interruption (Ctrl+C, erreur): sauvegarder pour pouvoir reprendre avec --resume
+            self._save_crawl_state()
+            print(f"Crawl interrompu, état sauvegardé dans {self.state_path}")
+            raise
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown(cancel_futures=True)
+        
+        self._save_crawl_state()
+        
+        if max_pages > 0 and self.page_count >= max_pages:
+            print(f"Reached maximum page limit ({max_pages})")
+    
+    def _store_crawled_page(self, url, page_data, links, fetch_info):
+        """Écrit une page crawlée (ou l'enregistre comme alias) et met à jour le manifeste."""
+        start = time.perf_counter()
+        self._write_crawled_page(url, page_data, links, fetch_info)
+        self.metrics.record(url, write=time.perf_counter() - start)
+    
+    def _write_crawled_page(self, url, page_data, links, fetch_info):
+        canonical_url = self._find_canonical(url, fetch_info.get('simhash'))
+        if canonical_url:
+            # Quasi-doublon: enregistré comme alias, pas écrit dans le corpus
+            print(f"Near-duplicate: {url} -> {canonical_url}")
+            self.manifest.discard_fields(url, 'json_file')
+            self.manifest.update(
+                url,
+                etag=fetch_info.get('etag'),
+                last_modified=fetch_info.get('last_modified'),
+                content_hash=fetch_info.get('content_hash'),
+                links=links,
+                alias_of=canonical_url,
+                fetched_at=datetime.now().isoformat()
+            )
+        elif fetch_info['status'] == 'ok':
+            json_file = self._save_page(page_data)
+            self.manifest.discard_fields(url, 'alias_of', 'json_file')
+            self.manifest.update(
+                url,
+                etag=fetch_info.get('etag'),
+                last_modified=fetch_info.get('last_modified'),
+                content_hash=fetch_info.get('content_hash'),
+                links=links,
+                json_file=json_file,
+                fetched_at=datetime.now().isoformat()
+            )
+        else:
+            # Page inchangée: reprise dans le corpus sans ré-écriture des fichiers
+            self._append_to_corpus(page_data)
+            self.manifest.update(
+                url,
+                etag=fetch_info.get('etag'),
+                last_modified=fetch_info.get('last_modified')
+            )
+    
+    def _fetch_bytes(self, url, required=True):
+        """
+        Télécharge un fichier brut (robots.txt, sitemap), ou None en cas d'échec.
+        
+        Args:
+            required (bool): Un échec rend le crawl incomplet (sitemap illisible)
+        """
+        try:
+            response = self.scheduler.get(url, session=self._get_session(), headers=self.HEADERS, timeout=30)
+            response.raise_for_status()
+            return response.content
+        except Exception as e:
+            print(f"Error fetching {url}: {str(e)}")
+            if required:
+                self.fetch_errors += 1
+            return None
     
-    def scrape_all(self, max_pages=0, subdirectories_file=None):
-        """Scrape toutes les pages du site web."""
+    def discover_sitemaps(self):
+        """Sitemaps déclarés dans robots.txt, ou /sitemap.xml à défaut."""
+        robots = self._fetch_bytes(urljoin(self.base_url, '/robots.txt'), required=False)
+        sitemaps = sitemaps_from_robots(robots.decode('utf-8', errors='replace'), self.base_url) if robots else []
+        return sitemaps or [urljoin(self.base_url, '/sitemap.xml')]
+    
+    def _is_up_to_date(self, url, lastmod):
+        """Vérifie si la page a été vérifiée depuis sa dernière modification annoncée (<lastmod>)."""
+        if self.force_refresh or lastmod is None:
+            return False
+        entry = self.manifest.get(url)
+        if not entry or not entry.get('checked_at'):
+            return False
+        try:
+            return datetime.fromisoformat(entry['checked_at']) >= lastmod
+        except ValueError:
+            return False
+    
+    def scrape_sitemap(self, sitemap_url=None, max_pages=0, workers=8, resume=False, parse_workers=0):
+        """
+        Découverte par sitemap: seules les pages nouvelles ou modifiées depuis le
+        dernier crawl (d'après <lastmod>) sont téléchargées, en parallèle et sans
+        suivre les liens. Les pages à jour sont reprises telles quelles dans le corpus.
+        
+        Args:
+            sitemap_url (str): Sitemap ou index de sitemaps (découvert via robots.txt si None)
+            max_pages (int): Nombre maximum de pages (0 = sans limite)
+            workers (int): Nombre de téléchargements simultanés
+            resume (bool): Reprendre un crawl interrompu
+            parse_workers (int): Processus d'extraction (0 = extraction dans les threads)
+        """
+        seed_urls = []
+        state = self._load_crawl_state() if resume else None
+        if state is None:
+            sitemap_urls = [sitemap_url] if sitemap_url else self.discover_sitemaps()
+            print(f"Reading sitemaps: {', '.join(sitemap_urls)}")
+            self._open_corpus()
+            self._init_crawl_state()
+            
+            listed = reused = 0
+            for entry in iter_sitemap_urls(sitemap_urls, self._fetch_bytes):
+                url = self.canonicalize(entry.url)
+                if not url or not self.is_valid_url(url):
+                    continue
+                listed += 1
+                if self._is_up_to_date(url, entry.lastmod):
+                    if (self.manifest.get(url) or {}).get('alias_of'):
+                        self.visited_urls.add(url)
+                        continue
+                    page_data = self._load_saved_page(url)
+                    if page_data is not None and (max_pages == 0 or self.page_count < max_pages):
+                        self.visited_urls.add(url)
+                        if not self._find_canonical(url, self._fingerprint(page_data)):
+                            self._append_to_corpus(page_data)
+                            reused += 1
+                        continue
+                seed_urls.append(url)
+            print(f"Sitemap: {listed} URLs, {reused} up to date, {len(seed_urls)} new or modified")
+        
+        self.crawl_concurrent(max_pages=max_pages, workers=workers, resume=resume,
+                              seed_urls=seed_urls, follow_links=False, parse_workers=parse_workers)
+    
+    def _open_corpus(self, state=None):
+        """
+        Ouvre le corpus JSONL: en reprise, il est ramené au dernier point de
+        sauvegarde (les pages écrites après seront re-crawlées); sinon il est recréé.
+        Le corpus SQLite est mis à jour en place: il garde les pages du crawl
+        précédent jusqu'à la fin de celui-ci.
+        """
+        if self.corpus_writer is None:
+            self.crawl_id = (state or {}).get('crawl_id') or datetime.now().isoformat()
+            self.fetch_errors = (state or {}).get('fetch_errors', 0)
+            self.page_limit = (state or {}).get('page_limit', 0)
+            self._store_rows = []
+            self.corpus_writer = JsonlCorpusWriter(
+                self.corpus_path,
+                resume=state is not None,
+                keep_records=state.get('page_count') if state else None
+            )
+            self.page_count = self.corpus_writer.count
+    
+    def crawl_recursive(self, start_url=None, max_pages=10, delay_min=0.1, delay_max=0.2):
+        """
+        Crawl le site web à partir d'une URL de départ.
+        
+        Conservé pour compatibilité: délègue à crawl_concurrent avec un seul worker,
+        ce qui évite toute récursion (et donc la limite de récursion de Python).
+        """
+        self.crawl_concurrent(start_url, max_pages=max_pages, workers=1,
+                              delay_min=delay_min, delay_max=delay_max)
+    
+    def scrape_all(self, max_pages=0, subdirectories_file=None, workers=8, resume=False, sitemap=None,
+                   parse_workers=None):
+        """
+        Scrape toutes les pages du site web.
+        
+        Les pages sont écrites au fil de l'eau dans all_pages.jsonl; all_pages.json
+        est régénéré en flux à la fin pour les lecteurs existants.
+        
+        Args:
+            max_pages (int): Nombre maximum de pages (0 = sans limite)
+            subdirectories_file (str): Fichier de sous-répertoires à scraper en plus
+            workers (int): Nombre de téléchargements simultanés
+            resume (bool): Reprendre un crawl interrompu
+            sitemap (str): URL d'un sitemap, ou 'auto' pour le découvrir via robots.txt;
+                           remplace le suivi des liens par la découverte par sitemap
+            parse_workers (int): Processus d'extraction (None = nombre de CPU,
+                                 0 = extraction dans les threads de téléchargement)
+            
+        Returns:
+            int: Nombre total de pages crawlées
+        """
         print(f"Starting comprehensive scraping of {self.base_url}...")
+        if parse_workers is None:
+            parse_workers = os.cpu_count() or 1
         
-        # Méthode 1: Si un fichier de sous-répertoires est fourni
+        # Méthode 1: Si un fichier de sous-répertoires est fourni (déjà fait si reprise)
         pages_data = []
-        if subdirectories_file and os.path.exists(subdirectories_file):
+        resuming = resume and os.path.exists(self.state_path)
+        if subdirectories_file and os.path.exists(subdirectories_file) and not resuming:
             print(f"Scraping from subdirectories file: {subdirectories_file}")
             pages_data = self.scrape_from_subdirectories_file(subdirectories_file)
         
-        # Méthode 2: Crawler récursivement le site (limité au nombre de pages spécifié si > 0)
-        if max_pages > 0:
-            print(f"\nStarting recursive crawl of website pages (max {max_pages} pages)...")
+        # Méthode 2: Crawler le site (limité au nombre de pages spécifié si > 0)
+        if sitemap:
+            print(f"\nStarting sitemap-driven scraping with {workers} workers...")
+            self.scrape_sitemap(None if sitemap == 'auto' else sitemap, max_pages=max_pages,
+                                workers=workers, resume=resume, parse_workers=parse_workers)
         else:
-            print("\nStarting recursive crawl of website pages (no limit)...")
-        self.crawl_recursive(max_pages=max_pages, delay_min=0.1, delay_max=0.2)
+            if max_pages > 0:
+                print(f"\nStarting crawl of website pages with {workers} workers (max {max_pages} pages)...")
+            else:
+                print(f"\nStarting crawl of website pages with {workers} workers (no limit)...")
+            self.crawl_concurrent(max_pages=max_pages, workers=workers, delay_min=0.1, delay_max=0.2,
+                                  resume=resume, parse_workers=parse_workers)
+        self.corpus_writer.close()
+        self._close_store()
+        self._close_archive()
+        
+        # Sauvegarde globale de toutes les pages (format historique)
+        export_json_array(self.corpus_path, f"{self.output_dir}/all_pages.json")
+        
+        self._save_report()
+        
+        # Crawl terminé: l'état de reprise n'est plus nécessaire
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        
+        if self.near_duplicates is not None and self.near_duplicates.aliases:
+            print(f"{len(self.near_duplicates.aliases)} near-duplicate pages recorded as aliases "
+                  f"in {self.near_duplicates.path}")
+        
+        print(f"Scraping completed: {self.page_count} total pages.")
+        return self.page_count
+
+    def _save_report(self):
+        """Écrit le rapport de performances du crawl (crawl_report.json) et en affiche le résumé."""
+        report = self.metrics.save_report(self.report_path)
+        stages = report['time_by_stage']
+        print(f"Crawl report saved to {self.report_path}: {report['pages']} pages, "
+              f"network {stages['network']:.1f}s vs processing {stages['processing']:.1f}s "
+              f"({stages['bound_by']}-bound)")
+        for metric in ('ttfb', 'download', 'parse', 'extract', 'write'):
+            values = report['metrics'].get(metric)
+            if values:
+                print(f"  {metric:<9} p50={values['p50'] * 1000:.1f}ms p95={values['p95'] * 1000:.1f}ms "
+                      f"max={values['max'] * 1000:.1f}ms")
+    
+    def _close_archive(self):
+        """Ferme l'archive HTML et n'y garde que la dernière version de chaque page."""
+        if self.archive is None:
+            return
+        self.archive.close()
+        self.archive = None
+        before, after = compact_archive(self.archive_path)
+        if before != after:
+            print(f"HTML archive compacted: {before} -> {after} records")
+    
+    def reextract(self, workers=None, batch_size=256):
+        """
+        Reconstruit data/ et txt_data/ à partir de l'archive HTML, sans accès réseau.
         
-        # Sauvegarde globale de toutes les pages
-        with open(f"{self.output_dir}/all_pages.json", 'w', encoding='utf-8') as f:
-            json.dump(self.all_pages, f, ensure_ascii=False, indent=4)
+        L'extraction est répartie sur un pool de processus; la détection des
+        quasi-doublons et l'écriture des fichiers restent dans le processus principal.
         
-        print(f"Scraping completed: {len(self.all_pages)} total pages.")
-        return self.all_pages
+        Args:
+            workers (int): Nombre de processus (nombre de CPU par défaut)
+            batch_size (int): Nombre de pages envoyées au pool à la fois
+            
+        Returns:
+            int: Nombre de pages écrites
+        """
+        if not os.path.exists(self.archive_path):
+            print(f"No HTML archive found at {self.archive_path}, a crawl is required first")
+            return 0
+        
+        print(f"Re-extracting pages from {self.archive_path} with the {self.parser_backend} parser...")
+        start = time.time()
+        
+        # Corpus, index des doublons et fichiers texte repartent de zéro
+        self._open_corpus()
+        self._init_crawl_state()
+        for filename in os.listdir(self.txt_output_dir):
+            if re.fullmatch(r"\d+\.txt", filename):
+                os.remove(os.path.join(self.txt_output_dir, filename))
+        
+        # Seules les URLs connues du manifeste (sinon toute l'archive) sont reconstruites
+        urls = set(self.manifest.entries) or None
+        dedup_settings = self._dedup_settings()
+        extracted = 0
+        
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_process_context()) as executor:
+            batch = []
+            records = latest_records(self.archive_path, urls)
+            while True:
+                record = next(records, None)
+                if record is not None:
+                    batch.append((record[0], record[1], self.parser_backend, dedup_settings))
+                if batch and (record is None or len(batch) >= batch_size):
+                    for url, page_data, links, fingerprint, timings in executor.map(_extract_fetched_page, batch, chunksize=16):
+                        write_start = time.perf_counter()
+                        self._store_reextracted(url, page_data, links, fingerprint)
+                        self.metrics.record(url, write=time.perf_counter() - write_start, **timings)
+                        extracted += 1
+                    batch = []
+                if record is None:
+                    break
+        
+        self.corpus_writer.close()
+        # Pages du manifeste absentes de l'archive: conservées dans le corpus SQLite
+        self._close_store(complete=urls is None or extracted >= len(urls))
+        self.manifest.save()
+        if self.near_duplicates is not None:
+            self.near_duplicates.save()
+        export_json_array(self.corpus_path, f"{self.output_dir}/all_pages.json")
+        self._save_report()
+        
+        print(f"Re-extraction completed: {self.page_count} pages in {time.time() - start:.1f}s")
+        return self.page_count
+    
+    def _store_reextracted(self, url, page_data, links, fingerprint):
+        """Écrit une page ré-extraite (ou l'enregistre comme alias) et met à jour le manifeste."""
+        canonical_url = self._find_canonical(url, fingerprint)
+        if canonical_url:
+            self.manifest.discard_fields(url, 'json_file')
+            self.manifest.update(url, links=links, alias_of=canonical_url)
+            return
+        json_file = self._save_page(page_data)
+        self.manifest.discard_fields(url, 'alias_of', 'json_file')
+        self.manifest.update(url, links=links, json_file=json_file)
+
+
+def _process_context():
+    """
+    Contexte multiprocessing des pools d'extraction: forkserver si disponible,
+    pour ne pas forker un processus qui a déjà des threads (sessions, SQLite).
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _extract_fetched_page(args):
+    """
+    Extraction d'une page téléchargée ou archivée: titre, contenus, liens résolus
+    et empreinte SimHash. Fonction de module pour pouvoir être exécutée dans un
+    processus du pool d'extraction (crawl avec parse_workers, --reextract).
+    
+    Args:
+        args (tuple): (url, html, parser_backend, dedup_settings)
+    
+    Returns:
+        tuple: (url, page_data, links, fingerprint, timings), timings contenant
+               les durées 'parse', 'extract' et 'fingerprint' en secondes
+    """
+    url, html, parser_backend, dedup_settings = args
+    timings = {}
+    extracted = extract_page(html, parser_backend, timings)
+    page_data = {
+        'url': url,
+        'title': extracted['title'],
+        'content': extracted['content'],
+        'main_content': extracted['main_content']
+    }
+    # Les liens sont résolus ici mais filtrés par le thread principal,
+    # seul à accéder à visited_urls
+    links = [urljoin(url, href) for href in extracted['links']]
+    fingerprint = None
+    if dedup_settings is not None:
+        start = time.perf_counter()
+        max_distance, min_words = dedup_settings
+        fingerprint = NearDuplicateIndex(max_distance=max_distance, min_words=min_words).fingerprint(
+            page_data['main_content'])
+        timings['fingerprint'] = time.perf_counter() - start
+    return url, page_data, links, fingerprint, timings
 
 def test_page_extraction(url, output_dir="data"):
     """Test d'extraction sur une seule page."""
@@ -393,6 +1157,17 @@ if __name__ == "__main__":
     parser.add_argument('--output', '-o', help='Répertoire de sortie', type=str, default='data')
     parser.add_argument('--txt_output', '-to', help='Répertoire de sortie pour les fichiers texte', type=str, default='txt_data')
     parser.add_argument('--max_pages', '-m', help='Nombre maximum de pages à crawler (0 = sans limite)', type=int, default=0)
+    parser.add_argument('--workers', '-w', help='Nombre de téléchargements simultanés', type=int, default=8)
+    parser.add_argument('--parse-workers', help='Processus d\'extraction (défaut: nombre de CPU, 0 = dans les threads)', type=int, default=None)
+    parser.add_argument('--parser', '-p', help='Parseur HTML (auto, lxml, selectolax, html.parser)', type=str, default='auto')
+    parser.add_argument('--resume', help='Reprendre un crawl interrompu', action='store_true')
+    parser.add_argument('--force', '-f', help='Ignorer le manifeste de crawl et tout re-télécharger', action='store_true')
+    parser.add_argument('--near-dup-distance', help='Distance de Hamming maximale (SimHash) entre quasi-doublons', type=int, default=3)
+    parser.add_argument('--sitemap', help='Découverte par sitemap (URL du sitemap, ou robots.txt si omise)', nargs='?', const='auto', default=None)
+    parser.add_argument('--reextract', help='Reconstruire data/ et txt_data/ depuis l\'archive HTML, sans réseau', action='store_true')
+    parser.add_argument('--no-archive', help='Ne pas archiver le HTML brut des pages', action='store_true')
+    parser.add_argument('--keep-duplicates', help='Désactiver la détection des pages quasi-identiques', action='store_true')
+    parser.add_argument('--no-legacy-files', help='N\'écrire que le corpus (SQLite + JSONL), sans fichiers JSON/TXT par page', action='store_true')
     
     args = parser.parse_args()
     
@@ -404,10 +1179,23 @@ if __name__ == "__main__":
     # Test d'extraction sur une seule page
     if args.test:
         test_page_extraction(args.test, args.output)
+    elif args.reextract:
+        scraper = SimpleBibliothequesScraper(output_dir=args.output, txt_output_dir=args.txt_output,
+                                             parser_backend=args.parser,
+                                             near_duplicate_distance=None if args.keep_duplicates else args.near_dup_distance,
+                                             legacy_files=not args.no_legacy_files)
+        page_count = scraper.reextract(workers=args.parse_workers)
+        print(f"Data rebuilt in '{args.output}' and '{args.txt_output}' directories.")
     else:
         # Exécution du scraping complet
-        scraper = SimpleBibliothequesScraper(output_dir=args.output, txt_output_dir=args.txt_output)
-        all_pages = scraper.scrape_all(max_pages=args.max_pages, subdirectories_file=args.subdirs)
+        scraper = SimpleBibliothequesScraper(output_dir=args.output, txt_output_dir=args.txt_output,
+                                             force_refresh=args.force, parser_backend=args.parser,
+                                             near_duplicate_distance=None if args.keep_duplicates else args.near_dup_distance,
+                                             archive_html=not args.no_archive,
+                                             legacy_files=not args.no_legacy_files)
+        page_count = scraper.scrape_all(max_pages=args.max_pages, subdirectories_file=args.subdirs,
+                                        workers=args.workers, resume=args.resume, sitemap=args.sitemap,
+                                        parse_workers=args.parse_workers)
             
-        print(f"Scraping completed: {len(all_pages)} total pages.")
+        print(f"Scraping completed: {page_count} total pages.")
         print(f"Data saved to '{args.output}' and '{args.txt_output}' directories.")
\ No newline at end of file
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark du découpage des documents avant vectorisation.
+Compare l'ancien découpage en caractères (RecursiveCharacterTextSplitter,
+500 caractères, recouvrement 50) au TokenAwareChunker, sur le corpus du chatbot:
+- débit (chunks/s et documents/s)
+- longueur des chunks en tokens du modèle d'embeddings
+- chunks tronqués par le modèle (plus de max_seq_length tokens) et tokens perdus
+- capacité inutilisée: tokens libres par chunk sous la limite du modèle
+
+Usage:
+    python tests/benchmark_chunking.py --data data --txt txt_data --repeat 3
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from transformers import AutoTokenizer
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from modules.chunking import TokenAwareChunker, DEFAULT_MODEL
+from modules.corpus_loader import load_documents
+
+
+def measure(name, splitter, documents, tokenizer, max_tokens, repeat):
+    """Découpe le corpus repeat fois et affiche le débit et l'utilisation des tokens."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        chunks = splitter.split_documents(documents)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    lengths = [len(ids) for ids in tokenizer([chunk.page_content for chunk in chunks],
+                                             add_special_tokens=False)["input_ids"]]
+    truncated = [length - max_tokens for length in lengths if length > max_tokens]
+    unused = [max_tokens - length for length in lengths if length <= max_tokens]
+
+    print(f"{name}")
+    print(f"  {len(chunks)} chunks en {elapsed * 1000:.1f} ms: {len(chunks) / elapsed:.0f} chunks/s, "
+          f"{len(documents) / elapsed:.0f} documents/s")
+    print(f"  tokens par chunk: moyenne {sum(lengths) / len(lengths):.1f}, max {max(lengths)}")
+    print(f"  chunks tronqués: {len(truncated)} ({sum(truncated)} tokens perdus)")
+    print(f"  capacité inutilisée: {sum(unused) / max(1, len(unused)):.1f} tokens par chunk "
+          f"({sum(unused) / (max_tokens * len(lengths)):.0%} de la capacité totale)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark du découpage des documents')
+    parser.add_argument('--data', default='data', help='Répertoire des données')
+    parser.add_argument('--txt', default='txt_data', help='Répertoire des fichiers texte')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='Modèle dont le tokenizer mesure les chunks')
+    parser.add_argument('--max-seq-length', type=int, default=256, help='Longueur maximale du modèle (tokens)')
+    parser.add_argument('--repeat', type=int, default=3, help='Nombre de découpages mesurés')
+    args = parser.parse_args()
+
+    documents = load_documents(args.data, args.txt)
+    if not documents:
+        print("Aucun document à découper")
+        return
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    max_tokens = args.max_seq_length - 2  # [CLS] et [SEP]
+    print(f"\n{len(documents)} documents, tokenizer {args.model}, {max_tokens} tokens utiles par chunk\n")
+
+    measure("RecursiveCharacterTextSplitter (500 caractères, recouvrement 50)",
+            RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50,
+                                           separators=["\n\n", "\n", ". ", " ", ""]),
+            documents, tokenizer, max_tokens, args.repeat)
+    measure(f"TokenAwareChunker ({max_tokens} tokens, recouvrement 32)",
+            TokenAwareChunker(tokenizer, max_tokens=max_tokens),
+            documents, tokenizer, max_tokens, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de la vectorisation des chunks de l'index selon le nombre de processus.
+Vectorise les chunks enfants du corpus (découpage de l'index) avec:
+- un seul processus (SentenceTransformer.encode, comme HuggingFaceEmbeddings)
+- MultiProcessEmbeddings pour chaque nombre de processus demandé
+et affiche le débit (chunks/s) et l'accélération par rapport à un seul processus.
+
+Usage:
+    python tests/benchmark_embeddings.py --workers 1,2,4 --batch-size 32 --limit 2000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+from sentence_transformers import SentenceTransformer
+from modules.chunking import DEFAULT_MODEL
+from modules.corpus_loader import load_documents
+from modules.parallel_embeddings import MultiProcessEmbeddings
+from modules.parent_child import ParentChildSplitter
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='Benchmark de la vectorisation multi-processus')
+    parser.add_argument('--data', default='data', help='Répertoire des données')
+    parser.add_argument('--txt', default='txt_data', help='Répertoire des fichiers texte')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='Modèle sentence-transformers')
+    parser.add_argument('--workers', default=f"1,2,{cores}", help='Nombres de processus testés (séparés par des virgules)')
+    parser.add_argument('--batch-size', type=int, default=32, help='Taille des lots encodés')
+    parser.add_argument('--limit', type=int, default=0, help='Nombre maximal de chunks (0: tous)')
+    args = parser.parse_args()
+
+    documents = load_documents(args.data, args.txt)
+    texts = [chunk.page_content.replace("\n", " ")
+             for chunk in ParentChildSplitter.from_embeddings(None).split_documents(documents)]
+    if args.limit:
+        texts = texts[:args.limit]
+    if not texts:
+        print("Aucun chunk à vectoriser")
+        return
+    print(f"\n{len(texts)} chunks, {cores} cœurs, lots de {args.batch_size}\n")
+
+    # Référence: un seul processus, tous les threads torch
+    model = SentenceTransformer(args.model, device="cpu")
+    model.encode(texts[:args.batch_size], batch_size=args.batch_size)
+    start = time.perf_counter()
+    model.encode(texts, batch_size=args.batch_size, show_progress_bar=False)
+    baseline = len(texts) / (time.perf_counter() - start)
+    print(f"{'processus':>10} {'threads':>8} {'chunks/s':>10} {'accélération':>13}")
+    print(f"{'1 (seul)':>10} {torch.get_num_threads():>8} {baseline:>10.1f} {1.0:>12.2f}x")
+
+    for workers in [int(value) for value in args.workers.split(",") if value.strip()]:
+        embeddings = MultiProcessEmbeddings(args.model, workers=workers, batch_size=args.batch_size)
+        try:
+            # Démarrage du pool et chargement des modèles hors mesure
+            embeddings.embed_documents(texts[:workers * args.batch_size])
+            start = time.perf_counter()
+            embeddings.embed_documents(texts)
+            rate = len(texts) / (time.perf_counter() - start)
+        finally:
+            embeddings.close()
+        print(f"{workers:>10} {embeddings.threads_per_worker:>8} {rate:>10.1f} {rate / baseline:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
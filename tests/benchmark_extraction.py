@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark de l'extraction HTML du scraper.
+Mesure le nombre de pages/seconde de chaque parseur disponible sur des pages
+HTML sauvegardées, et le compare à l'ancienne extraction (get_main_content
+puis extract_description avec BeautifulSoup/html.parser).
+
+Usage:
+    python tests/benchmark_extraction.py --html-dir pages_html/ --repeat 5
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bs4 import BeautifulSoup
+from modules.html_extraction import extract_page, available_backends
+from simple_combined_scraper import SimpleBibliothequesScraper
+
+
+def load_pages(html_dir):
+    """Charge les fichiers .html d'un répertoire."""
+    pages = []
+    for filename in sorted(os.listdir(html_dir)):
+        if filename.endswith(('.html', '.htm')):
+            with open(os.path.join(html_dir, filename), 'r', encoding='utf-8', errors='replace') as f:
+                pages.append(f.read())
+    return pages
+
+
+def legacy_extraction(scraper, html):
+    """Ancienne extraction: deux parcours dont le second sur l'arbre déjà modifié."""
+    soup = BeautifulSoup(html, 'html.parser')
+    main_content, title = scraper.get_main_content(soup)
+    content = scraper.extract_description(soup)
+    links = [a.get('href') for a in soup.find_all('a', href=True)]
+    return title, content, main_content, links
+
+
+def run(name, func, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            func(html)
+    elapsed = time.perf_counter() - start
+    total = len(pages) * repeat
+    print(f"{name:<15} {total / elapsed:10.1f} pages/s  ({elapsed:.2f}s pour {total} pages)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'extraction HTML")
+    parser.add_argument('--html-dir', required=True, help='Répertoire de pages HTML sauvegardées')
+    parser.add_argument('--repeat', type=int, default=3, help='Nombre de passes sur le corpus')
+    args = parser.parse_args()
+
+    pages = load_pages(args.html_dir)
+    if not pages:
+        print(f"Aucune page HTML trouvée dans {args.html_dir}")
+        return
+
+    print(f"{len(pages)} pages, {args.repeat} passes\n")
+    scraper = SimpleBibliothequesScraper.__new__(SimpleBibliothequesScraper)
+    run("legacy", lambda html: legacy_extraction(scraper, html), pages, args.repeat)
+    for backend in available_backends():
+        run(backend, lambda html, b=backend: extract_page(html, b), pages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark du pipeline téléchargement/extraction du scraper.
+Rejoue des pages HTML stockées (archive data/html_archive.warc.gz ou répertoire
+de fichiers .html) à travers les deux étages du crawl:
+- threads de "téléchargement" (latence réseau simulée par --latency)
+- extraction dans les threads (parse_workers=0) ou dans un pool de processus
+
+Le débit avec un pool de processus doit croître avec le nombre de cœurs,
+alors que l'extraction dans les threads reste limitée par le GIL.
+
+Usage:
+    python tests/benchmark_pipeline.py --archive data/html_archive.warc.gz
+    python tests/benchmark_pipeline.py --html-dir pages_html/ --fetch-workers 16 --latency 0.05
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.html_archive import latest_records
+from modules.html_extraction import resolve_backend
+from simple_combined_scraper import _extract_fetched_page, _process_context
+
+
+def load_pages(args):
+    """Charge les pages à rejouer: [(url, html)]."""
+    if args.archive:
+        return list(latest_records(args.archive))
+    pages = []
+    for filename in sorted(os.listdir(args.html_dir)):
+        if filename.endswith(('.html', '.htm')):
+            with open(os.path.join(args.html_dir, filename), 'r', encoding='utf-8', errors='replace') as f:
+                pages.append((f"https://example.org/{filename}", f.read()))
+    return pages
+
+
+def fake_fetch(page, latency, extract_args):
+    """Étage 1: simule la latence réseau, puis extrait sur place si demandé."""
+    time.sleep(latency)
+    if extract_args is None:
+        return page
+    return _extract_fetched_page((page[0], page[1]) + extract_args)
+
+
+def replay(pages, fetch_workers, parse_workers, latency, backend, dedup_settings):
+    """Rejoue les pages dans le pipeline et retourne le débit en pages/s."""
+    parse_pool = None
+    if parse_workers:
+        parse_pool = ProcessPoolExecutor(max_workers=parse_workers, mp_context=_process_context())
+        # Démarrage des processus hors de la mesure
+        list(parse_pool.map(_extract_fetched_page, [(pages[0][0], pages[0][1], backend, dedup_settings)] * parse_workers))
+
+    extract_args = None if parse_pool else (backend, dedup_settings)
+    parse_queue_size = 2 * parse_workers
+    pending = list(reversed(pages))
+    in_flight = {}
+    parsing = set()
+    done_count = 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=fetch_workers) as executor:
+        while pending or in_flight:
+            while pending and len(in_flight) - len(parsing) < fetch_workers and len(parsing) <= parse_queue_size:
+                future = executor.submit(fake_fetch, pending.pop(), latency, extract_args)
+                in_flight[future] = True
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                del in_flight[future]
+                result = future.result()
+                if parse_pool is not None and future not in parsing:
+                    url, html = result
+                    parse_future = parse_pool.submit(_extract_fetched_page, (url, html, backend, dedup_settings))
+                    in_flight[parse_future] = True
+                    parsing.add(parse_future)
+                    continue
+                parsing.discard(future)
+                done_count += 1
+    elapsed = time.perf_counter() - start
+
+    if parse_pool is not None:
+        parse_pool.shutdown()
+    return done_count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark du pipeline téléchargement/extraction')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--archive', help='Archive HTML du crawl (html_archive.warc.gz)')
+    source.add_argument('--html-dir', help='Répertoire de pages HTML sauvegardées')
+    parser.add_argument('--fetch-workers', type=int, default=8, help='Threads de téléchargement')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latence réseau simulée par page (s)')
+    parser.add_argument('--parse-workers', type=int, nargs='+',
+                        help='Nombres de processus à tester (défaut: 0, 1, 2, 4... jusqu\'au nombre de CPU)')
+    parser.add_argument('--parser', default='auto', help='Parseur HTML (auto, lxml, selectolax, html.parser)')
+    parser.add_argument('--repeat', type=int, default=1, help='Nombre de copies du corpus à rejouer')
+    parser.add_argument('--no-dedup', action='store_true', help='Ne pas calculer les empreintes SimHash')
+    args = parser.parse_args()
+
+    pages = load_pages(args) * args.repeat
+    if not pages:
+        print("Aucune page à rejouer")
+        return
+
+    if args.parse_workers:
+        parse_counts = args.parse_workers
+    else:
+        parse_counts = [0]
+        count = 1
+        while count <= (os.cpu_count() or 1):
+            parse_counts.append(count)
+            count *= 2
+
+    backend = resolve_backend(args.parser)
+    dedup_settings = None if args.no_dedup else (3, 20)
+    print(f"{len(pages)} pages, parseur {backend}, {args.fetch_workers} threads de téléchargement, "
+          f"latence simulée {args.latency * 1000:.0f} ms\n")
+    for parse_workers in parse_counts:
+        rate = replay(pages, args.fetch_workers, parse_workers, args.latency, backend, dedup_settings)
+        label = "threads" if parse_workers == 0 else f"{parse_workers} processus"
+        print(f"{label:<15} {rate:10.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
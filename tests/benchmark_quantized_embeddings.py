@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Concordance et latence des embeddings int8 (EMBEDDING_BACKEND=int8) par rapport au modèle fp32.
+- Concordance: pour chaque question, recouvrement des k chunks les plus proches
+  (similarité cosinus) trouvés avec les vecteurs fp32 et avec les vecteurs int8;
+  le script échoue (code 1) si le recouvrement moyen est sous --min-overlap
+- Latence: temps de vectorisation d'une question (moyenne, p95) et débit de
+  vectorisation des chunks (chunks/s) pour chaque backend
+
+Usage:
+    python tests/benchmark_quantized_embeddings.py --k 5 --min-overlap 0.8 --threads 4
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+from modules.chunking import DEFAULT_MODEL
+from modules.corpus_loader import load_documents
+from modules.parent_child import ParentChildSplitter
+from modules.quantized_embeddings import QuantizedEmbeddings
+
+QUESTIONS = [
+    "Quels sont les horaires de la bibliothèque?",
+    "Comment emprunter un livre?",
+    "Où trouver des informations sur le master?",
+    "Quels sont les services disponibles à la bibliothèque?",
+    "Comment réserver une salle de travail en groupe?",
+    "Combien coûte l'impression d'une page A4?",
+    "Comment accéder aux ressources numériques depuis chez moi?",
+    "Quelle est l'adresse de la bibliothèque de la faculté de droit à Sceaux?",
+    "Comment prolonger un prêt?",
+    "Peut-on emprunter un ordinateur portable?",
+    "Comment faire venir un document d'une autre bibliothèque?",
+    "Qui peut s'inscrire à la bibliothèque?",
+]
+
+
+def encode(embed, texts):
+    """Vecteurs normalisés (similarité cosinus = produit scalaire) et durée de l'encodage."""
+    start = time.perf_counter()
+    vectors = np.asarray(embed(texts), dtype=np.float32)
+    elapsed = time.perf_counter() - start
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True), elapsed
+
+
+def query_latency(embed_query, questions, repeat):
+    timings = []
+    for _ in range(repeat):
+        for question in questions:
+            start = time.perf_counter()
+            embed_query(question)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return sum(timings) / len(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concordance et latence des embeddings int8')
+    parser.add_argument('--data', default='data', help='Répertoire des données')
+    parser.add_argument('--txt', default='txt_data', help='Répertoire des fichiers texte')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='Modèle sentence-transformers')
+    parser.add_argument('--k', type=int, default=5, help='Nombre de chunks comparés par question')
+    parser.add_argument('--min-overlap', type=float, default=0.8, help='Recouvrement moyen minimal des top-k')
+    parser.add_argument('--threads', type=int, default=0, help='Threads torch (0: réglage par défaut)')
+    parser.add_argument('--repeat', type=int, default=5, help='Répétitions de la mesure de latence')
+    parser.add_argument('--limit', type=int, default=0, help='Nombre maximal de chunks (0: tous)')
+    args = parser.parse_args()
+
+    documents = load_documents(args.data, args.txt)
+    texts = [chunk.page_content.replace("\n", " ")
+             for chunk in ParentChildSplitter.from_embeddings(None).split_documents(documents)]
+    if args.limit:
+        texts = texts[:args.limit]
+    if not texts:
+        print("Aucun chunk à vectoriser")
+        return 1
+
+    fp32 = SentenceTransformer(args.model, device="cpu").eval()
+    int8 = QuantizedEmbeddings(args.model, threads=args.threads or None)
+    print(f"\n{len(texts)} chunks, {len(QUESTIONS)} questions, {torch.get_num_threads()} threads torch\n")
+
+    def fp32_encode(batch):
+        with torch.inference_mode():
+            return fp32.encode(batch, batch_size=32, show_progress_bar=False, convert_to_numpy=True)
+
+    fp32_chunks, fp32_time = encode(fp32_encode, texts)
+    int8_chunks, int8_time = encode(int8.embed_documents, texts)
+    fp32_queries, _ = encode(fp32_encode, QUESTIONS)
+    int8_queries, _ = encode(int8.embed_documents, QUESTIONS)
+
+    overlaps = []
+    for fp32_query, int8_query in zip(fp32_queries, int8_queries):
+        fp32_top = set(np.argsort(-(fp32_chunks @ fp32_query))[:args.k])
+        int8_top = set(np.argsort(-(int8_chunks @ int8_query))[:args.k])
+        overlaps.append(len(fp32_top & int8_top) / args.k)
+    mean_overlap = sum(overlaps) / len(overlaps)
+    cosine = float(np.mean(np.sum(fp32_chunks * int8_chunks, axis=1)))
+
+    fp32_latency = query_latency(lambda question: fp32_encode([question]), QUESTIONS, args.repeat)
+    int8_latency = query_latency(int8.embed_query, QUESTIONS, args.repeat)
+
+    print(f"{'backend':>8} {'question (ms)':>14} {'p95 (ms)':>9} {'chunks/s':>9}")
+    print(f"{'fp32':>8} {fp32_latency[0]:>14.2f} {fp32_latency[1]:>9.2f} {len(texts) / fp32_time:>9.1f}")
+    print(f"{'int8':>8} {int8_latency[0]:>14.2f} {int8_latency[1]:>9.2f} {len(texts) / int8_time:>9.1f}")
+    print(f"\nSimilarité cosinus moyenne fp32/int8 des chunks: {cosine:.4f}")
+    print(f"Recouvrement des top-{args.k}: moyenne {mean_overlap:.2f}, minimum {min(overlaps):.2f} "
+          f"(seuil {args.min_overlap:.2f})")
+
+    if mean_overlap < args.min_overlap:
+        print("ÉCHEC: les résultats de recherche int8 s'écartent trop du modèle fp32")
+        return 1
+    print("OK: concordance suffisante avec le modèle fp32")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
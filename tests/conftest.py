@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+"""
+Configuration commune des tests pytest (python -m pytest tests/test_vector_index.py ...).
+Les tests importent les modules du dépôt depuis la racine; les fixtures des
+caches partagent un répertoire d'index versionné.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.vector_index import write_index_version
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    """Répertoire d'index temporaire, avec une version de l'index déjà écrite."""
+    db_dir = str(tmp_path)
+    write_index_version(db_dir, "v0")
+    return db_dir
+
+
+@pytest.fixture
+def change_index_version():
+    """Change la version de l'index comme une resynchronisation."""
+    def change(db_dir, version):
+        # IndexVersionWatcher relit le fichier quand sa date de modification change
+        time.sleep(0.02)
+        write_index_version(db_dir, version)
+    return change
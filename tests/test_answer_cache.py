@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test du cache sémantique des réponses (modules/answer_cache.py), hors ligne.
+Vérifie le seuil de similarité, l'expiration des réponses (ttl), l'ordre
+d'éviction quand la mémoire maximale est atteinte, l'invalidation quand la
+version de l'index change et le refus des réponses en temps réel (horaires).
+
+Usage:
+    python -m pytest tests/test_answer_cache.py
+"""
+
+import time
+
+from langchain_core.documents import Document
+from modules.answer_cache import SemanticAnswerCache
+from modules.vector_index import write_index_version
+
+SOURCES = [Document(page_content="Le prêt est de 3 semaines.", metadata={"source": "all_pages"})]
+
+
+def test_threshold(index_dir):
+    cache = SemanticAnswerCache(index_dir, threshold=0.9)
+    cache.store("Comment emprunter un livre ?", [1.0, 0.0, 0.0], "Avec la carte.", SOURCES)
+    close = cache.lookup([0.95, 0.1, 0.0])
+    # Question proche servie, avec ses sources
+    assert close is not None and close[0] == "Avec la carte."
+    assert close[1][0].page_content == SOURCES[0].page_content
+    # Question éloignée non servie
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    # Réponse en temps réel (horaires) refusée
+    assert not cache.store("Horaires BU Orsay", [0.0, 1.0, 0.0], "9h-19h",
+                           [Document(page_content="9h-19h", metadata={"source": "module_horaires"})])
+
+
+def test_expiry(index_dir):
+    cache = SemanticAnswerCache(index_dir, ttl=0.05)
+    cache.store("Où imprimer ?", [0.0, 1.0, 0.0], "Au rez-de-chaussée.", SOURCES)
+    assert cache.lookup([0.0, 1.0, 0.0]) is not None
+    time.sleep(0.1)
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_eviction_order(index_dir):
+    cache = SemanticAnswerCache(index_dir)
+    cache.store("question a", [1.0, 0.0, 0.0], "réponse a", SOURCES)
+    entry_size = cache.stats()["bytes"]
+    # Place pour deux réponses de même taille, pas pour trois
+    cache.max_bytes = int(entry_size * 2.5)
+    cache.store("question b", [0.0, 1.0, 0.0], "réponse b", SOURCES)
+    cache.lookup([1.0, 0.0, 0.0])  # a devient la plus récemment utilisée
+    cache.store("question c", [0.0, 0.0, 1.0], "réponse c", SOURCES)
+    # La moins récemment utilisée (b) est évincée, les autres sont conservées
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.lookup([1.0, 0.0, 0.0]) is not None and cache.lookup([0.0, 0.0, 1.0]) is not None
+    assert cache.stats()["bytes"] <= cache.max_bytes and cache.stats()["evictions"] == 1
+
+
+def test_index_version(index_dir, change_index_version):
+    write_index_version(index_dir, "v1")
+    cache = SemanticAnswerCache(index_dir)
+    cache.store("Comment réserver une salle ?", [0.0, 0.0, 1.0], "Sur Affluences.", SOURCES)
+    assert cache.lookup([0.0, 0.0, 1.0]) is not None
+    change_index_version(index_dir, "v2")
+    assert cache.lookup([0.0, 0.0, 1.0]) is None
+    assert cache.stats()["invalidations"] == 1
+
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test du cache persistant des générations du LLM (modules/llm_cache.py), hors ligne.
+Vérifie la clé (modèle et paramètres + prompt), la persistance après
+réouverture du fichier SQLite et la taille maximale: au-delà, les générations
+les moins récemment utilisées sont supprimées.
+
+Usage:
+    python -m pytest tests/test_llm_cache.py
+"""
+
+import time
+
+import pytest
+from langchain_core.outputs import Generation
+from modules.llm_cache import LLM_CACHE_FILE, PersistentLLMCache
+
+LLM_STRING = "LlamaCpp:mistral-7b-instruct:temperature=0.1"
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / LLM_CACHE_FILE)
+
+
+def texts(generations):
+    return [generation.text for generation in generations] if generations else None
+
+
+def test_lookup(path):
+    cache = PersistentLLMCache(path)
+    cache.update("Question: prêt ?", LLM_STRING, [Generation(text="3 semaines.")])
+    assert texts(cache.lookup("Question: prêt ?", LLM_STRING)) == ["3 semaines."]
+    # Autre modèle ou paramètres, autre prompt: échec
+    assert cache.lookup("Question: prêt ?", LLM_STRING.replace("0.1", "0.7")) is None
+    assert cache.lookup("Question: impression ?", LLM_STRING) is None
+    cache.close()
+
+    # Génération conservée après réouverture
+    reopened = PersistentLLMCache(path)
+    assert texts(reopened.lookup("Question: prêt ?", LLM_STRING)) == ["3 semaines."]
+    reopened.close()
+
+
+def test_lru_cap(path):
+    cache = PersistentLLMCache(path)
+    cache.update("prompt a", LLM_STRING, [Generation(text="réponse a")])
+    entry_size = cache.stats()["bytes"]
+    cache.close()
+
+    # Place pour deux générations de même taille, pas pour trois
+    max_bytes = int(entry_size * 2.5)
+    cache = PersistentLLMCache(path, max_bytes=max_bytes)
+    time.sleep(0.01)
+    cache.update("prompt b", LLM_STRING, [Generation(text="réponse b")])
+    time.sleep(0.01)
+    cache.lookup("prompt a", LLM_STRING)  # a devient la plus récemment utilisée
+    time.sleep(0.01)
+    cache.update("prompt c", LLM_STRING, [Generation(text="réponse c")])
+    stats = cache.stats()
+    # La moins récemment utilisée (b) est supprimée, les autres sont conservées
+    assert cache.lookup("prompt b", LLM_STRING) is None
+    assert cache.lookup("prompt a", LLM_STRING) is not None and cache.lookup("prompt c", LLM_STRING) is not None
+    assert stats["bytes"] <= max_bytes and stats["entries"] == 2 and stats["evictions"] == 1
+    cache.close()
+
+    # La taille est recalculée depuis le fichier à la réouverture
+    reopened = PersistentLLMCache(path, max_bytes=max_bytes)
+    assert reopened.stats()["bytes"] == stats["bytes"] and reopened.stats()["entries"] == 2
+    reopened.close()
+
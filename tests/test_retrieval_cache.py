@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test du cache des recherches (modules/retrieval_cache.py), hors ligne.
+Vérifie la normalisation des questions, l'expiration des entrées (ttl),
+l'ordre d'éviction (la moins récemment utilisée d'abord) et l'invalidation
+quand la version de l'index change.
+
+Usage:
+    python -m pytest tests/test_retrieval_cache.py
+"""
+
+import time
+
+from modules.retrieval_cache import RetrievalCache, normalize_query
+from modules.vector_index import write_index_version
+
+
+def test_lookup(index_dir):
+    cache = RetrievalCache(index_dir)
+    cache.put("Horaires de la BU d'Orsay ?", 20, [0.1, 0.2], ["a-0", "a-1"], [0.9, 0.8])
+    # Normalisation: casse, ponctuation, espaces
+    assert normalize_query("  Horaires de la BU d'Orsay ?") == normalize_query("horaires de la bu d orsay")
+    assert cache.get("horaires  de la bu d'orsay", 20) == ([0.1, 0.2], ["a-0", "a-1"], [0.9, 0.8])
+    # Autre k: échec
+    assert cache.get("Horaires de la BU d'Orsay ?", 10) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_expiry(index_dir):
+    cache = RetrievalCache(index_dir, ttl=0.05)
+    cache.put("emprunter un livre", 20, [0.1], ["b-0"], [0.7])
+    assert cache.get("emprunter un livre", 20) is not None
+    time.sleep(0.1)
+    assert cache.get("emprunter un livre", 20) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_eviction_order(index_dir):
+    cache = RetrievalCache(index_dir, max_entries=2)
+    cache.put("question a", 20, [1.0], ["a"], [1.0])
+    cache.put("question b", 20, [2.0], ["b"], [1.0])
+    cache.get("question a", 20)  # a devient la plus récemment utilisée
+    cache.put("question c", 20, [3.0], ["c"], [1.0])
+    # La moins récemment utilisée (b) est évincée, les autres sont conservées
+    assert cache.get("question b", 20) is None
+    assert cache.get("question a", 20) is not None and cache.get("question c", 20) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_index_version(index_dir, change_index_version):
+    write_index_version(index_dir, "v1")
+    cache = RetrievalCache(index_dir)
+    cache.put("salles de travail", 20, [0.5], ["s-0"], [0.6])
+    assert cache.get("salles de travail", 20) is not None
+    change_index_version(index_dir, "v2")
+    assert cache.get("salles de travail", 20) is None
+    assert cache.stats()["index_version"] == "v2"
+
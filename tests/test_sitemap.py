@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test de la découverte par sitemap (modules/sitemap.py).
+Les tests tournent hors ligne sur les sitemaps de tests/fixtures/ (index de
+sitemaps, sitemap compressé en gzip, dates <lastmod>).
+Avec --url, les sitemaps réels du site sont parcourus.
+
+Usage:
+    python -m pytest tests/test_sitemap.py
+    python tests/test_sitemap.py --url https://www.bibliotheques.universite-paris-saclay.fr/
+"""
+
+import os
+import sys
+import gzip
+import argparse
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.sitemap import iter_sitemap_urls, parse_lastmod, sitemaps_from_robots
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+SITE = "https://www.bibliotheques.universite-paris-saclay.fr"
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+def test_fixtures():
+    """Parcours hors ligne: index -> sitemap en clair + sitemap gzip."""
+    files = {
+        f"{SITE}/sitemap_index.xml": read_fixture('sitemap_index.xml'),
+        f"{SITE}/sitemap.xml?page=1": read_fixture('sitemap.xml'),
+        # Le second sitemap est servi compressé, comme un fichier .xml.gz
+        f"{SITE}/sitemap.xml?page=2": gzip.compress(read_fixture('sitemap_2.xml')),
+    }
+    entries = list(iter_sitemap_urls([f"{SITE}/sitemap_index.xml"], files.get))
+    urls = [entry.url for entry in entries]
+    lastmods = {entry.url: entry.lastmod for entry in entries}
+
+    # 4 URLs trouvées à travers l'index, dont celle du sitemap gzip
+    assert len(entries) == 4
+    assert f"{SITE}/actualites/nouvelles-ressources" in urls
+    # Liens xhtml:link alternatifs ignorés
+    assert f"{SITE}/en/libraries/bu-orsay" not in urls
+    # Date seule (2024-01-15) et URL sans <lastmod>
+    assert lastmods.get(f"{SITE}/bibliotheques/bu-orsay") == datetime(2024, 1, 15)
+    assert lastmods.get(f"{SITE}/services/pret-entre-bibliotheques") is None
+
+
+def test_helpers():
+    robots = "User-agent: *\nDisallow: /admin\nSitemap: /sitemap.xml\nsitemap: https://example.org/other.xml\n"
+    utc = parse_lastmod("2024-02-20T08:30:00Z")
+    offset = parse_lastmod("2024-02-20T09:30:00+01:00")
+    assert sitemaps_from_robots(robots, SITE + "/") == [f"{SITE}/sitemap.xml", "https://example.org/other.xml"]
+    # Fuseaux horaires ramenés à l'heure locale
+    assert utc == offset and utc.tzinfo is None
+    assert parse_lastmod("hier") is None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Test de la découverte par sitemap')
+    parser.add_argument('--url', help='URL du site à tester en ligne (ex: https://www.bibliotheques.universite-paris-saclay.fr/)')
+    args = parser.parse_args()
+
+    if not args.url:
+        return pytest.main([__file__, "-v"])
+
+    from simple_combined_scraper import SimpleBibliothequesScraper
+    scraper = SimpleBibliothequesScraper(base_url=args.url, output_dir='data/test_sitemap',
+                                         txt_output_dir='data/test_sitemap/txt')
+    sitemaps = scraper.discover_sitemaps()
+    print(f"Sitemaps: {sitemaps}")
+    count = 0
+    for entry in iter_sitemap_urls(sitemaps, scraper._fetch_bytes):
+        count += 1
+        if count <= 20:
+            print(f"  {entry.url}  {entry.lastmod or '-'}")
+    print(f"{count} URLs au total")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test de la synchronisation incrémentale de l'index (modules/vector_index.py).
+IncrementalIndexer.sync est le seul chemin d'écriture de la base Chroma: ce
+test le fait tourner hors ligne sur une base en mémoire (même interface que
+Chroma: get, add_documents, delete) avec le découpage parents/enfants, et
+vérifie qu'une seconde synchronisation ne change rien, qu'un document modifié
+remplace ses chunks et qu'un document supprimé perd ses chunks et ses passages.
+
+Usage:
+    python -m pytest tests/test_vector_index.py
+"""
+
+
+from langchain_core.documents import Document
+from modules.chunking import TokenAwareChunker
+from modules.parent_child import ParentChildSplitter, ParentStore
+from modules.vector_index import IncrementalIndexer, read_index_version
+
+
+class MemoryVectorStore:
+    """Base vectorielle en mémoire, avec les méthodes de Chroma utilisées par IncrementalIndexer."""
+
+    def __init__(self):
+        self.chunks = {}
+
+    def get(self, include=None, limit=None, offset=0):
+        items = list(self.chunks.items())[offset:offset + limit]
+        return {"ids": [id_ for id_, _ in items], "metadatas": [chunk.metadata for _, chunk in items]}
+
+    def add_documents(self, documents, ids):
+        for id_, document in zip(ids, documents):
+            self.chunks[id_] = document
+
+    def delete(self, ids):
+        for id_ in ids:
+            self.chunks.pop(id_, None)
+
+    def ids_for(self, doc_key):
+        return {id_ for id_, chunk in self.chunks.items() if chunk.metadata.get("doc_key") == doc_key}
+
+
+def make_document(doc_id, topic, paragraphs=12):
+    text = "\n".join(
+        f"La bibliothèque propose le service {topic} numéro {i}. Les étudiants peuvent "
+        f"réserver une place, emprunter des ouvrages et consulter les ressources en ligne."
+        for i in range(paragraphs)
+    )
+    return Document(page_content=text, metadata={"doc_id": doc_id, "source": "all_pages", "title": topic})
+
+
+def test_sync(tmp_path):
+    db_dir = str(tmp_path)
+    # Longueurs approchées (sans tokenizer du modèle): test hors ligne et déterministe
+    splitter = ParentChildSplitter(TokenAwareChunker(max_tokens=96, overlap_tokens=0),
+                                   TokenAwareChunker(max_tokens=32, overlap_tokens=4))
+    vectordb = MemoryVectorStore()
+    parent_store = ParentStore.for_index(db_dir)
+
+    def sync(documents):
+        return IncrementalIndexer(vectordb, splitter, db_dir, batch_size=8, parent_store=parent_store).sync(documents)
+
+    try:
+        documents = [make_document("pret", "prêt"), make_document("impression", "impression"),
+                     make_document("salles", "salles de travail")]
+        stats = sync(documents)
+        first_ids = set(vectordb.chunks)
+        first_version = read_index_version(db_dir)
+        # Premier passage: 3 documents nouveaux, plusieurs chunks et des passages parents pour chacun
+        assert stats["new"] == 3 and stats["chunks_added"] == len(first_ids)
+        assert all(len(vectordb.ids_for(d.metadata["doc_id"])) > 1 for d in documents)
+        assert set(parent_store.indexed()) == {"pret", "impression", "salles"}
+        assert first_version == stats["version"]
+
+        # Seconde synchronisation sur les mêmes documents: rien ne change
+        parents_before = parent_store.count()
+        stats = sync(documents)
+        assert stats["unchanged"] == 3 and stats["new"] == 0 and stats["changed"] == 0
+        assert stats["chunks_added"] == 0 and stats["chunks_deleted"] == 0 and set(vectordb.chunks) == first_ids
+        assert read_index_version(db_dir) == first_version and parent_store.count() == parents_before
+
+        # Document modifié: ses chunks et ses passages sont remplacés, les autres ne bougent pas
+        old_pret_ids = vectordb.ids_for("pret")
+        old_pret_hash = parent_store.indexed()["pret"]
+        documents[0] = make_document("pret", "prêt entre bibliothèques", paragraphs=8)
+        stats = sync(documents)
+        new_pret_ids = vectordb.ids_for("pret")
+        assert stats["changed"] == 1 and stats["unchanged"] == 2
+        assert not (old_pret_ids & set(vectordb.chunks))
+        assert new_pret_ids and stats["chunks_added"] == len(new_pret_ids)
+        assert all(vectordb.chunks[id_].page_content in documents[0].page_content for id_ in new_pret_ids)
+        assert first_ids - old_pret_ids == set(vectordb.chunks) - new_pret_ids
+        assert parent_store.indexed()["pret"] not in (None, old_pret_hash)
+        assert read_index_version(db_dir) != first_version
+
+        # Document supprimé du corpus: ses chunks et ses passages disparaissent
+        removed_ids = vectordb.ids_for("impression")
+        stats = sync([documents[0], documents[2]])
+        assert stats["removed"] == 1 and stats["unchanged"] == 2
+        assert not vectordb.ids_for("impression") and stats["chunks_deleted"] == len(removed_ids)
+        assert "impression" not in parent_store.indexed()
+        # Chaque chunk restant pointe vers un passage enregistré
+        assert all(parent_store.get_many([chunk.metadata["parent_id"]]) for chunk in vectordb.chunks.values())
+    finally:
+        parent_store.close()
+